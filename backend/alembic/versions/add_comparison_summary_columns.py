@@ -0,0 +1,43 @@
+"""Add generated summary columns to document comparisons
+
+Revision ID: add_comparison_summary_columns
+Revises: compress_comparison_result
+Create Date: 2025-11-04 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'add_comparison_summary_columns'
+down_revision = 'compress_comparison_result'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Derived from the stored JSONB when each row is written, so list views can
+    # read them without touching the comparison payload
+    op.execute("""
+        ALTER TABLE document_comparisons
+        ADD COLUMN similarity_score DOUBLE PRECISION
+            GENERATED ALWAYS AS (COALESCE((comparison_result->>'similarity_score')::double precision, 0.0)) STORED,
+        ADD COLUMN overall_risk VARCHAR(16)
+            GENERATED ALWAYS AS (COALESCE(risk_assessment->>'overall_risk', 'low')) STORED,
+        ADD COLUMN change_count INTEGER
+            GENERATED ALWAYS AS (
+                COALESCE(jsonb_array_length(comparison_result->'text_changes'), 0)
+                + COALESCE(jsonb_array_length(comparison_result->'clause_changes'), 0)
+            ) STORED
+    """)
+    op.create_index('idx_document_comparisons_org_created_at', 'document_comparisons', ['org_id', 'created_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_document_comparisons_org_created_at', 'document_comparisons')
+    op.execute("""
+        ALTER TABLE document_comparisons
+        DROP COLUMN change_count,
+        DROP COLUMN overall_risk,
+        DROP COLUMN similarity_score
+    """)
@@ -0,0 +1,28 @@
+"""Compress stored comparison payloads with lz4
+
+Revision ID: compress_comparison_result
+Revises: 0f417e0e7d90
+Create Date: 2025-11-03 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'compress_comparison_result'
+down_revision = '0f417e0e7d90'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Large comparison payloads are TOASTed; lz4 compresses and decompresses
+    # them much faster than the default pglz while keeping the JSONB type
+    # queryable. Only newly written values use the new method.
+    op.execute('ALTER TABLE document_comparisons ALTER COLUMN comparison_result SET COMPRESSION lz4')
+    op.execute('ALTER TABLE document_comparisons ALTER COLUMN risk_assessment SET COMPRESSION lz4')
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE document_comparisons ALTER COLUMN risk_assessment SET COMPRESSION pglz')
+    op.execute('ALTER TABLE document_comparisons ALTER COLUMN comparison_result SET COMPRESSION pglz')
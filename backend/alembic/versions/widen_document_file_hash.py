@@ -0,0 +1,37 @@
+"""Widen documents.file_hash for algorithm-prefixed fingerprints
+
+Revision ID: widen_document_file_hash
+Revises: add_comparison_summary_columns
+Create Date: 2025-11-05 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'widen_document_file_hash'
+down_revision = 'add_comparison_summary_columns'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # New fingerprints are stored as "b3:<64 hex chars>"; legacy SHA-256 rows keep bare hex
+    op.alter_column(
+        'documents',
+        'file_hash',
+        existing_type=sa.String(length=64),
+        type_=sa.String(length=80),
+        existing_nullable=True
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'documents',
+        'file_hash',
+        existing_type=sa.String(length=80),
+        type_=sa.String(length=64),
+        existing_nullable=True
+    )
@@ -127,6 +127,11 @@ def require_roles(allowed_roles: list[str]):
     return roles_checker
 
 
+async def get_current_org(current_user: User = Depends(get_current_user)) -> str:
+    """Get the current user's organization ID"""
+    return str(current_user.org_id)
+
+
 async def get_current_org_id(request: Request) -> str:
     """Get current organization ID from request state"""
     org_id = getattr(request.state, "org_id", None)
@@ -88,6 +88,15 @@ class Settings(BaseSettings):
     
     # File upload limits
     MAX_FILE_SIZE_MB: int = 50
+    UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024
+    SMALL_UPLOAD_THRESHOLD_BYTES: int = 1024 * 1024
+    PARALLEL_HASH_THRESHOLD_BYTES: int = 8 * 1024 * 1024
+    # Also compute SHA-256 on upload so files stored before the BLAKE3 switch still dedupe
+    LEGACY_SHA256_DEDUP: bool = True
+    # Uploads at or above the threshold stream to S3 in parts instead of one put_object
+    S3_MULTIPART_THRESHOLD_BYTES: int = 8 * 1024 * 1024
+    S3_MULTIPART_PART_SIZE_BYTES: int = 8 * 1024 * 1024
+    S3_MULTIPART_MAX_CONCURRENCY: int = 4
     ALLOWED_FILE_TYPES: List[str] = [".pdf", ".docx", ".doc"]
     
     # Rate limiting
@@ -97,11 +106,19 @@ class Settings(BaseSettings):
     VIRUS_SCANNER_LAMBDA_FUNCTION: Optional[str] = None
     ENABLE_VIRUS_SCANNING: bool = True
     SECURITY_HEADERS_ENABLED: bool = True
+    # Shared secret workers use to sign processing-complete webhooks
+    INGESTION_WEBHOOK_SECRET: Optional[str] = None
     
     # Audit logging
     AUDIT_LOG_RETENTION_DAYS: int = 365
     ENABLE_AUDIT_LOGGING: bool = True
     
+    # Health checks
+    HEALTH_CACHE_TTL_SEC: float = 5.0
+    HEALTH_CHECK_TIMEOUT_MS: int = 500
+    SYSTEM_SAMPLE_SEC: float = 5.0
+    HEALTH_PROBE_INTERVAL_SEC: float = 5.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
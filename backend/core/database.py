@@ -3,14 +3,15 @@ Database configuration and connection management
 """
 
 from __future__ import annotations
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.pool import NullPool, QueuePool
+from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 from sqlalchemy import text, event
 from sqlalchemy.engine import Engine
 import logging
 import asyncio
 import os
+from typing import Optional
 
 from .config import settings
 
@@ -21,7 +22,7 @@ def make_engine(database_url: str, *, use_null_pool: bool | None = None):
     """
     Creates an engine with sane defaults.
     - In tests (ENVIRONMENT=test) or if use_null_pool=True: use NullPool (no pool args).
-    - Otherwise: QueuePool with pool_size/max_overflow and pool_pre_ping.
+    - Otherwise: AsyncAdaptedQueuePool with pool_size/max_overflow and pool_pre_ping.
     """
     env = os.getenv("ENVIRONMENT", "").lower()
     null_pool = use_null_pool if use_null_pool is not None else (env == "test")
@@ -41,7 +42,7 @@ def make_engine(database_url: str, *, use_null_pool: bool | None = None):
         return create_async_engine(
             database_url,
             pool_pre_ping=True,
-            poolclass=QueuePool,
+            poolclass=AsyncAdaptedQueuePool,
             pool_size=pool_size,
             max_overflow=max_overflow,
             pool_recycle=3600,   # Recycle connections after 1 hour
@@ -74,6 +75,38 @@ def get_sessionmaker():
         )
     return _SessionLocal
 
+# Health probes get their own tiny pool so a saturated application pool cannot
+# make readiness checks time out, and a stuck database cannot hang them
+_health_engine: Optional[AsyncEngine] = None
+_HealthSessionLocal: Optional[async_sessionmaker] = None
+
+def get_health_engine():
+    """Get or create the engine reserved for health probes"""
+    global _health_engine
+    if _health_engine is None:
+        _health_engine = create_async_engine(
+            settings.DATABASE_URL,
+            pool_size=2,
+            max_overflow=0,
+            pool_timeout=0.5,
+            pool_recycle=3600,
+            connect_args={"server_settings": {"statement_timeout": "500"}},
+            future=True,
+        )
+    return _health_engine
+
+def get_health_sessionmaker():
+    """Get or create the session maker for health probes"""
+    global _HealthSessionLocal
+    if _HealthSessionLocal is None:
+        _HealthSessionLocal = async_sessionmaker(
+            bind=get_health_engine(),
+            class_=AsyncSession,
+            expire_on_commit=False,
+            autoflush=False,
+        )
+    return _HealthSessionLocal
+
 # For backward compatibility - these will be called as functions now
 def engine():
     return get_engine()
@@ -98,6 +131,16 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_health_db() -> AsyncSession:
+    """Dependency to get a database session from the health probe pool"""
+    session_maker = get_health_sessionmaker()
+    async with session_maker() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
 async def set_org_context(session: AsyncSession, org_id: str):
     """Set organization context for Row Level Security"""
     await session.execute(
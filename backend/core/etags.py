@@ -0,0 +1,23 @@
+"""
+Conditional request helpers for responses served with ETags
+"""
+
+from typing import Optional
+
+
+def _opaque_tag(etag: str) -> str:
+    """Strip the weak validator prefix, leaving the quoted opaque tag"""
+    return etag.strip().removeprefix("W/")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header value against an ETag, using weak comparison"""
+    if not if_none_match:
+        return False
+    
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    if "*" in candidates:
+        return True
+    
+    opaque_tag = _opaque_tag(etag)
+    return any(_opaque_tag(candidate) == opaque_tag for candidate in candidates)
@@ -7,7 +7,8 @@ A/B testing, and safe deployment of new features.
 
 import json
 import logging
-from typing import Dict, Any, Optional, List
+from collections import Counter
+from typing import Dict, Any, Optional, List, Tuple
 from enum import Enum
 from dataclasses import dataclass, asdict
 from datetime import datetime, timezone
@@ -73,6 +74,11 @@ class FeatureFlagManager:
         self.redis_client = None
         self.cache_ttl = 300  # 5 minutes
         self.cache_prefix = "feature_flag:"
+        self.config_path = os.path.join(os.path.dirname(__file__), "..", "config", "feature_flags.json")
+        
+        # Parsed config keyed by the file's mtime, and stats derived from it
+        self._config_cache: Optional[Tuple[int, Dict[str, FeatureFlag]]] = None
+        self._stats_cache: Optional[Tuple[Dict[str, FeatureFlag], Dict[str, Any]]] = None
         
         # Initialize Redis if available
         try:
@@ -128,15 +134,18 @@ class FeatureFlagManager:
             logger.warning(f"Cache delete error: {e}")
     
     def _load_flags_from_config(self) -> Dict[str, FeatureFlag]:
-        """Load feature flags from configuration file"""
-        config_path = os.path.join(os.path.dirname(__file__), "..", "config", "feature_flags.json")
-        
-        if not os.path.exists(config_path):
+        """Load feature flags from configuration file, reparsing only when it changes"""
+        try:
+            config_version = os.stat(self.config_path).st_mtime_ns
+        except FileNotFoundError:
             logger.info("No feature flags configuration file found")
             return {}
         
+        if self._config_cache is not None and self._config_cache[0] == config_version:
+            return self._config_cache[1]
+        
         try:
-            with open(config_path, 'r') as f:
+            with open(self.config_path, 'r') as f:
                 config = json.load(f)
             
             flags = {}
@@ -144,6 +153,8 @@ class FeatureFlagManager:
                 flag = FeatureFlag(**flag_data)
                 flags[flag.key] = flag
             
+            self._config_cache = (config_version, flags)
+            self._stats_cache = None
             logger.info(f"Loaded {len(flags)} feature flags from configuration")
             return flags
         
@@ -151,6 +162,32 @@ class FeatureFlagManager:
             logger.error(f"Error loading feature flags configuration: {e}")
             return {}
     
+    def get_flag_stats(self) -> Dict[str, Any]:
+        """Get flag counts by state, rollout strategy and type, computed once per config load"""
+        flags = self._load_flags_from_config()
+        if self._stats_cache is not None and self._stats_cache[0] is flags:
+            return self._stats_cache[1]
+        
+        # Count enabled flags, rollout strategies and flag types in one pass
+        enabled_flags = 0
+        rollout_strategies = Counter()
+        flag_types = Counter()
+        for flag in flags.values():
+            enabled_flags += flag.enabled
+            rollout_strategies[flag.rollout_strategy] += 1
+            flag_types[flag.flag_type] += 1
+        
+        stats = {
+            "total_flags": len(flags),
+            "enabled_flags": enabled_flags,
+            "disabled_flags": len(flags) - enabled_flags,
+            "rollout_strategies": dict(rollout_strategies),
+            "flag_types": dict(flag_types)
+        }
+        
+        self._stats_cache = (flags, stats)
+        return stats
+    
     def _is_user_in_rollout(self, flag: FeatureFlag, user_id: str, org_id: str = None) -> bool:
         """Check if user should receive the feature flag"""
         if not flag.enabled:
@@ -265,6 +302,9 @@ class FeatureFlagManager:
     
     def invalidate_cache(self, flag_key: str = None) -> None:
         """Invalidate feature flag cache"""
+        self._config_cache = None
+        self._stats_cache = None
+        
         if not self.redis_client:
             return
         
@@ -4,12 +4,13 @@ Usage monitoring and limits enforcement middleware
 
 from fastapi import Request, HTTPException, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, Optional, List
 import structlog
 from datetime import date, datetime, timedelta
 
-from core.dependencies import get_db
+from core.database import get_sessionmaker
 from services.stripe_service import StripeService
 from models.database import User, Subscription
 
@@ -87,9 +88,8 @@ class UsageLimitMiddleware:
         if not user:
             return  # No user, skip usage check
         
-        # Get database session
-        db = next(get_db())
-        try:
+        # Middleware runs outside dependency injection, so open a session directly
+        async with get_sessionmaker()() as db:
             stripe_service = StripeService(db)
             
             # Get usage type for this endpoint
@@ -121,9 +121,6 @@ class UsageLimitMiddleware:
             
             # Track the usage (this will be called after successful processing)
             request.state.usage_to_track = usage_info
-            
-        finally:
-            db.close()
     
     def _get_usage_info(self, request: Request) -> Optional[Dict[str, Any]]:
         """Get usage information for the current request"""
@@ -175,9 +172,8 @@ class UsageTracker:
             # Use actual amount if provided, otherwise use estimated amount
             amount = actual_amount or usage_info["amount"]
             
-            # Get database session
-            db = next(get_db())
-            try:
+            # Called outside dependency injection, so open a session directly
+            async with get_sessionmaker()() as db:
                 stripe_service = StripeService(db)
                 await stripe_service.track_usage(
                     org_id=str(user.org_id),
@@ -193,9 +189,6 @@ class UsageTracker:
                     amount=amount
                 )
                 
-            finally:
-                db.close()
-                
         except Exception as e:
             logger.error("Error tracking usage", error=str(e))
 
@@ -203,7 +196,7 @@ class UsageTracker:
 class UsageAnalytics:
     """Service for usage analytics and reporting"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.stripe_service = StripeService(db)
     
@@ -221,9 +214,9 @@ class UsageAnalytics:
             )
             
             # Get subscription info
-            subscription = self.db.query(Subscription).filter(
+            subscription = (await self.db.execute(select(Subscription).where(
                 Subscription.org_id == org_id
-            ).first()
+            ))).scalars().first()
             
             # Calculate trends and insights
             analytics = {
@@ -39,6 +39,10 @@ async def lifespan(app: FastAPI):
     custom_metrics = telemetry_service.create_custom_metrics()
     app.state.metrics = custom_metrics
     
+    # Sample system metrics and probe dependencies in the background for the
+    # health and metrics endpoints
+    health.start_background_tasks()
+    
     # Create database tables
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
@@ -49,6 +53,8 @@ async def lifespan(app: FastAPI):
     
     # Shutdown
     logger.info("Shutting down LexiScan API server...")
+    await health.stop_background_tasks()
+    await health.close_health_clients()
 
 
 # Create FastAPI application
@@ -109,5 +115,7 @@ if __name__ == "__main__":
         "main:app",
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
         reload=True if os.getenv("ENVIRONMENT") == "development" else False
     )
\ No newline at end of file
@@ -81,8 +81,9 @@ class BaseRepository(Generic[ModelType]):
         if org_id:
             await self.set_org_context(org_id)
         
-        # First get the record to ensure it exists and is accessible
-        instance = await self.get_by_id(id, org_id)
+        # First get the record to ensure it exists and is accessible; the org
+        # context is already set for this transaction
+        instance = await self.get_by_id(id)
         if not instance:
             return None
         
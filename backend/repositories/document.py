@@ -2,13 +2,15 @@
 Document repository
 """
 
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict, Any
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_
+from sqlalchemy import Select, select, delete, update, and_, func
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.engine import Row
 from sqlalchemy.orm import selectinload
 
-from models.database import Document
+from models.database import Document, DocumentStatus, User
 from .base import BaseRepository
 
 
@@ -18,6 +20,35 @@ class DocumentRepository(BaseRepository[Document]):
     def __init__(self, session: AsyncSession):
         super().__init__(Document, session)
     
+    def _uploader_email_option(self):
+        """Eager-load option for the uploader's email used by document lists"""
+        return selectinload(self.model.uploader).load_only(User.email)
+    
+    async def _paginate(self, query: Select, limit: int, offset: int) -> Tuple[List[Document], int]:
+        """
+        Run a document query for one page, counting all matches in the same round trip
+        
+        Returns:
+            (documents on the page, total number of matching documents)
+        """
+        result = await self.session.execute(
+            query.add_columns(func.count().over().label("total"))
+            .limit(limit)
+            .offset(offset)
+        )
+        rows = result.all()
+        if rows:
+            return [row[0] for row in rows], rows[0].total
+        
+        if not offset:
+            return [], 0
+        
+        # A page past the end has no rows to carry the window count
+        total_result = await self.session.execute(
+            select(func.count()).select_from(query.order_by(None).subquery())
+        )
+        return [], total_result.scalar() or 0
+    
     async def get_by_hash(self, file_hash: str, org_id: str) -> Optional[Document]:
         """Get document by file hash within organization"""
         await self.set_org_context(org_id)
@@ -32,16 +63,58 @@ class DocumentRepository(BaseRepository[Document]):
         )
         return result.scalar_one_or_none()
     
-    async def get_by_status(self, status: str, org_id: str, limit: int = 100) -> List[Document]:
-        """Get documents by status within organization"""
+    async def get_by_any_hash(self, file_hashes: List[str], org_id: str) -> Optional[Document]:
+        """Get a document matching any of the given file hashes within organization"""
         await self.set_org_context(org_id)
         
         result = await self.session.execute(
+            select(self.model).where(
+                and_(
+                    self.model.file_hash.in_(file_hashes),
+                    self.model.org_id == UUID(org_id)
+                )
+            ).limit(1)
+        )
+        return result.scalars().first()
+    
+    async def create_or_get_existing(self, document_data: Dict[str, Any], org_id: str) -> Tuple[Document, bool]:
+        """
+        Insert a document unless the organization already stored the same file hash
+        
+        The insert relies on the unique (org_id, file_hash) index, so concurrent
+        uploads of the same content cannot both create a row.
+        
+        Returns:
+            (the new or existing document, whether it was created)
+        """
+        await self.set_org_context(org_id)
+        
+        result = await self.session.scalars(
+            insert(self.model)
+            .values(**document_data)
+            .on_conflict_do_nothing(index_elements=[self.model.org_id, self.model.file_hash])
+            .returning(self.model)
+        )
+        document = result.one_or_none()
+        if document is not None:
+            return document, True
+        
+        return await self.get_by_hash(document_data["file_hash"], org_id), False
+    
+    async def get_by_status(
+        self, status: str, org_id: str, limit: int = 100, offset: int = 0
+    ) -> Tuple[List[Document], int]:
+        """Get a page of documents by status within organization, with the total match count"""
+        await self.set_org_context(org_id)
+        
+        return await self._paginate(
             select(self.model)
+            .options(self._uploader_email_option())
             .where(self.model.status == status)
-            .limit(limit)
+            .order_by(self.model.created_at.desc()),
+            limit,
+            offset
         )
-        return result.scalars().all()
     
     async def get_by_uploader(self, uploader_id: UUID, org_id: str) -> List[Document]:
         """Get documents uploaded by specific user"""
@@ -74,27 +147,74 @@ class DocumentRepository(BaseRepository[Document]):
         )
         return result.scalar_one_or_none()
     
-    async def get_recent(self, org_id: str, limit: int = 10) -> List[Document]:
-        """Get recent documents within organization"""
+    async def get_recent(self, org_id: str, limit: int = 10, offset: int = 0) -> Tuple[List[Document], int]:
+        """Get a page of recent documents within organization, with the total document count"""
         await self.set_org_context(org_id)
         
-        result = await self.session.execute(
+        return await self._paginate(
             select(self.model)
-            .order_by(self.model.created_at.desc())
-            .limit(limit)
+            .options(self._uploader_email_option())
+            .order_by(self.model.created_at.desc()),
+            limit,
+            offset
         )
-        return result.scalars().all()
     
-    async def search_by_title(self, title_pattern: str, org_id: str, limit: int = 20) -> List[Document]:
-        """Search documents by title pattern"""
+    async def search_by_title(
+        self, title_pattern: str, org_id: str, limit: int = 20, offset: int = 0
+    ) -> Tuple[List[Document], int]:
+        """Search documents by title pattern, returning a page and the total match count"""
         await self.set_org_context(org_id)
         
-        result = await self.session.execute(
+        return await self._paginate(
             select(self.model)
+            .options(self._uploader_email_option())
             .where(self.model.title.ilike(f"%{title_pattern}%"))
-            .limit(limit)
+            .order_by(self.model.created_at.desc()),
+            limit,
+            offset
         )
-        return result.scalars().all()
+    
+    async def delete_returning(self, document_id: UUID, org_id: str) -> Optional[Row]:
+        """Delete a document in one statement, returning its id and s3_key if it existed"""
+        await self.set_org_context(org_id)
+        
+        result = await self.session.execute(
+            delete(self.model)
+            .where(
+                and_(
+                    self.model.id == document_id,
+                    self.model.org_id == UUID(org_id)
+                )
+            )
+            .returning(self.model.id, self.model.s3_key)
+        )
+        return result.first()
+    
+    async def try_mark_processing(self, document_id: UUID, org_id: str) -> Optional[Row]:
+        """
+        Move a document to PROCESSING unless it is already there, in one statement
+        
+        The status check and the update happen atomically, so concurrent
+        ingestion requests cannot both claim the document.
+        
+        Returns:
+            The document's id and new status, or None if it does not exist or is already processing
+        """
+        await self.set_org_context(org_id)
+        
+        result = await self.session.execute(
+            update(self.model)
+            .where(
+                and_(
+                    self.model.id == document_id,
+                    self.model.org_id == UUID(org_id),
+                    self.model.status != DocumentStatus.PROCESSING
+                )
+            )
+            .values(status=DocumentStatus.PROCESSING)
+            .returning(self.model.id, self.model.status)
+        )
+        return result.first()
     
     async def update_status(self, document_id: UUID, status: str, org_id: str) -> Optional[Document]:
         """Update document status"""
@@ -134,27 +254,20 @@ class DocumentRepository(BaseRepository[Document]):
         """Get document statistics for organization"""
         await self.set_org_context(org_id)
         
-        from sqlalchemy import func
-        
-        # Get total count
-        total_result = await self.session.execute(
-            select(func.count(self.model.id)).where(self.model.org_id == UUID(org_id))
-        )
-        total_count = total_result.scalar() or 0
-        
-        # Get count by status
-        status_result = await self.session.execute(
-            select(self.model.status, func.count(self.model.id))
+        # Per-status counts and sizes in one round trip; totals are summed from them
+        result = await self.session.execute(
+            select(self.model.status, func.count(self.model.id), func.sum(self.model.file_size))
             .where(self.model.org_id == UUID(org_id))
             .group_by(self.model.status)
         )
-        status_counts = dict(status_result.fetchall())
         
-        # Get total file size
-        size_result = await self.session.execute(
-            select(func.sum(self.model.file_size)).where(self.model.org_id == UUID(org_id))
-        )
-        total_size = size_result.scalar() or 0
+        status_counts = {}
+        total_count = 0
+        total_size = 0
+        for doc_status, count, size in result:
+            status_counts[doc_status] = count
+            total_count += count
+            total_size += size or 0
         
         return {
             "total_documents": total_count,
@@ -2,16 +2,24 @@
 Document comparison repository
 """
 
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from uuid import UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
-from sqlalchemy.orm import selectinload
+from sqlalchemy import select, and_, or_, func, literal, literal_column, Float, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import selectinload, aliased
 
-from models.database import DocumentComparison
+from models.database import DocumentComparison, Document
 from .base import BaseRepository
 
 
+# Summary columns generated by PostgreSQL from the stored JSONB payloads
+_similarity_score = literal_column("document_comparisons.similarity_score", Float)
+_overall_risk = literal_column("document_comparisons.overall_risk", String)
+_change_count = literal_column("document_comparisons.change_count", Integer)
+
+
 class DocumentComparisonRepository(BaseRepository[DocumentComparison]):
     """Repository for DocumentComparison model"""
     
@@ -82,6 +90,74 @@ class DocumentComparisonRepository(BaseRepository[DocumentComparison]):
         )
         return result.scalars().all()
     
+    async def get_recent_summaries(self, org_id: str, limit: int = 10) -> List[Row]:
+        """Get lightweight summary rows for recent comparisons within organization
+        
+        Reads the generated summary columns, so the JSONB payloads are never
+        loaded or detoasted for list views.
+        """
+        await self.set_org_context(org_id)
+        
+        document_a = aliased(Document)
+        document_b = aliased(Document)
+        
+        result = await self.session.execute(
+            select(
+                self.model.id,
+                _similarity_score.label("similarity_score"),
+                _overall_risk.label("overall_risk"),
+                _change_count.label("change_count"),
+                self.model.created_at,
+                document_a.title.label("document_a_title"),
+                document_b.title.label("document_b_title")
+            )
+            .select_from(self.model)
+            .join(document_a, document_a.id == self.model.document_a_id)
+            .join(document_b, document_b.id == self.model.document_b_id)
+            .order_by(self.model.created_at.desc())
+            .limit(limit)
+        )
+        return result.all()
+    
+    async def get_recent_as_json(self, org_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Get recent comparisons already shaped as comparison response objects
+        
+        PostgreSQL builds each response object with jsonb_build_object, passing
+        the stored change arrays through untouched, so no ORM instances or
+        response models are constructed in Python.
+        """
+        await self.set_org_context(org_id)
+        
+        document_a = aliased(Document)
+        document_b = aliased(Document)
+        comparison_result = self.model.comparison_result
+        
+        response_object = func.jsonb_build_object(
+            "comparison_id", self.model.id,
+            "document_a_id", self.model.document_a_id,
+            "document_b_id", self.model.document_b_id,
+            "document_a_title", document_a.title,
+            "document_b_title", document_b.title,
+            "text_changes", func.coalesce(comparison_result["text_changes"], literal([], JSONB)),
+            "clause_changes", func.coalesce(comparison_result["clause_changes"], literal([], JSONB)),
+            "similarity_score", func.coalesce(comparison_result["similarity_score"], literal(0.0, JSONB)),
+            "risk_assessment", func.coalesce(self.model.risk_assessment, literal({}, JSONB)),
+            "summary", func.coalesce(self.model.summary, ""),
+            "created_at", self.model.created_at,
+            "created_by", self.model.created_by,
+            type_=JSONB
+        )
+        
+        result = await self.session.execute(
+            select(response_object)
+            .select_from(self.model)
+            .join(document_a, document_a.id == self.model.document_a_id)
+            .join(document_b, document_b.id == self.model.document_b_id)
+            .order_by(self.model.created_at.desc())
+            .limit(limit)
+        )
+        return result.scalars().all()
+    
     async def get_by_user(self, user_id: UUID, org_id: str) -> List[DocumentComparison]:
         """Get comparisons created by a specific user"""
         await self.set_org_context(org_id)
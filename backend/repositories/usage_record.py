@@ -2,7 +2,7 @@
 Usage record repository
 """
 
-from typing import Optional, List
+from typing import Optional, List, Any
 from uuid import UUID
 from datetime import date, datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -38,6 +38,34 @@ class UsageRecordRepository(BaseRepository[UsageRecord]):
         )
         return result.scalars().all()
     
+    async def get_monthly_summary(
+        self,
+        org_id: str,
+        period_start: date,
+        period_end: date
+    ) -> List[Any]:
+        """Get usage totals per month and usage type within period, ordered by month"""
+        await self.set_org_context(org_id)
+        
+        month = func.date_trunc('month', self.model.period_start).label('month')
+        result = await self.session.execute(
+            select(
+                month,
+                self.model.usage_type,
+                func.sum(self.model.amount).label('total_amount')
+            )
+            .where(
+                and_(
+                    self.model.org_id == UUID(org_id),
+                    self.model.period_start >= period_start,
+                    self.model.period_end <= period_end
+                )
+            )
+            .group_by(month, self.model.usage_type)
+            .order_by(month)
+        )
+        return result.all()
+    
     async def get_current_month_usage(self, org_id: str) -> List[UsageRecord]:
         """Get current month usage for organization"""
         now = datetime.utcnow()
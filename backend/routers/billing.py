@@ -4,7 +4,8 @@ Billing and subscription management API endpoints
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, Optional
 from datetime import date
 import structlog
@@ -23,7 +24,7 @@ router = APIRouter(prefix="/billing", tags=["billing"])
 async def create_customer(
     customer_data: Dict[str, Any],
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a Stripe customer for the current organization"""
     try:
@@ -50,7 +51,7 @@ async def create_customer(
 async def create_subscription(
     subscription_data: Dict[str, Any],
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a Stripe subscription for the current organization"""
     try:
@@ -75,7 +76,7 @@ async def create_subscription(
 @router.post("/webhooks")
 async def handle_stripe_webhook(
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Handle Stripe webhook events"""
     try:
@@ -105,7 +106,7 @@ async def handle_stripe_webhook(
 async def track_usage(
     usage_data: Dict[str, Any],
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Track usage for billing purposes"""
     try:
@@ -142,7 +143,7 @@ async def get_usage_summary(
     period_start: Optional[str] = None,
     period_end: Optional[str] = None,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get usage summary for the current organization"""
     try:
@@ -175,15 +176,15 @@ async def get_usage_summary(
 @router.get("/subscription", response_model=Dict[str, Any])
 async def get_subscription_info(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get current subscription information"""
     try:
         from models.database import Subscription
         
-        subscription = db.query(Subscription).filter(
+        subscription = (await db.execute(select(Subscription).where(
             Subscription.org_id == current_user.org_id
-        ).first()
+        ))).scalars().first()
         
         if not subscription:
             return {
@@ -2,15 +2,24 @@
 Document comparison endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple, Iterator, AsyncGenerator
 from uuid import UUID
 from datetime import datetime
+from cachetools import TTLCache
+import asyncio
+import csv
+import io
+import itertools
 import logging
+import orjson
 
 from core.database import get_db
+from core.etags import etag_matches
 from core.rbac import (
     require_document_read,
     require_org_access,
@@ -18,15 +27,46 @@ from core.rbac import (
     Permission
 )
 from models.database import User
-from services.document_comparison import DocumentComparisonService, ChangeType
+from services.document_comparison import (
+    DocumentComparisonService,
+    ChangeType,
+    CHANGE_TYPE_VALUES,
+    DIFF_ALGORITHMS,
+    parse_stored_comparison
+)
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Comparison history only changes when a new comparison is stored, so the
+# fully-built history payload is cached per (org_id, limit) and dropped for
+# the whole organization whenever compare_documents runs.
+_history_cache: TTLCache = TTLCache(maxsize=1024, ttl=30)
+_history_limits: Dict[str, Set[int]] = {}
+_history_locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+
+
+def _invalidate_history_cache(org_id: str) -> None:
+    """Drop every cached history page for an organization"""
+    for limit in _history_limits.pop(org_id, set()):
+        _history_cache.pop((org_id, limit), None)
+
+
+def _comparison_etag(stored_comparison) -> str:
+    """Build the ETag for a stored comparison, which is immutable once created"""
+    return f'W/"{stored_comparison.id}-{int(stored_comparison.created_at.timestamp())}"'
+
+
+def _history_etag(history: Dict[str, Any]) -> str:
+    """Build the ETag for a history page from its newest entry and size"""
+    comparisons = history["comparisons"]
+    newest = comparisons[0]["created_at"] if comparisons else "0"
+    return f'W/"history-{newest}-{history["total"]}"'
 
 
 class CompareRequest(BaseModel):
-    document_a_id: str
-    document_b_id: str
+    document_a_id: UUID
+    document_b_id: UUID
 
 
 class TextChangeResponse(BaseModel):
@@ -80,26 +120,26 @@ class ComparisonSummaryResponse(BaseModel):
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def compare_documents(
     request: CompareRequest,
+    algorithm: str = Query("histogram", description="Diff algorithm: myers or histogram"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
     _: User = Depends(require_org_access)
 ):
     """Compare two documents and analyze differences"""
     try:
-        # Validate document IDs
-        try:
-            doc_a_id = UUID(request.document_a_id)
-            doc_b_id = UUID(request.document_b_id)
-        except ValueError:
+        doc_a_id = request.document_a_id
+        doc_b_id = request.document_b_id
+        
+        if doc_a_id == doc_b_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid document ID format"
+                detail="Cannot compare a document with itself"
             )
         
-        if doc_a_id == doc_b_id:
+        if algorithm not in DIFF_ALGORITHMS:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Cannot compare a document with itself"
+                detail="Unsupported diff algorithm. Use myers or histogram"
             )
         
         # Initialize comparison service
@@ -110,9 +150,12 @@ async def compare_documents(
             document_a_id=doc_a_id,
             document_b_id=doc_b_id,
             org_id=str(current_user.org_id),
-            user_id=current_user.id
+            user_id=current_user.id,
+            algorithm=algorithm
         )
         
+        _invalidate_history_cache(str(current_user.org_id))
+        
         # Get document titles for response
         from repositories.document import DocumentRepository
         doc_repo = DocumentRepository(db)
@@ -129,7 +172,7 @@ async def compare_documents(
         # Convert to response format
         text_changes = [
             TextChangeResponse(
-                change_type=change.change_type.value,
+                change_type=CHANGE_TYPE_VALUES[change.change_type],
                 text=change.text,
                 line_number=change.line_number,
                 page_number=change.page_number,
@@ -140,7 +183,7 @@ async def compare_documents(
         
         clause_changes = [
             ClauseChangeResponse(
-                change_type=change.change_type.value,
+                change_type=CHANGE_TYPE_VALUES[change.change_type],
                 clause_type=change.clause_type,
                 old_text=change.old_text,
                 new_text=change.new_text,
@@ -180,69 +223,39 @@ async def compare_documents(
 @router.get("/history", response_model=ComparisonHistoryResponse)
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def get_comparison_history(
+    request: Request,
     limit: int = Query(10, ge=1, le=50, description="Number of comparisons to return"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
     _: User = Depends(require_org_access)
 ):
     """Get comparison history for the organization"""
+    org_id = str(current_user.org_id)
+    cache_key = (org_id, limit)
+    
+    cached = _history_cache.get(cache_key)
+    if cached is not None:
+        return _history_response(request, *cached)
+    
+    lock = _history_locks.setdefault(cache_key, asyncio.Lock())
     try:
-        comparison_service = DocumentComparisonService(db)
-        
-        # Get comparison history
-        stored_comparisons = await comparison_service.get_comparison_history(
-            org_id=str(current_user.org_id),
-            limit=limit
-        )
-        
-        # Convert to response format
-        comparisons = []
-        for stored_comparison in stored_comparisons:
-            # Parse the stored comparison
-            result = comparison_service._parse_stored_comparison(stored_comparison)
+        async with lock:
+            # Another request may have filled the cache while we waited
+            cached = _history_cache.get(cache_key)
+            if cached is not None:
+                return _history_response(request, *cached)
             
-            text_changes = [
-                TextChangeResponse(
-                    change_type=change.change_type.value,
-                    text=change.text,
-                    line_number=change.line_number,
-                    page_number=change.page_number,
-                    confidence=change.confidence
-                )
-                for change in result.text_changes
-            ]
+            from repositories.document_comparison import DocumentComparisonRepository
+            comparison_repo = DocumentComparisonRepository(db)
             
-            clause_changes = [
-                ClauseChangeResponse(
-                    change_type=change.change_type.value,
-                    clause_type=change.clause_type,
-                    old_text=change.old_text,
-                    new_text=change.new_text,
-                    risk_impact=change.risk_impact,
-                    page_number=change.page_number
-                )
-                for change in result.clause_changes
-            ]
+            # Rows arrive from PostgreSQL already in ComparisonResponse shape
+            comparisons = await comparison_repo.get_recent_as_json(org_id, limit)
+            history = {"comparisons": comparisons, "total": len(comparisons)}
             
-            comparisons.append(ComparisonResponse(
-                comparison_id=str(stored_comparison.id),
-                document_a_id=str(stored_comparison.document_a_id),
-                document_b_id=str(stored_comparison.document_b_id),
-                document_a_title=stored_comparison.document_a.title,
-                document_b_title=stored_comparison.document_b.title,
-                text_changes=text_changes,
-                clause_changes=clause_changes,
-                similarity_score=result.similarity_score,
-                risk_assessment=result.risk_assessment,
-                summary=result.summary,
-                created_at=stored_comparison.created_at,
-                created_by=str(stored_comparison.created_by)
-            ))
-        
-        return ComparisonHistoryResponse(
-            comparisons=comparisons,
-            total=len(comparisons)
-        )
+            etag = _history_etag(history)
+            _history_cache[cache_key] = (etag, history)
+            _history_limits.setdefault(org_id, set()).add(limit)
+            return _history_response(request, etag, history)
         
     except Exception as e:
         logger.error(f"Error getting comparison history: {str(e)}")
@@ -250,78 +263,74 @@ async def get_comparison_history(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to get comparison history: {str(e)}"
         )
+    finally:
+        if not lock.locked():
+            _history_locks.pop(cache_key, None)
+
+
+def _history_response(request: Request, etag: str, payload: Dict[str, Any]) -> Response:
+    """Serve a history page, or 304 when the client already has it"""
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return ORJSONResponse(payload, headers={"ETag": etag})
+
+
+@router.get("/history/summary", response_model=List[ComparisonSummaryResponse])
+@protected_route(permissions=[Permission.DOCUMENT_READ])
+async def get_comparison_history_summary(
+    limit: int = Query(10, ge=1, le=50, description="Number of comparisons to return"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_document_read),
+    _: User = Depends(require_org_access)
+):
+    """Get compact comparison summaries for list views without change details"""
+    try:
+        from repositories.document_comparison import DocumentComparisonRepository
+        comparison_repo = DocumentComparisonRepository(db)
+        
+        rows = await comparison_repo.get_recent_summaries(str(current_user.org_id), limit)
+        
+        return [
+            ComparisonSummaryResponse.model_construct(
+                comparison_id=str(row.id),
+                document_a_title=row.document_a_title,
+                document_b_title=row.document_b_title,
+                similarity_score=row.similarity_score,
+                overall_risk=row.overall_risk,
+                change_count=row.change_count,
+                created_at=row.created_at
+            )
+            for row in rows
+        ]
+        
+    except Exception as e:
+        logger.error(f"Error getting comparison history summary: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get comparison history summary: {str(e)}"
+        )
 
 
 @router.get("/document/{document_id}", response_model=ComparisonHistoryResponse)
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def get_document_comparisons(
-    document_id: str,
+    document_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
     _: User = Depends(require_org_access)
 ):
     """Get all comparisons involving a specific document"""
     try:
-        # Validate document ID
-        try:
-            doc_id = UUID(document_id)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid document ID format"
-            )
-        
         comparison_service = DocumentComparisonService(db)
         
         # Get document comparisons
         stored_comparisons = await comparison_service.get_document_comparisons(
-            document_id=doc_id,
+            document_id=document_id,
             org_id=str(current_user.org_id)
         )
         
-        # Convert to response format
-        comparisons = []
-        for stored_comparison in stored_comparisons:
-            # Parse the stored comparison
-            result = comparison_service._parse_stored_comparison(stored_comparison)
-            
-            text_changes = [
-                TextChangeResponse(
-                    change_type=change.change_type.value,
-                    text=change.text,
-                    line_number=change.line_number,
-                    page_number=change.page_number,
-                    confidence=change.confidence
-                )
-                for change in result.text_changes
-            ]
-            
-            clause_changes = [
-                ClauseChangeResponse(
-                    change_type=change.change_type.value,
-                    clause_type=change.clause_type,
-                    old_text=change.old_text,
-                    new_text=change.new_text,
-                    risk_impact=change.risk_impact,
-                    page_number=change.page_number
-                )
-                for change in result.clause_changes
-            ]
-            
-            comparisons.append(ComparisonResponse(
-                comparison_id=str(stored_comparison.id),
-                document_a_id=str(stored_comparison.document_a_id),
-                document_b_id=str(stored_comparison.document_b_id),
-                document_a_title=stored_comparison.document_a.title,
-                document_b_title=stored_comparison.document_b.title,
-                text_changes=text_changes,
-                clause_changes=clause_changes,
-                similarity_score=result.similarity_score,
-                risk_assessment=result.risk_assessment,
-                summary=result.summary,
-                created_at=stored_comparison.created_at,
-                created_by=str(stored_comparison.created_by)
-            ))
+        # Parsing and model construction is CPU-bound, so do it in one worker thread
+        comparisons = await run_in_threadpool(_build_comparison_responses, stored_comparisons)
         
         return ComparisonHistoryResponse(
             comparisons=comparisons,
@@ -338,30 +347,71 @@ async def get_document_comparisons(
         )
 
 
+def _build_comparison_responses(stored_comparisons) -> List[ComparisonResponse]:
+    """Convert stored comparison rows to response models"""
+    comparisons = []
+    for stored_comparison in stored_comparisons:
+        # Parse the stored comparison
+        result = parse_stored_comparison(stored_comparison)
+    
+        text_changes = [
+            TextChangeResponse(
+                change_type=CHANGE_TYPE_VALUES[change.change_type],
+                text=change.text,
+                line_number=change.line_number,
+                page_number=change.page_number,
+                confidence=change.confidence
+            )
+            for change in result.text_changes
+        ]
+    
+        clause_changes = [
+            ClauseChangeResponse(
+                change_type=CHANGE_TYPE_VALUES[change.change_type],
+                clause_type=change.clause_type,
+                old_text=change.old_text,
+                new_text=change.new_text,
+                risk_impact=change.risk_impact,
+                page_number=change.page_number
+            )
+            for change in result.clause_changes
+        ]
+    
+        comparisons.append(ComparisonResponse(
+            comparison_id=str(stored_comparison.id),
+            document_a_id=str(stored_comparison.document_a_id),
+            document_b_id=str(stored_comparison.document_b_id),
+            document_a_title=stored_comparison.document_a.title,
+            document_b_title=stored_comparison.document_b.title,
+            text_changes=text_changes,
+            clause_changes=clause_changes,
+            similarity_score=result.similarity_score,
+            risk_assessment=result.risk_assessment,
+            summary=result.summary,
+            created_at=stored_comparison.created_at,
+            created_by=str(stored_comparison.created_by)
+        ))
+    
+    return comparisons
+
+
 @router.get("/{comparison_id}", response_model=ComparisonResponse)
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def get_comparison(
-    comparison_id: str,
+    comparison_id: UUID,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
     _: User = Depends(require_org_access)
 ):
     """Get a specific comparison by ID"""
     try:
-        # Validate comparison ID
-        try:
-            comp_id = UUID(comparison_id)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid comparison ID format"
-            )
-        
         from repositories.document_comparison import DocumentComparisonRepository
         comparison_repo = DocumentComparisonRepository(db)
         
         # Get comparison
-        stored_comparison = await comparison_repo.get_by_id(comp_id, str(current_user.org_id))
+        stored_comparison = await comparison_repo.get_by_id(comparison_id, str(current_user.org_id))
         
         if not stored_comparison:
             raise HTTPException(
@@ -369,13 +419,17 @@ async def get_comparison(
                 detail="Comparison not found"
             )
         
+        etag = _comparison_etag(stored_comparison)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response.headers["ETag"] = etag
+        
         # Parse the stored comparison
-        comparison_service = DocumentComparisonService(db)
-        result = comparison_service._parse_stored_comparison(stored_comparison)
+        result = parse_stored_comparison(stored_comparison)
         
         text_changes = [
             TextChangeResponse(
-                change_type=change.change_type.value,
+                change_type=CHANGE_TYPE_VALUES[change.change_type],
                 text=change.text,
                 line_number=change.line_number,
                 page_number=change.page_number,
@@ -386,7 +440,7 @@ async def get_comparison(
         
         clause_changes = [
             ClauseChangeResponse(
-                change_type=change.change_type.value,
+                change_type=CHANGE_TYPE_VALUES[change.change_type],
                 clause_type=change.clause_type,
                 old_text=change.old_text,
                 new_text=change.new_text,
@@ -424,7 +478,7 @@ async def get_comparison(
 @router.post("/{comparison_id}/export")
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def export_comparison(
-    comparison_id: str,
+    comparison_id: UUID,
     format: str = Query("json", description="Export format: json, pdf, or csv"),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
@@ -432,15 +486,6 @@ async def export_comparison(
 ):
     """Export comparison results in various formats"""
     try:
-        # Validate comparison ID
-        try:
-            comp_id = UUID(comparison_id)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid comparison ID format"
-            )
-        
         if format not in ["json", "pdf", "csv"]:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -451,7 +496,7 @@ async def export_comparison(
         comparison_repo = DocumentComparisonRepository(db)
         
         # Get comparison
-        stored_comparison = await comparison_repo.get_by_id(comp_id, str(current_user.org_id))
+        stored_comparison = await comparison_repo.get_by_id(comparison_id, str(current_user.org_id))
         
         if not stored_comparison:
             raise HTTPException(
@@ -459,12 +504,22 @@ async def export_comparison(
                 detail="Comparison not found"
             )
         
-        # For now, return JSON format
-        # In a full implementation, you would generate PDF or CSV based on the format parameter
+        # PDF rendering is not implemented yet, so pdf exports use the JSON body
         comparison_service = DocumentComparisonService(db)
-        result = comparison_service._parse_stored_comparison(stored_comparison)
+        comparison_data = stored_comparison.comparison_result or {}
+        exported_at = datetime.utcnow().isoformat()
+        filename = f"comparison_{comparison_id}.{format}"
         
-        export_data = {
+        logger.info(f"Comparison exported: {comparison_id} in {format} format by user {current_user.id}")
+        
+        if format == "csv":
+            return StreamingResponse(
+                _stream_csv_export(comparison_service, stored_comparison),
+                media_type="text/csv",
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+            )
+        
+        export_header = {
             "comparison_id": str(stored_comparison.id),
             "document_a": {
                 "id": str(stored_comparison.document_a_id),
@@ -474,42 +529,25 @@ async def export_comparison(
                 "id": str(stored_comparison.document_b_id),
                 "title": stored_comparison.document_b.title
             },
-            "similarity_score": result.similarity_score,
-            "summary": result.summary,
-            "risk_assessment": result.risk_assessment,
-            "text_changes": [
-                {
-                    "change_type": change.change_type.value,
-                    "text": change.text,
-                    "line_number": change.line_number,
-                    "page_number": change.page_number
-                }
-                for change in result.text_changes
-            ],
-            "clause_changes": [
-                {
-                    "change_type": change.change_type.value,
-                    "clause_type": change.clause_type,
-                    "old_text": change.old_text,
-                    "new_text": change.new_text,
-                    "risk_impact": change.risk_impact,
-                    "page_number": change.page_number
-                }
-                for change in result.clause_changes
-            ],
-            "exported_at": datetime.utcnow().isoformat(),
+            "similarity_score": comparison_data.get("similarity_score", 0.0),
+            "summary": stored_comparison.summary or "",
+            "risk_assessment": stored_comparison.risk_assessment or {}
+        }
+        export_footer = {
+            "exported_at": exported_at,
             "exported_by": str(current_user.id)
         }
-        
-        logger.info(f"Comparison exported: {comparison_id} in {format} format by user {current_user.id}")
-        
-        return {
-            "export_data": export_data,
+        envelope = {
             "format": format,
-            "filename": f"comparison_{comparison_id}.{format}",
-            "exported_at": datetime.utcnow().isoformat()
+            "filename": filename,
+            "exported_at": exported_at
         }
         
+        return StreamingResponse(
+            _stream_json_export(comparison_service, stored_comparison, export_header, export_footer, envelope),
+            media_type="application/json"
+        )
+        
     except HTTPException:
         raise
     except Exception as e:
@@ -517,4 +555,71 @@ async def export_comparison(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to export comparison: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+_EXPORT_BATCH_SIZE = 200
+
+_CSV_EXPORT_COLUMNS = [
+    "section", "change_type", "clause_type", "text", "old_text",
+    "new_text", "risk_impact", "line_number", "page_number"
+]
+
+
+def _json_object_body(data: Dict[str, Any]) -> bytes:
+    """Serialize a dict without its closing brace so more keys can follow"""
+    return orjson.dumps(data)[:-1]
+
+
+def _json_array_chunks(items: Iterator[Dict[str, Any]]) -> Iterator[bytes]:
+    """Serialize an iterable of dicts as JSON array contents in batches"""
+    batch = []
+    first = True
+    for item in items:
+        batch.append(orjson.dumps(item))
+        if len(batch) >= _EXPORT_BATCH_SIZE:
+            yield (b"" if first else b",") + b",".join(batch)
+            first = False
+            batch = []
+    if batch:
+        yield (b"" if first else b",") + b",".join(batch)
+
+
+async def _stream_json_export(
+    comparison_service: DocumentComparisonService,
+    stored_comparison,
+    header: Dict[str, Any],
+    footer: Dict[str, Any],
+    envelope: Dict[str, Any]
+) -> AsyncGenerator[bytes, None]:
+    """Stream the JSON export one batch of changes at a time"""
+    yield b'{"export_data":' + _json_object_body(header) + b',"text_changes":['
+    for chunk in _json_array_chunks(comparison_service.iter_text_changes(stored_comparison)):
+        yield chunk
+    yield b'],"clause_changes":['
+    for chunk in _json_array_chunks(comparison_service.iter_clause_changes(stored_comparison)):
+        yield chunk
+    yield b"]," + orjson.dumps(footer)[1:] + b"," + orjson.dumps(envelope)[1:]
+
+
+async def _stream_csv_export(
+    comparison_service: DocumentComparisonService,
+    stored_comparison
+) -> AsyncGenerator[str, None]:
+    """Stream the CSV export, flushing the buffer every batch of rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=_CSV_EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    
+    rows = itertools.chain(
+        ({"section": "text", **change} for change in comparison_service.iter_text_changes(stored_comparison)),
+        ({"section": "clause", **change} for change in comparison_service.iter_clause_changes(stored_comparison))
+    )
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % _EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+    
+    yield buffer.getvalue()
@@ -3,13 +3,19 @@ Document management endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List, Optional
+from cachetools import TTLCache
+import blake3
+from typing import BinaryIO, Dict, List, Optional, Tuple
 from uuid import UUID
 from datetime import datetime
+import asyncio
 import logging
 import hashlib
+import os
+import time
 
 from core.database import get_db
 from core.config import settings
@@ -26,7 +32,24 @@ from repositories.document import DocumentRepository
 from services.storage import storage_service
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Prefix marking Document.file_hash values as BLAKE3-256 fingerprints
+CONTENT_HASH_PREFIX = "b3:"
+
+# Presigned download URLs are valid for an hour and reused until five minutes
+# before they expire, so hot documents are not re-signed on every request
+_DOWNLOAD_URL_EXPIRATION = 3600
+_download_url_cache: TTLCache = TTLCache(maxsize=10000, ttl=_DOWNLOAD_URL_EXPIRATION - 300)
+
+# Read size for multithreaded hashing; BLAKE3 only fans out across cores
+# within a single large update
+_PARALLEL_HASH_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Uploads currently being stored, keyed by (org_id, fingerprint); a concurrent
+# upload of the same content waits for the first one's response instead of
+# running the duplicate check and S3 upload again
+_inflight_uploads: Dict[Tuple[str, str], "asyncio.Future[Optional[DocumentUploadResponse]]"] = {}
 
 
 class DocumentResponse(BaseModel):
@@ -67,6 +90,77 @@ class UploadStatusResponse(BaseModel):
     error: Optional[str] = None
 
 
+def _hash_spooled_file(spool: BinaryIO, chunk_size: int, include_legacy: bool) -> Tuple[str, Optional[str], int]:
+    """
+    Fingerprint a spooled upload in fixed-size chunks
+    
+    The fingerprint is BLAKE3-256, prefixed with its algorithm so it never
+    collides with the bare SHA-256 hex of older rows. Files above
+    PARALLEL_HASH_THRESHOLD_BYTES are hashed with BLAKE3's multithreaded tree
+    mode over larger reads; smaller files stay single-threaded to avoid the
+    thread start-up cost. UploadFile is backed by a SpooledTemporaryFile, so
+    the whole file is never held in memory. The spool is rewound afterwards
+    for the storage service.
+    
+    Returns:
+        (fingerprint, legacy SHA-256 hex digest or None, file size in bytes)
+    """
+    file_size = spool.seek(0, os.SEEK_END)
+    spool.seek(0)
+    
+    if file_size > settings.PARALLEL_HASH_THRESHOLD_BYTES:
+        hasher = blake3.blake3(max_threads=blake3.blake3.AUTO)
+        chunk_size = max(chunk_size, _PARALLEL_HASH_CHUNK_SIZE)
+    else:
+        hasher = blake3.blake3()
+    sha256 = hashlib.sha256() if include_legacy else None
+    
+    while chunk := spool.read(chunk_size):
+        hasher.update(chunk)
+        if sha256 is not None:
+            sha256.update(chunk)
+    spool.seek(0)
+    
+    legacy_hash = sha256.hexdigest() if sha256 is not None else None
+    return f"{CONTENT_HASH_PREFIX}{hasher.hexdigest()}", legacy_hash, file_size
+
+
+def _hash_upload_bytes(content: bytes, include_legacy: bool) -> Tuple[str, Optional[str], int]:
+    """Fingerprint a small upload held in memory with single BLAKE3/SHA-256 calls"""
+    legacy_hash = hashlib.sha256(content).hexdigest() if include_legacy else None
+    return f"{CONTENT_HASH_PREFIX}{blake3.blake3(content).hexdigest()}", legacy_hash, len(content)
+
+
+def _list_document_response(doc: Document) -> DocumentResponse:
+    """Build a DocumentResponse from a trusted database row without validation"""
+    return DocumentResponse.model_construct(
+        id=str(doc.id),
+        title=doc.title,
+        file_type=doc.file_type or "",
+        file_size=doc.file_size or 0,
+        file_hash=doc.file_hash or "",
+        status=doc.status,
+        uploaded_by=str(doc.uploaded_by),
+        uploader_email=doc.uploader.email if doc.uploader else None,
+        created_at=doc.created_at,
+        updated_at=doc.updated_at,
+        processed_at=doc.processed_at
+    )
+
+
+def _existing_document_response(existing_doc: Document) -> DocumentUploadResponse:
+    """Build the upload response for a file the organization already stored"""
+    upload_url = storage_service.generate_presigned_url(existing_doc.s3_key)
+    return DocumentUploadResponse(
+        document_id=str(existing_doc.id),
+        s3_key=existing_doc.s3_key,
+        upload_url=upload_url,
+        status=existing_doc.status,
+        file_hash=existing_doc.file_hash,
+        message="File already exists, returning existing document"
+    )
+
+
 @router.post("/upload", response_model=DocumentUploadResponse)
 @protected_route(permissions=[Permission.DOCUMENT_UPLOAD])
 async def upload_document(
@@ -84,61 +178,40 @@ async def upload_document(
                 detail="No filename provided"
             )
         
-        # Read file content to calculate hash for deduplication
-        file_content = await file.read()
-        file_hash = hashlib.sha256(file_content).hexdigest()
-        
-        # Reset file pointer for storage service
-        await file.seek(0)
-        
-        # Check for duplicate files in the organization
-        doc_repo = DocumentRepository(db)
-        existing_doc = await doc_repo.get_by_hash(file_hash, str(current_user.org_id))
-        
-        if existing_doc:
-            # Return existing document info
-            upload_url = storage_service.generate_presigned_url(existing_doc.s3_key)
-            return DocumentUploadResponse(
-                document_id=str(existing_doc.id),
-                s3_key=existing_doc.s3_key,
-                upload_url=upload_url,
-                status=existing_doc.status,
-                file_hash=existing_doc.file_hash,
-                message="File already exists, returning existing document"
+        if file.size is not None and file.size < settings.SMALL_UPLOAD_THRESHOLD_BYTES:
+            # Small uploads are still in memory; hashing them inline is cheaper
+            # than the chunk loop and the worker-thread hop
+            file_hash, legacy_hash, file_size = _hash_upload_bytes(await file.read(), settings.LEGACY_SHA256_DEDUP)
+            await file.seek(0)
+        else:
+            # Hash the spooled upload in a worker thread so the event loop keeps serving
+            file_hash, legacy_hash, file_size = await asyncio.to_thread(
+                _hash_spooled_file, file.file, settings.UPLOAD_CHUNK_SIZE_BYTES, settings.LEGACY_SHA256_DEDUP
             )
         
-        # Upload to S3
-        upload_result = await storage_service.upload_document(
-            file=file,
-            org_id=str(current_user.org_id),
-            user_id=str(current_user.id)
-        )
-        
-        # Create document record in database
-        document_data = {
-            "id": UUID(upload_result.document_id),
-            "org_id": current_user.org_id,
-            "title": file.filename,
-            "s3_key": upload_result.s3_key,
-            "file_type": file.content_type,
-            "file_size": len(file_content),
-            "file_hash": file_hash,
-            "status": "uploaded",
-            "uploaded_by": current_user.id
-        }
-        
-        document = await doc_repo.create(document_data, org_id=str(current_user.org_id))
-        
-        logger.info(f"Document uploaded successfully: {document.id} by user {current_user.id}")
-        
-        return DocumentUploadResponse(
-            document_id=str(document.id),
-            s3_key=document.s3_key,
-            upload_url=upload_result.upload_url,
-            status=document.status,
-            file_hash=document.file_hash,
-            message="Document uploaded successfully"
-        )
+        org_id = str(current_user.org_id)
+        inflight_key = (org_id, file_hash)
+        inflight = _inflight_uploads.get(inflight_key)
+        if inflight is not None:
+            # The same content is already being stored for this organization
+            leader_response = await asyncio.shield(inflight)
+            if leader_response is not None:
+                return leader_response.model_copy(
+                    update={"message": "File already exists, returning existing document"}
+                )
+        
+        inflight = asyncio.get_running_loop().create_future()
+        _inflight_uploads[inflight_key] = inflight
+        try:
+            response = await _store_upload(file, db, current_user, org_id, file_hash, legacy_hash, file_size)
+            inflight.set_result(response)
+            return response
+        finally:
+            if not inflight.done():
+                # Let waiters fall back to storing the file themselves
+                inflight.set_result(None)
+            if _inflight_uploads.get(inflight_key) is inflight:
+                del _inflight_uploads[inflight_key]
         
     except HTTPException:
         raise
@@ -150,6 +223,68 @@ async def upload_document(
         )
 
 
+async def _store_upload(
+    file: UploadFile,
+    db: AsyncSession,
+    current_user: User,
+    org_id: str,
+    file_hash: str,
+    legacy_hash: Optional[str],
+    file_size: int
+) -> DocumentUploadResponse:
+    """Return the organization's existing copy of a fingerprinted upload, or store it"""
+    # Check for duplicate files in the organization
+    doc_repo = DocumentRepository(db)
+    if legacy_hash:
+        existing_doc = await doc_repo.get_by_any_hash([file_hash, legacy_hash], org_id)
+    else:
+        existing_doc = await doc_repo.get_by_hash(file_hash, org_id)
+    
+    if existing_doc:
+        return _existing_document_response(existing_doc)
+    
+    # Upload to S3
+    upload_result = await storage_service.upload_document(
+        file=file,
+        org_id=org_id,
+        user_id=str(current_user.id),
+        file_hash=file_hash
+    )
+    
+    # Create document record in database
+    document_data = {
+        "id": UUID(upload_result.document_id),
+        "org_id": current_user.org_id,
+        "title": file.filename,
+        "s3_key": upload_result.s3_key,
+        "file_type": file.content_type,
+        "file_size": file_size,
+        "file_hash": file_hash,
+        "status": "uploaded",
+        "uploaded_by": current_user.id
+    }
+    
+    document, created = await doc_repo.create_or_get_existing(document_data, org_id)
+    
+    if not created:
+        # Another request stored the same content since the duplicate check
+        await storage_service.delete_document(upload_result.s3_key)
+        return _existing_document_response(document)
+    
+    await db.commit()
+    
+    logger.info(f"Document uploaded successfully: {document.id} by user {current_user.id}")
+    
+    return DocumentUploadResponse(
+        document_id=str(document.id),
+        s3_key=document.s3_key,
+        upload_url=upload_result.upload_url,
+        status=document.status,
+        file_hash=document.file_hash,
+        message="Document uploaded successfully"
+    )
+
+
 @router.get("/", response_model=DocumentListResponse)
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def list_documents(
@@ -163,44 +298,24 @@ async def list_documents(
 ):
     """List organization's documents with filtering and pagination"""
     try:
+        org_id = str(current_user.org_id)
         doc_repo = DocumentRepository(db)
         
         if search:
             # Search by title
-            documents = await doc_repo.search_by_title(search, str(current_user.org_id), limit)
-            total = len(documents)
+            documents, total = await doc_repo.search_by_title(search, org_id, limit, skip)
         elif status_filter:
             # Filter by status
-            documents = await doc_repo.get_by_status(status_filter, str(current_user.org_id), limit)
-            total = len(documents)
+            documents, total = await doc_repo.get_by_status(status_filter, org_id, limit, skip)
         else:
             # Get recent documents
-            documents = await doc_repo.get_recent(str(current_user.org_id), limit)
-            total = len(documents)
-        
-        # Convert to response format
-        document_responses = []
-        for doc in documents:
-            # Get uploader info
-            uploader_email = None
-            if doc.uploader:
-                uploader_email = doc.uploader.email
-            
-            document_responses.append(DocumentResponse(
-                id=str(doc.id),
-                title=doc.title,
-                file_type=doc.file_type or "",
-                file_size=doc.file_size or 0,
-                file_hash=doc.file_hash or "",
-                status=doc.status,
-                uploaded_by=str(doc.uploaded_by),
-                uploader_email=uploader_email,
-                created_at=doc.created_at,
-                updated_at=doc.updated_at,
-                processed_at=doc.processed_at
-            ))
-        
-        return DocumentListResponse(
+            documents, total = await doc_repo.get_recent(org_id, limit, skip)
+        
+        # Rows come straight from the database with the right types, so skip
+        # per-field validation when building the response models
+        document_responses = [_list_document_response(doc) for doc in documents]
+        
+        return DocumentListResponse.model_construct(
             documents=document_responses,
             total=total,
             page=skip // limit + 1,
@@ -218,7 +333,7 @@ async def list_documents(
 @router.get("/{document_id}", response_model=DocumentResponse)
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def get_document(
-    document_id: str,
+    document_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
     _: User = Depends(require_org_access)
@@ -226,7 +341,7 @@ async def get_document(
     """Get document details"""
     try:
         doc_repo = DocumentRepository(db)
-        document = await doc_repo.get(UUID(document_id), org_id=str(current_user.org_id))
+        document = await doc_repo.get(document_id, org_id=str(current_user.org_id))
         
         if not document:
             raise HTTPException(
@@ -253,11 +368,6 @@ async def get_document(
             processed_at=document.processed_at
         )
         
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid document ID format"
-        )
     except HTTPException:
         raise
     except Exception as e:
@@ -268,10 +378,26 @@ async def get_document(
         )
 
 
+# Progress and message reported for each document status
+_STATUS_PROGRESS = {
+    "uploaded": 25,
+    "processing": 50,
+    "completed": 100,
+    "failed": 0
+}
+
+_STATUS_MESSAGE = {
+    "uploaded": "Document uploaded successfully",
+    "processing": "Document is being processed",
+    "completed": "Document processing completed",
+    "failed": "Document processing failed"
+}
+
+
 @router.get("/{document_id}/status", response_model=UploadStatusResponse)
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def get_upload_status(
-    document_id: str,
+    document_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
     _: User = Depends(require_org_access)
@@ -279,7 +405,7 @@ async def get_upload_status(
     """Get document upload/processing status"""
     try:
         doc_repo = DocumentRepository(db)
-        document = await doc_repo.get(UUID(document_id), org_id=str(current_user.org_id))
+        document = await doc_repo.get(document_id, org_id=str(current_user.org_id))
         
         if not document:
             raise HTTPException(
@@ -287,34 +413,14 @@ async def get_upload_status(
                 detail="Document not found"
             )
         
-        # Calculate progress based on status
-        progress_map = {
-            "uploaded": 25,
-            "processing": 50,
-            "completed": 100,
-            "failed": 0
-        }
-        
-        message_map = {
-            "uploaded": "Document uploaded successfully",
-            "processing": "Document is being processed",
-            "completed": "Document processing completed",
-            "failed": "Document processing failed"
-        }
-        
         return UploadStatusResponse(
             document_id=str(document.id),
             status=document.status,
-            progress=progress_map.get(document.status, 0),
-            message=message_map.get(document.status, "Unknown status"),
+            progress=_STATUS_PROGRESS.get(document.status, 0),
+            message=_STATUS_MESSAGE.get(document.status, "Unknown status"),
             error=None if document.status != "failed" else "Processing failed"
         )
         
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid document ID format"
-        )
     except HTTPException:
         raise
     except Exception as e:
@@ -328,7 +434,7 @@ async def get_upload_status(
 @router.delete("/{document_id}")
 @protected_route(permissions=[Permission.DOCUMENT_DELETE])
 async def delete_document(
-    document_id: str,
+    document_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_delete),
     _: User = Depends(require_org_access)
@@ -336,31 +442,33 @@ async def delete_document(
     """Delete a document"""
     try:
         doc_repo = DocumentRepository(db)
-        document = await doc_repo.get(UUID(document_id), org_id=str(current_user.org_id))
         
-        if not document:
+        # Delete from database in one round trip (chunks and clauses cascade in
+        # PostgreSQL); RETURNING hands back the key needed for S3 cleanup
+        deleted = await doc_repo.delete_returning(document_id, org_id=str(current_user.org_id))
+        
+        if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Document not found"
             )
         
-        # Delete from S3
-        s3_deleted = await storage_service.delete_document(document.s3_key)
-        if not s3_deleted:
-            logger.warning(f"Failed to delete S3 object {document.s3_key}")
-        
-        # Delete from database (this will cascade to related records)
-        await doc_repo.delete(UUID(document_id), org_id=str(current_user.org_id))
+        # The row is already gone inside the transaction, so committing and
+        # removing the S3 object are independent; overlap their round trips
+        s3_deleted, commit_error = await asyncio.gather(
+            storage_service.delete_document(deleted.s3_key),
+            db.commit(),
+            return_exceptions=True
+        )
+        if isinstance(commit_error, Exception):
+            raise commit_error
+        if s3_deleted is not True:
+            logger.warning(f"Failed to delete S3 object {deleted.s3_key}")
         
         logger.info(f"Document deleted successfully: {document_id} by user {current_user.id}")
         
         return {"message": "Document deleted successfully"}
         
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid document ID format"
-        )
     except HTTPException:
         raise
     except Exception as e:
@@ -374,7 +482,7 @@ async def delete_document(
 @router.get("/{document_id}/download")
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def download_document(
-    document_id: str,
+    document_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
     _: User = Depends(require_org_access)
@@ -382,7 +490,7 @@ async def download_document(
     """Get download URL for a document"""
     try:
         doc_repo = DocumentRepository(db)
-        document = await doc_repo.get(UUID(document_id), org_id=str(current_user.org_id))
+        document = await doc_repo.get(document_id, org_id=str(current_user.org_id))
         
         if not document:
             raise HTTPException(
@@ -390,24 +498,26 @@ async def download_document(
                 detail="Document not found"
             )
         
-        # Generate download URL
-        download_url = storage_service.get_download_url(
-            document.s3_key,
-            document.title,
-            expiration=3600  # 1 hour
-        )
+        # Reuse a previously signed URL while it has enough lifetime left
+        cache_key = (document.s3_key, document.title)
+        cached = _download_url_cache.get(cache_key)
+        if cached is not None:
+            download_url, expires_at = cached
+        else:
+            download_url = storage_service.get_download_url(
+                document.s3_key,
+                document.title,
+                expiration=_DOWNLOAD_URL_EXPIRATION
+            )
+            expires_at = time.time() + _DOWNLOAD_URL_EXPIRATION
+            _download_url_cache[cache_key] = (download_url, expires_at)
         
         return {
             "download_url": download_url,
             "filename": document.title,
-            "expires_in": 3600
+            "expires_in": int(expires_at - time.time())
         }
         
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid document ID format"
-        )
     except HTTPException:
         raise
     except Exception as e:
@@ -421,15 +531,16 @@ async def download_document(
 @router.post("/{document_id}/process")
 @protected_route(permissions=[Permission.DOCUMENT_UPLOAD])
 async def process_document(
-    document_id: str,
+    document_id: UUID,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_upload),
     _: User = Depends(require_org_access)
 ):
     """Trigger document processing"""
     try:
+        org_id = str(current_user.org_id)
         doc_repo = DocumentRepository(db)
-        document = await doc_repo.get(UUID(document_id), org_id=str(current_user.org_id))
+        document = await doc_repo.get(document_id, org_id=org_id)
         
         if not document:
             raise HTTPException(
@@ -450,22 +561,17 @@ async def process_document(
             )
         
         # Update status to processing
-        await doc_repo.update_status(UUID(document_id), "processing", str(current_user.org_id))
+        await doc_repo.update_status(document_id, "processing", org_id)
         
         # TODO: Queue document for processing (will be implemented in task 5)
         logger.info(f"Document queued for processing: {document_id}")
         
         return {
             "message": "Document queued for processing",
-            "document_id": document_id,
+            "document_id": str(document_id),
             "status": "processing"
         }
         
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid document ID format"
-        )
     except HTTPException:
         raise
     except Exception as e:
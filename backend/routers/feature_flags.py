@@ -4,7 +4,7 @@ Feature Flags API Router
 Provides endpoints for managing and querying feature flags.
 """
 
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 import logging
@@ -43,20 +43,26 @@ class FeatureFlagUpdateRequest(BaseModel):
     target_orgs: Optional[List[str]] = None
 
 
+def _user_id_strings(user: User) -> Tuple[str, Optional[str]]:
+    """Stringify a user's id and org id once per request"""
+    return str(user.id), str(user.org_id) if user.org_id else None
+
+
 @router.get("/user", response_model=UserFeaturesResponse)
 async def get_user_features(
     current_user: User = Depends(get_current_user)
 ):
     """Get all feature flags for the current user"""
     try:
+        user_id, org_id = _user_id_strings(current_user)
         features = feature_flags.get_all_flags_for_user(
-            user_id=str(current_user.id),
-            org_id=str(current_user.org_id) if current_user.org_id else None
+            user_id=user_id,
+            org_id=org_id
         )
         
         return UserFeaturesResponse(
-            user_id=str(current_user.id),
-            org_id=str(current_user.org_id) if current_user.org_id else None,
+            user_id=user_id,
+            org_id=org_id,
             features=features
         )
     
@@ -75,17 +81,18 @@ async def get_user_feature(
 ):
     """Get a specific feature flag value for the current user"""
     try:
+        user_id, org_id = _user_id_strings(current_user)
         value = feature_flags.get_flag_value(
             flag_key=flag_key,
-            user_id=str(current_user.id),
-            org_id=str(current_user.org_id) if current_user.org_id else None
+            user_id=user_id,
+            org_id=org_id
         )
         
         return {
             "key": flag_key,
             "value": value,
-            "user_id": str(current_user.id),
-            "org_id": str(current_user.org_id) if current_user.org_id else None
+            "user_id": user_id,
+            "org_id": org_id
         }
     
     except Exception as e:
@@ -103,17 +110,18 @@ async def check_feature_enabled(
 ):
     """Check if a boolean feature flag is enabled for the current user"""
     try:
+        user_id, org_id = _user_id_strings(current_user)
         enabled = feature_flags.is_enabled(
             flag_key=flag_key,
-            user_id=str(current_user.id),
-            org_id=str(current_user.org_id) if current_user.org_id else None
+            user_id=user_id,
+            org_id=org_id
         )
         
         return {
             "key": flag_key,
             "enabled": enabled,
-            "user_id": str(current_user.id),
-            "org_id": str(current_user.org_id) if current_user.org_id else None
+            "user_id": user_id,
+            "org_id": org_id
         }
     
     except Exception as e:
@@ -215,27 +223,7 @@ async def get_feature_flag_stats(
 ):
     """Get feature flag usage statistics (admin only)"""
     try:
-        flags = feature_flags._load_flags_from_config()
-        
-        stats = {
-            "total_flags": len(flags),
-            "enabled_flags": sum(1 for flag in flags.values() if flag.enabled),
-            "disabled_flags": sum(1 for flag in flags.values() if not flag.enabled),
-            "rollout_strategies": {},
-            "flag_types": {}
-        }
-        
-        # Count by rollout strategy
-        for flag in flags.values():
-            strategy = flag.rollout_strategy
-            stats["rollout_strategies"][strategy] = stats["rollout_strategies"].get(strategy, 0) + 1
-        
-        # Count by flag type
-        for flag in flags.values():
-            flag_type = flag.flag_type
-            stats["flag_types"][flag_type] = stats["flag_types"].get(flag_type, 0) + 1
-        
-        return stats
+        return feature_flags.get_flag_stats()
     
     except Exception as e:
         logger.error(f"Error getting feature flag stats: {e}")
@@ -2,53 +2,487 @@
 Health check endpoints with comprehensive monitoring
 """
 
+import asyncio
 import time
+import orjson
 import psutil
-from datetime import datetime
-from typing import Dict, Any
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Tuple, TypeVar
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse, PlainTextResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
 import redis.asyncio as redis
 import boto3
-from botocore.exceptions import ClientError
 import logging
 
-from core.database import get_db
+from core.database import get_health_db, get_health_engine, get_health_sessionmaker
 from core.config import settings
 from core.telemetry import get_tracer, get_meter
 from version import get_version_info
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
 
 # Get telemetry instances
 tracer = get_tracer()
-meter = get_meter()
 
 
-@router.get("/health")
-async def health_check():
-    """Basic health check endpoint"""
-    version_info = get_version_info()
+HealthCheckResult = Tuple[str, Dict[str, Any], bool]
+
+T = TypeVar("T")
+
+
+class _CachedPayload(Generic[T]):
+    """Keeps an endpoint payload for a short TTL, refreshing it once for all concurrent callers"""
+    
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self._payload: Optional[T] = None
+        self._expires_at = 0.0
+        self._updated_at = 0.0
+        self._lock = asyncio.Lock()
+    
+    async def get(self, compute: Callable[[], Awaitable[T]]) -> T:
+        """Return the cached payload, computing it if it is missing or stale"""
+        if time.monotonic() < self._expires_at:
+            self.hits += 1
+            return self._payload
+        
+        async with self._lock:
+            # Another caller may have refreshed it while we waited
+            if time.monotonic() < self._expires_at:
+                self.hits += 1
+                return self._payload
+            
+            self.publish(await compute())
+            return self._payload
+    
+    def publish(self, payload: T, ttl_seconds: Optional[float] = None) -> None:
+        """Store a freshly computed payload"""
+        self._payload = payload
+        self._updated_at = time.monotonic()
+        self._expires_at = self._updated_at + (ttl_seconds if ttl_seconds is not None else self.ttl_seconds)
+    
+    def age_ms(self) -> float:
+        """Milliseconds since the payload was computed"""
+        return round((time.monotonic() - self._updated_at) * 1000, 2)
+
+
+# Scrapers poll this endpoint every few seconds; the background prober keeps
+# it fresh, and callers only compute it themselves if the prober is not running
+_detailed_health_cache: _CachedPayload[Dict[str, Any]] = _CachedPayload(settings.HEALTH_CACHE_TTL_SEC)
+
+# Upper bound for a single dependency probe in /health/detailed
+_HEALTH_CHECK_TIMEOUT_SECONDS = settings.HEALTH_CHECK_TIMEOUT_MS / 1000
+
+_DATABASE_PROBE = text(
+    "SELECT "
+    "(SELECT COALESCE(array_agg(extname), ARRAY[]::text[]) FROM pg_extension "
+    "WHERE extname IN ('pgcrypto', 'vector')) AS extensions, "
+    "set_config('app.current_org', 'test', true) AS rls_context"
+)
+
+# Prometheus exposition body; HELP/TYPE lines and application info are fixed,
+# so only the sampled values are filled in per scrape
+_PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+_METRICS_TEMPLATE = "\n".join([
+    "# HELP system_cpu_percent CPU usage percentage",
+    "# TYPE system_cpu_percent gauge",
+    "system_cpu_percent {cpu_percent}",
+    "",
+    "# HELP system_memory_percent Memory usage percentage",
+    "# TYPE system_memory_percent gauge",
+    "system_memory_percent {memory_percent}",
+    "",
+    "# HELP system_memory_bytes Memory usage in bytes",
+    "# TYPE system_memory_bytes gauge",
+    'system_memory_bytes{{type="total"}} {memory_total}',
+    'system_memory_bytes{{type="used"}} {memory_used}',
+    'system_memory_bytes{{type="available"}} {memory_available}',
+    "",
+    "# HELP system_disk_percent Disk usage percentage",
+    "# TYPE system_disk_percent gauge",
+    "system_disk_percent {disk_percent}",
+    "",
+    "# HELP system_disk_bytes Disk usage in bytes",
+    "# TYPE system_disk_bytes gauge",
+    'system_disk_bytes{{type="total"}} {disk_total}',
+    'system_disk_bytes{{type="used"}} {disk_used}',
+    'system_disk_bytes{{type="free"}} {disk_free}',
+    "",
+    "# HELP health_check_cache_hits_total Detailed health checks answered from the cached probe result",
+    "# TYPE health_check_cache_hits_total counter",
+    "health_check_cache_hits_total {health_cache_hits}",
+    "",
+    "# HELP lexiscan_info Application information",
+    "# TYPE lexiscan_info gauge",
+    f'lexiscan_info{{{{version="{settings.VERSION}",environment="{settings.ENVIRONMENT}"}}}} 1',
+    "",
+])
+
+
+def _api_key_status(api_key: str, prefix: str, service_type: str) -> Dict[str, str]:
+    """Describe whether an API key looks well-formed"""
+    if api_key.startswith(prefix):
+        return {"status": "configured", "type": service_type}
+    return {
+        "status": "misconfigured",
+        "type": service_type,
+        "error": "Invalid API key format"
+    }
+
+
+def _compute_dependency_status() -> Dict[str, Dict[str, str]]:
+    """Check the format of configured external service credentials"""
+    dependencies = {}
+    if settings.ANTHROPIC_API_KEY:
+        dependencies["anthropic"] = _api_key_status(settings.ANTHROPIC_API_KEY, "sk-ant-", "ai_service")
+    if settings.OPENAI_API_KEY:
+        dependencies["openai"] = _api_key_status(settings.OPENAI_API_KEY, "sk-", "ai_service")
+    if settings.STRIPE_SECRET_KEY:
+        dependencies["stripe"] = _api_key_status(settings.STRIPE_SECRET_KEY, "sk_", "payment_service")
+    return dependencies
+
+
+# Credentials are read from the environment once, so their status is fixed for
+# the life of the process
+_DEPENDENCY_STATUS = _compute_dependency_status()
+
+
+# Health check counter and duration histogram, created once the meter exists;
+# telemetry is initialized during app startup, after this module is imported
+_health_instruments: Optional[Tuple[Any, Any]] = None
+
+
+def _get_health_instruments() -> Optional[Tuple[Any, Any]]:
+    """Get the health check instruments, creating them on first use"""
+    global _health_instruments
+    if _health_instruments is None:
+        meter = get_meter()
+        if not meter:
+            return None
+        _health_instruments = (
+            meter.create_counter(
+                name="health_checks_total",
+                description="Total health checks performed"
+            ),
+            meter.create_histogram(
+                name="health_check_duration_seconds",
+                description="Health check duration"
+            )
+        )
+    return _health_instruments
+
+
+# Long-lived probe clients, so health checks reuse pooled connections instead of
+# paying connection and client setup on every call
+_redis_client: Optional[redis.Redis] = None
+_s3_client = None
+
+
+def _get_redis_client() -> redis.Redis:
+    """Get the pooled Redis client used by health checks"""
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis(
+            connection_pool=redis.ConnectionPool.from_url(
+                settings.REDIS_URL,
+                max_connections=16,
+                socket_timeout=1.0
+            )
+        )
+    return _redis_client
+
+
+def _get_s3_client():
+    """Get the S3 client used by health checks"""
+    global _s3_client
+    if _s3_client is None:
+        _s3_client = boto3.client('s3', region_name=settings.AWS_REGION)
+    return _s3_client
+
+
+# Latest system resource sample, refreshed by a background task so handlers
+# never block on psutil.cpu_percent's sampling interval
+_system_stats: Optional[Dict[str, float]] = None
+# /metrics body rendered and encoded from the same sample
+_metrics_body: Optional[bytes] = None
+# UTC ISO-8601 time of the latest sample, reused as the "current" timestamp
+# for responses that only need second-level freshness
+_timestamp_iso: Optional[str] = None
+_background_tasks: List[asyncio.Task] = []
+
+
+def _sample_system_stats() -> Dict[str, float]:
+    """Take a non-blocking sample of CPU, memory and disk usage"""
+    memory = psutil.virtual_memory()
+    disk = psutil.disk_usage('/')
     return {
+        # interval=None reports usage since the previous call instead of sleeping
+        "cpu_percent": psutil.cpu_percent(interval=None),
+        "memory_percent": memory.percent,
+        "memory_total": memory.total,
+        "memory_used": memory.used,
+        "memory_available": memory.available,
+        "disk_percent": disk.percent,
+        "disk_total": disk.total,
+        "disk_used": disk.used,
+        "disk_free": disk.free,
+        "boot_time": psutil.boot_time(),
+        "updated_at": time.monotonic()
+    }
+
+
+def _refresh_system_stats() -> None:
+    """Take a new system sample and re-render the /metrics body from it"""
+    global _system_stats, _metrics_body, _timestamp_iso
+    stats = _sample_system_stats()
+    _metrics_body = _METRICS_TEMPLATE.format(
+        health_cache_hits=_detailed_health_cache.hits,
+        **stats
+    ).encode("utf-8")
+    _timestamp_iso = datetime.now(timezone.utc).isoformat()
+    _system_stats = stats
+
+
+def _get_system_stats() -> Dict[str, float]:
+    """Get the latest system sample, taking one if the sampler has not run yet"""
+    if _system_stats is None:
+        _refresh_system_stats()
+    return _system_stats
+
+
+def _get_timestamp_iso() -> str:
+    """Get the timestamp of the latest system sample"""
+    if _timestamp_iso is None:
+        _refresh_system_stats()
+    return _timestamp_iso
+
+
+def _get_metrics_body() -> bytes:
+    """Get the encoded /metrics body for the latest system sample"""
+    if _metrics_body is None:
+        _refresh_system_stats()
+    return _metrics_body
+
+
+async def _run_system_sampler(interval_seconds: float) -> None:
+    """Refresh the system resource sample every interval"""
+    while True:
+        try:
+            _refresh_system_stats()
+        except Exception as e:
+            logger.warning(f"System metrics collection failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+async def _run_health_prober(interval_seconds: float) -> None:
+    """Re-probe every dependency each interval and publish the result for /health/detailed"""
+    while True:
+        try:
+            async with get_health_sessionmaker()() as session:
+                health_status = await _collect_detailed_health(session)
+            # Keep the result valid until well after the next probe is due
+            _detailed_health_cache.publish(health_status, ttl_seconds=interval_seconds * 2)
+        except Exception as e:
+            logger.error(f"Background health probe failed: {e}")
+        await asyncio.sleep(interval_seconds)
+
+
+def start_background_tasks() -> None:
+    """Start the system resource sampler and the dependency prober"""
+    if not _background_tasks:
+        _background_tasks.append(asyncio.create_task(_run_system_sampler(settings.SYSTEM_SAMPLE_SEC)))
+        _background_tasks.append(asyncio.create_task(_run_health_prober(settings.HEALTH_PROBE_INTERVAL_SEC)))
+
+
+async def stop_background_tasks() -> None:
+    """Stop the health router's background tasks"""
+    for task in _background_tasks:
+        task.cancel()
+    await asyncio.gather(*_background_tasks, return_exceptions=True)
+    _background_tasks.clear()
+
+
+async def close_health_clients() -> None:
+    """Release the health check clients' connections on shutdown"""
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.connection_pool.disconnect()
+        _redis_client = None
+
+
+async def _check_database(db: AsyncSession) -> Tuple[Dict[str, Any], bool]:
+    """Check database connectivity, extensions and RLS configuration"""
+    db_start = time.time()
+    try:
+        # Connectivity, installed extensions and the RLS setting in one round trip
+        result = await db.execute(_DATABASE_PROBE)
+        row = result.one()
+        
+        return {
+            "status": "healthy",
+            "extensions": sorted(row.extensions),
+            "rls_enabled": row.rls_context == "test",
+            "response_time_ms": round((time.time() - db_start) * 1000, 2)
+        }, True
+    except Exception as e:
+        logger.error(f"Database health check failed: {e}")
+        return {
+            "status": "unhealthy",
+            "error": str(e),
+            "response_time_ms": round((time.time() - db_start) * 1000, 2)
+        }, False
+
+
+async def _check_redis() -> Tuple[Dict[str, Any], bool]:
+    """Check Redis connectivity and basic operations"""
+    redis_start = time.time()
+    try:
+        # Ping and test basic operations in a single pipelined round trip
+        async with _get_redis_client().pipeline(transaction=False) as pipe:
+            pipe.ping()
+            pipe.set("health_check", "ok", ex=10)
+            pipe.get("health_check")
+            pipe.delete("health_check")
+            await pipe.execute()
+        
+        return {
+            "status": "healthy",
+            "operations": ["ping", "set", "get", "delete"],
+            "response_time_ms": round((time.time() - redis_start) * 1000, 2)
+        }, True
+    except Exception as e:
+        logger.error(f"Redis health check failed: {e}")
+        return {
+            "status": "unhealthy",
+            "error": str(e),
+            "response_time_ms": round((time.time() - redis_start) * 1000, 2)
+        }, False
+
+
+async def _check_s3(deep: bool = False) -> Tuple[Dict[str, Any], bool]:
+    """Check S3 bucket access; HeadBucket alone proves connectivity, credentials and the bucket"""
+    s3_start = time.time()
+    try:
+        s3_client = _get_s3_client()
+        
+        # boto3 is blocking; keep it off the event loop
+        await asyncio.to_thread(s3_client.head_bucket, Bucket=settings.S3_BUCKET_NAME)
+        
+        if deep:
+            # Test list operation
+            await asyncio.to_thread(
+                s3_client.list_objects_v2,
+                Bucket=settings.S3_BUCKET_NAME,
+                MaxKeys=1
+            )
+        
+        return {
+            "status": "healthy",
+            "bucket": settings.S3_BUCKET_NAME,
+            "region": settings.AWS_REGION,
+            "response_time_ms": round((time.time() - s3_start) * 1000, 2)
+        }, True
+    except Exception as e:
+        logger.error(f"S3 health check failed: {e}")
+        return {
+            "status": "unhealthy",
+            "error": str(e),
+            "response_time_ms": round((time.time() - s3_start) * 1000, 2)
+        }, False
+
+
+async def _check_ai_services() -> Tuple[Dict[str, Any], bool]:
+    """Check that AI service credentials are configured"""
+    ai_start = time.time()
+    try:
+        ai_status = {"status": "configured"}
+        
+        if settings.ANTHROPIC_API_KEY:
+            ai_status["anthropic"] = "configured"
+        if settings.OPENAI_API_KEY:
+            ai_status["openai"] = "configured"
+        if settings.USE_BEDROCK:
+            ai_status["bedrock"] = "configured"
+        
+        ai_status["response_time_ms"] = round((time.time() - ai_start) * 1000, 2)
+        return ai_status, True
+    except Exception as e:
+        logger.error(f"AI services check failed: {e}")
+        # A configuration problem here does not make the service unhealthy
+        return {
+            "status": "unhealthy",
+            "error": str(e)
+        }, True
+
+
+async def _run_check(name: str, check: Awaitable[Tuple[Dict[str, Any], bool]]) -> HealthCheckResult:
+    """Run one dependency check, bounding it so a stuck dependency cannot stall the endpoint"""
+    try:
+        result, healthy = await asyncio.wait_for(check, timeout=_HEALTH_CHECK_TIMEOUT_SECONDS)
+        return name, result, healthy
+    except asyncio.TimeoutError:
+        logger.error(f"{name} health check timed out")
+        return name, {
+            "status": "unhealthy",
+            "error": "timeout",
+            "response_time_ms": float(settings.HEALTH_CHECK_TIMEOUT_MS)
+        }, False
+
+
+def _static_health_bodies() -> Tuple[bytes, bytes]:
+    """Encode the basic health and version responses, which are fixed for the process"""
+    version_info = get_version_info()
+    health_body = orjson.dumps({
         "status": "healthy",
         "service": "lexiscan-api",
         "version": version_info["version"],
         "build": version_info["build"],
         "commit": version_info["commit"]
-    }
+    })
+    return health_body, orjson.dumps(version_info)
+
+
+_HEALTH_JSON, _VERSION_JSON = _static_health_bodies()
+_LIVE_JSON = orjson.dumps({"status": "alive"})
+
+
+@router.get("/health")
+async def health_check():
+    """Basic health check endpoint"""
+    return Response(content=_HEALTH_JSON, media_type="application/json")
 
 
 @router.get("/version")
 async def version_info():
     """Get detailed version information"""
-    return get_version_info()
+    return Response(content=_VERSION_JSON, media_type="application/json")
 
 
 @router.get("/health/detailed")
-async def detailed_health_check(db: AsyncSession = Depends(get_db)):
+async def detailed_health_check(
+    deep: bool = Query(False, description="Also list the S3 bucket"),
+    db: AsyncSession = Depends(get_health_db)
+):
     """Detailed health check with dependency status and system metrics"""
+    if deep:
+        # Deep checks are rare and explicit; always probe fresh
+        health_status = await _collect_detailed_health(db, deep=True)
+    else:
+        health_status = await _detailed_health_cache.get(lambda: _collect_detailed_health(db))
+        health_status = {**health_status, "age_ms": _detailed_health_cache.age_ms()}
+    
+    if health_status["status"] == "unhealthy":
+        raise HTTPException(status_code=503, detail=health_status)
+    
+    return health_status
+
+
+async def _collect_detailed_health(db: AsyncSession, deep: bool = False) -> Dict[str, Any]:
+    """Probe every dependency and collect system metrics for the detailed health check"""
     start_time = time.time()
     
     with tracer.start_as_current_span("health_check_detailed") if tracer else None:
@@ -56,176 +490,70 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db)):
             "status": "healthy",
             "service": "lexiscan-api",
             "version": settings.VERSION,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
             "checks": {},
             "system": {}
         }
         
         # System metrics
         try:
+            system_stats = _get_system_stats()
             health_status["system"] = {
-                "cpu_percent": psutil.cpu_percent(interval=1),
-                "memory_percent": psutil.virtual_memory().percent,
-                "disk_percent": psutil.disk_usage('/').percent,
-                "uptime": time.time() - psutil.boot_time()
+                "cpu_percent": system_stats["cpu_percent"],
+                "memory_percent": system_stats["memory_percent"],
+                "disk_percent": system_stats["disk_percent"],
+                "uptime": time.time() - system_stats["boot_time"]
             }
         except Exception as e:
             logger.warning(f"System metrics collection failed: {e}")
         
-        # Database check
-        db_start = time.time()
-        try:
-            # Basic connectivity
-            await db.execute(text("SELECT 1"))
-            
-            # Check extensions
-            await db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pgcrypto'"))
-            await db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'vector'"))
-            
-            # Check RLS is working
-            await db.execute(text("SELECT set_config('app.current_org', 'test', true)"))
-            
-            # Performance check
-            db_duration = time.time() - db_start
-            
-            health_status["checks"]["database"] = {
-                "status": "healthy",
-                "extensions": ["pgcrypto", "vector"],
-                "rls_enabled": True,
-                "response_time_ms": round(db_duration * 1000, 2)
-            }
-        except Exception as e:
-            logger.error(f"Database health check failed: {e}")
-            health_status["checks"]["database"] = {
-                "status": "unhealthy", 
-                "error": str(e),
-                "response_time_ms": round((time.time() - db_start) * 1000, 2)
-            }
-            health_status["status"] = "unhealthy"
-        
-        # Redis check
-        redis_start = time.time()
-        try:
-            redis_client = redis.from_url(settings.REDIS_URL)
-            await redis_client.ping()
-            
-            # Test basic operations
-            await redis_client.set("health_check", "ok", ex=10)
-            result = await redis_client.get("health_check")
-            await redis_client.delete("health_check")
-            await redis_client.close()
-            
-            redis_duration = time.time() - redis_start
-            
-            health_status["checks"]["redis"] = {
-                "status": "healthy",
-                "operations": ["ping", "set", "get", "delete"],
-                "response_time_ms": round(redis_duration * 1000, 2)
-            }
-        except Exception as e:
-            logger.error(f"Redis health check failed: {e}")
-            health_status["checks"]["redis"] = {
-                "status": "unhealthy", 
-                "error": str(e),
-                "response_time_ms": round((time.time() - redis_start) * 1000, 2)
-            }
-            health_status["status"] = "unhealthy"
-        
-        # AWS S3 check
-        s3_start = time.time()
-        try:
-            s3_client = boto3.client('s3', region_name=settings.AWS_REGION)
-            s3_client.head_bucket(Bucket=settings.S3_BUCKET_NAME)
-            
-            # Test list operation
-            response = s3_client.list_objects_v2(
-                Bucket=settings.S3_BUCKET_NAME,
-                MaxKeys=1
-            )
-            
-            s3_duration = time.time() - s3_start
-            
-            health_status["checks"]["s3"] = {
-                "status": "healthy",
-                "bucket": settings.S3_BUCKET_NAME,
-                "region": settings.AWS_REGION,
-                "response_time_ms": round(s3_duration * 1000, 2)
-            }
-        except ClientError as e:
-            logger.error(f"S3 health check failed: {e}")
-            health_status["checks"]["s3"] = {
-                "status": "unhealthy", 
-                "error": str(e),
-                "response_time_ms": round((time.time() - s3_start) * 1000, 2)
-            }
-            health_status["status"] = "unhealthy"
-        except Exception as e:
-            logger.error(f"S3 health check failed: {e}")
-            health_status["checks"]["s3"] = {
-                "status": "unhealthy", 
-                "error": str(e),
-                "response_time_ms": round((time.time() - s3_start) * 1000, 2)
-            }
-            health_status["status"] = "unhealthy"
-        
-        # AI Services check
-        ai_start = time.time()
-        try:
-            # Check if AI service credentials are configured
-            ai_status = {"status": "configured"}
-            
-            if settings.ANTHROPIC_API_KEY:
-                ai_status["anthropic"] = "configured"
-            if settings.OPENAI_API_KEY:
-                ai_status["openai"] = "configured"
-            if settings.USE_BEDROCK:
-                ai_status["bedrock"] = "configured"
-            
-            ai_duration = time.time() - ai_start
-            ai_status["response_time_ms"] = round(ai_duration * 1000, 2)
-            
-            health_status["checks"]["ai_services"] = ai_status
-            
-        except Exception as e:
-            logger.error(f"AI services check failed: {e}")
-            health_status["checks"]["ai_services"] = {
-                "status": "unhealthy", 
-                "error": str(e)
-            }
+        # Dependency checks run concurrently, so latency is the slowest probe
+        # rather than the sum of all of them
+        results = await asyncio.gather(
+            _run_check("database", _check_database(db)),
+            _run_check("redis", _check_redis()),
+            _run_check("s3", _check_s3(deep)),
+            _run_check("ai_services", _check_ai_services())
+        )
+        for name, check, healthy in results:
+            health_status["checks"][name] = check
+            if not healthy:
+                health_status["status"] = "unhealthy"
         
         # Overall response time
         total_duration = time.time() - start_time
         health_status["response_time_ms"] = round(total_duration * 1000, 2)
         
         # Record metrics
-        if meter:
-            try:
-                health_check_counter = meter.create_counter(
-                    name="health_checks_total",
-                    description="Total health checks performed"
-                )
+        try:
+            instruments = _get_health_instruments()
+            if instruments:
+                health_check_counter, health_check_duration = instruments
                 health_check_counter.add(1, {"status": health_status["status"]})
-                
-                health_check_duration = meter.create_histogram(
-                    name="health_check_duration_seconds",
-                    description="Health check duration"
-                )
                 health_check_duration.record(total_duration)
-            except Exception:
-                pass  # Don't fail health check if metrics fail
-        
-        if health_status["status"] == "unhealthy":
-            raise HTTPException(status_code=503, detail=health_status)
+        except Exception:
+            pass  # Don't fail health check if metrics fail
         
         return health_status
 
 
+_READY_TIMEOUT_SECONDS = 0.5
+_READY_JSON = orjson.dumps({"status": "ready"})
+
+
+async def _ping_database() -> None:
+    """Run SELECT 1 on a health pool connection through the driver, skipping statement compilation"""
+    async with get_health_engine().connect() as conn:
+        raw_connection = await conn.get_raw_connection()
+        await raw_connection.driver_connection.fetchval("SELECT 1")
+
+
 @router.get("/ready")
-async def readiness_check(db: AsyncSession = Depends(get_db)):
+async def readiness_check():
     """Kubernetes readiness probe endpoint"""
     try:
-        await db.execute(text("SELECT 1"))
-        return {"status": "ready"}
+        await asyncio.wait_for(_ping_database(), timeout=_READY_TIMEOUT_SECONDS)
+        return Response(content=_READY_JSON, media_type="application/json")
     except Exception as e:
         logger.error(f"Readiness check failed: {e}")
         raise HTTPException(status_code=503, detail={"status": "not ready", "error": str(e)})
@@ -234,50 +562,14 @@ async def readiness_check(db: AsyncSession = Depends(get_db)):
 @router.get("/live")
 async def liveness_check():
     """Kubernetes liveness probe endpoint"""
-    return {"status": "alive"}
+    return Response(content=_LIVE_JSON, media_type="application/json")
 
-@router.get("/metrics")
+
+@router.get("/metrics", response_class=PlainTextResponse)
 async def metrics_endpoint():
     """Prometheus-style metrics endpoint"""
     try:
-        # System metrics
-        cpu_percent = psutil.cpu_percent(interval=1)
-        memory = psutil.virtual_memory()
-        disk = psutil.disk_usage('/')
-        
-        # Format as Prometheus metrics
-        metrics = [
-            f"# HELP system_cpu_percent CPU usage percentage",
-            f"# TYPE system_cpu_percent gauge",
-            f"system_cpu_percent {cpu_percent}",
-            "",
-            f"# HELP system_memory_percent Memory usage percentage",
-            f"# TYPE system_memory_percent gauge", 
-            f"system_memory_percent {memory.percent}",
-            "",
-            f"# HELP system_memory_bytes Memory usage in bytes",
-            f"# TYPE system_memory_bytes gauge",
-            f"system_memory_bytes{{type=\"total\"}} {memory.total}",
-            f"system_memory_bytes{{type=\"used\"}} {memory.used}",
-            f"system_memory_bytes{{type=\"available\"}} {memory.available}",
-            "",
-            f"# HELP system_disk_percent Disk usage percentage",
-            f"# TYPE system_disk_percent gauge",
-            f"system_disk_percent {disk.percent}",
-            "",
-            f"# HELP system_disk_bytes Disk usage in bytes",
-            f"# TYPE system_disk_bytes gauge",
-            f"system_disk_bytes{{type=\"total\"}} {disk.total}",
-            f"system_disk_bytes{{type=\"used\"}} {disk.used}",
-            f"system_disk_bytes{{type=\"free\"}} {disk.free}",
-            "",
-            f"# HELP lexiscan_info Application information",
-            f"# TYPE lexiscan_info gauge",
-            f"lexiscan_info{{version=\"{settings.VERSION}\",environment=\"{settings.ENVIRONMENT}\"}} 1",
-        ]
-        
-        return "\n".join(metrics)
-        
+        return Response(content=_get_metrics_body(), media_type=_PROMETHEUS_CONTENT_TYPE)
     except Exception as e:
         logger.error(f"Metrics collection failed: {e}")
         raise HTTPException(status_code=500, detail="Metrics collection failed")
@@ -286,73 +578,7 @@ async def metrics_endpoint():
 @router.get("/health/dependencies")
 async def dependencies_health():
     """Check health of external dependencies"""
-    dependencies = {
-        "timestamp": datetime.utcnow().isoformat(),
-        "dependencies": {}
+    return {
+        "timestamp": _get_timestamp_iso(),
+        "dependencies": _DEPENDENCY_STATUS
     }
-    
-    # Check Anthropic API
-    if settings.ANTHROPIC_API_KEY:
-        try:
-            # Simple check - just verify key format
-            if settings.ANTHROPIC_API_KEY.startswith("sk-ant-"):
-                dependencies["dependencies"]["anthropic"] = {
-                    "status": "configured",
-                    "type": "ai_service"
-                }
-            else:
-                dependencies["dependencies"]["anthropic"] = {
-                    "status": "misconfigured",
-                    "type": "ai_service",
-                    "error": "Invalid API key format"
-                }
-        except Exception as e:
-            dependencies["dependencies"]["anthropic"] = {
-                "status": "error",
-                "type": "ai_service",
-                "error": str(e)
-            }
-    
-    # Check OpenAI API
-    if settings.OPENAI_API_KEY:
-        try:
-            if settings.OPENAI_API_KEY.startswith("sk-"):
-                dependencies["dependencies"]["openai"] = {
-                    "status": "configured",
-                    "type": "ai_service"
-                }
-            else:
-                dependencies["dependencies"]["openai"] = {
-                    "status": "misconfigured",
-                    "type": "ai_service",
-                    "error": "Invalid API key format"
-                }
-        except Exception as e:
-            dependencies["dependencies"]["openai"] = {
-                "status": "error",
-                "type": "ai_service",
-                "error": str(e)
-            }
-    
-    # Check Stripe
-    if settings.STRIPE_SECRET_KEY:
-        try:
-            if settings.STRIPE_SECRET_KEY.startswith("sk_"):
-                dependencies["dependencies"]["stripe"] = {
-                    "status": "configured",
-                    "type": "payment_service"
-                }
-            else:
-                dependencies["dependencies"]["stripe"] = {
-                    "status": "misconfigured",
-                    "type": "payment_service",
-                    "error": "Invalid API key format"
-                }
-        except Exception as e:
-            dependencies["dependencies"]["stripe"] = {
-                "status": "error",
-                "type": "payment_service",
-                "error": str(e)
-            }
-    
-    return dependencies
\ No newline at end of file
@@ -2,16 +2,22 @@
 Document ingestion API endpoints.
 """
 
+import asyncio
 import logging
-from typing import Dict, Any, Optional
-from uuid import UUID
+import orjson
+from typing import Awaitable, Callable, Dict, Any, Hashable, Optional, TypeVar
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Header, Request
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
+from cachetools import TTLCache
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.config import settings
+from core.database import get_sessionmaker
 from core.dependencies import get_current_user, get_async_session
 from core.auth_dependencies import require_role
+from core.webhooks import parse_webhook_payload, verify_webhook_signature
 from models.database import User, DocumentStatus
 from repositories.document import DocumentRepository
 from services.job_queue import JobQueueService, JobResult, create_job_queue_service
@@ -19,7 +25,42 @@ from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/ingest", tags=["ingestion"])
+router = APIRouter(prefix="/api/ingest", tags=["ingestion"], default_response_class=ORJSONResponse)
+
+T = TypeVar("T")
+
+# UIs poll job status aggressively; concurrent pollers of one job share a
+# single broker query and briefly reuse its answer
+_job_status_cache: TTLCache = TTLCache(maxsize=10000, ttl=0.5)
+_queue_stats_cache: TTLCache = TTLCache(maxsize=1, ttl=5.0)
+_inflight_fetches: Dict[Hashable, "asyncio.Future[Any]"] = {}
+
+
+async def _fetch_cached(cache: TTLCache, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+    """Return a cached value, or fetch it once for all concurrent callers"""
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+    
+    inflight_key = (id(cache), key)
+    inflight = _inflight_fetches.get(inflight_key)
+    if inflight is not None:
+        return await asyncio.shield(inflight)
+    
+    inflight = asyncio.get_running_loop().create_future()
+    _inflight_fetches[inflight_key] = inflight
+    try:
+        value = await fetch()
+        cache[key] = value
+        inflight.set_result(value)
+        return value
+    except BaseException as e:
+        inflight.set_exception(e)
+        # Waiters re-raise it; don't warn if there were none
+        inflight.exception()
+        raise
+    finally:
+        del _inflight_fetches[inflight_key]
 
 
 class IngestDocumentRequest(BaseModel):
@@ -57,10 +98,34 @@ class QueueStatsResponse(BaseModel):
     timestamp: str
 
 
+async def _submit_processing_job(
+    job_queue: JobQueueService,
+    document_id: UUID,
+    org_id: str,
+    priority: str,
+    job_id: str
+) -> None:
+    """Submit a claimed document to the processing queue, failing the document if the broker rejects it"""
+    try:
+        await job_queue.submit_document_processing(
+            document_id=document_id,
+            org_id=org_id,
+            priority=priority,
+            job_id=job_id
+        )
+    except Exception as e:
+        logger.error(f"Failed to enqueue job {job_id} for document {document_id}: {e}")
+        # Don't leave the document stuck in PROCESSING with no job behind it
+        async with get_sessionmaker()() as session:
+            await DocumentRepository(session).update(document_id, org_id=org_id, status=DocumentStatus.FAILED)
+            await session.commit()
+
+
 @router.post("/{document_id}", response_model=IngestDocumentResponse)
 async def ingest_document(
     document_id: UUID,
     request: IngestDocumentRequest,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user),
     session: AsyncSession = Depends(get_async_session),
     job_queue: JobQueueService = Depends(create_job_queue_service)
@@ -77,44 +142,39 @@ async def ingest_document(
     try:
         logger.info(f"Ingestion request for document {document_id} by user {current_user.id}")
         
+        org_id = str(current_user.org_id)
+        
         # Get document repository
         doc_repo = DocumentRepository(session)
         
-        # Verify document exists and user has access
-        document = await doc_repo.get_by_id(document_id, str(current_user.org_id))
-        if not document:
-            raise HTTPException(
-                status_code=404,
-                detail="Document not found or access denied"
-            )
-        
-        # Check document status
-        if document.status == DocumentStatus.PROCESSING:
+        # Claim the document for processing in a single statement; completed
+        # documents may be reprocessed, ones already processing may not
+        if not await doc_repo.try_mark_processing(document_id, org_id):
+            # Only the failure path pays for telling "missing" from "busy"
+            if not await doc_repo.get_by_id(document_id):
+                raise HTTPException(
+                    status_code=404,
+                    detail="Document not found or access denied"
+                )
             raise HTTPException(
                 status_code=409,
                 detail="Document is already being processed"
             )
-        
-        if document.status == DocumentStatus.COMPLETED:
-            # Allow reprocessing of completed documents
-            logger.info(f"Reprocessing completed document {document_id}")
-        
-        # Update document status to processing
-        await doc_repo.update(
-            document_id,
-            org_id=str(current_user.org_id),
-            status=DocumentStatus.PROCESSING
-        )
         await session.commit()
         
-        # Submit to processing queue
-        job_id = await job_queue.submit_document_processing(
-            document_id=document_id,
-            org_id=str(current_user.org_id),
-            priority=request.priority
+        # Reserve the job ID now and submit to the processing queue after the
+        # response is sent, so the client never waits on the broker
+        job_id = str(uuid4())
+        background_tasks.add_task(
+            _submit_processing_job,
+            job_queue,
+            document_id,
+            org_id,
+            request.priority,
+            job_id
         )
         
-        logger.info(f"Document {document_id} submitted for processing with job ID {job_id}")
+        logger.info(f"Document {document_id} accepted for processing with job ID {job_id}")
         
         return IngestDocumentResponse(
             job_id=job_id,
@@ -148,7 +208,7 @@ async def get_processing_status(
         logger.info(f"Status request for job {job_id} by user {current_user.id}")
         
         # Get job status
-        job_result = await job_queue.get_job_status(job_id)
+        job_result = await _fetch_cached(_job_status_cache, job_id, lambda: job_queue.get_job_status(job_id))
         
         # Verify user has access to this job (basic check by org_id if available)
         if job_result.org_id and job_result.org_id != str(current_user.org_id):
@@ -194,7 +254,7 @@ async def cancel_processing(
         logger.info(f"Cancel request for job {job_id} by user {current_user.id}")
         
         # Get job status first to verify access
-        job_result = await job_queue.get_job_status(job_id)
+        job_result = await _fetch_cached(_job_status_cache, job_id, lambda: job_queue.get_job_status(job_id))
         
         if job_result.org_id and job_result.org_id != str(current_user.org_id):
             raise HTTPException(
@@ -206,6 +266,7 @@ async def cancel_processing(
         success = await job_queue.cancel_job(job_id)
         
         if success:
+            _job_status_cache.pop(job_id, None)
             return {"message": "Job cancellation requested", "job_id": job_id}
         else:
             raise HTTPException(
@@ -236,7 +297,7 @@ async def get_queue_stats(
     try:
         logger.info(f"Queue stats request by admin user {current_user.id}")
         
-        stats = await job_queue.get_queue_stats()
+        stats = await _fetch_cached(_queue_stats_cache, "stats", job_queue.get_queue_stats)
         
         return QueueStatsResponse(
             active_tasks=stats.get("active_tasks", 0),
@@ -256,16 +317,28 @@ async def get_queue_stats(
 
 @router.post("/webhook/processing-complete")
 async def processing_complete_webhook(
-    payload: Dict[str, Any],
+    request: Request,
+    x_webhook_signature: Optional[str] = Header(None),
     session: AsyncSession = Depends(get_async_session)
 ):
     """
     Webhook endpoint for processing completion notifications.
     
     This endpoint can be called by the worker to notify of processing completion.
-    In production, this would be secured with a webhook secret.
+    Requests must carry an X-Webhook-Signature header of the form
+    "sha256=<hex HMAC of the raw body keyed with INGESTION_WEBHOOK_SECRET>".
     """
     try:
+        # Authenticate before parsing the body or touching the database
+        body = await request.body()
+        if not verify_webhook_signature(body, x_webhook_signature, settings.INGESTION_WEBHOOK_SECRET):
+            raise HTTPException(
+                status_code=401,
+                detail="Invalid webhook signature"
+            )
+        
+        payload = parse_webhook_payload(body)
+        
         logger.info(f"Processing complete webhook received: {payload}")
         
         # Extract required fields
@@ -279,13 +352,21 @@ async def processing_complete_webhook(
                 detail="Missing required fields: document_id, org_id, status"
             )
         
+        try:
+            document_uuid = UUID(document_id)
+        except (TypeError, ValueError):
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid document_id format"
+            )
+        
         # Update document status
         doc_repo = DocumentRepository(session)
         
         document_status = DocumentStatus.COMPLETED if status == "completed" else DocumentStatus.FAILED
         
         await doc_repo.update(
-            UUID(document_id),
+            document_uuid,
             org_id=org_id,
             status=document_status
         )
@@ -305,11 +386,14 @@ async def processing_complete_webhook(
         )
 
 
+_HEALTH_JSON = orjson.dumps({
+    "status": "healthy",
+    "service": "document-ingestion",
+    "timestamp": "2024-01-01T00:00:00Z"  # Would use actual timestamp
+})
+
+
 @router.get("/health")
 async def ingestion_health_check():
     """Health check endpoint for the ingestion service."""
-    return {
-        "status": "healthy",
-        "service": "document-ingestion",
-        "timestamp": "2024-01-01T00:00:00Z"  # Would use actual timestamp
-    }
\ No newline at end of file
+    return Response(content=_HEALTH_JSON, media_type="application/json")
\ No newline at end of file
@@ -5,7 +5,8 @@ Organization management router for team workspace features
 from typing import Dict, Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel, Field, EmailStr
+from pydantic import BaseModel, Field, field_validator
+import re
 import uuid
 
 from core.dependencies import get_db
@@ -16,6 +17,11 @@ from models.database import User
 
 router = APIRouter(prefix="/organization", tags=["organization"])
 
+# Canonical UUID form, used to validate ID lists without raising per item
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+# Shape check for invite addresses; deliverability is settled by the invitation itself
+_EMAIL_RE = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+")
+
 
 class OrganizationUpdateRequest(BaseModel):
     """Organization update request model"""
@@ -24,8 +30,17 @@ class OrganizationUpdateRequest(BaseModel):
 
 class TeamMemberInviteRequest(BaseModel):
     """Team member invitation request model"""
-    email: EmailStr = Field(..., description="Email address of the user to invite")
+    email: str = Field(..., description="Email address of the user to invite")
     role: str = Field(..., description="Role to assign (viewer, reviewer, admin)")
+    
+    @field_validator("email")
+    @classmethod
+    def validate_email(cls, value: str) -> str:
+        """Check the address shape and normalize the domain to lowercase"""
+        if not _EMAIL_RE.fullmatch(value):
+            raise ValueError("value is not a valid email address")
+        local_part, _, domain = value.rpartition("@")
+        return f"{local_part}@{domain.lower()}"
 
 
 class TeamMemberRoleUpdateRequest(BaseModel):
@@ -229,14 +244,15 @@ async def share_document(
         )
     
     # Validate user_ids format
-    for user_id in share_request.user_ids:
-        try:
-            uuid.UUID(user_id)
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Invalid user ID format: {user_id}"
-            )
+    invalid_user_id = next(
+        (user_id for user_id in share_request.user_ids if not _UUID_RE.fullmatch(user_id)),
+        None
+    )
+    if invalid_user_id is not None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid user ID format: {invalid_user_id}"
+        )
     
     return await organization_service.share_document(
         current_org, document_id, share_request.user_ids, current_user, db
@@ -266,13 +282,13 @@ async def get_team_members(
 ):
     """Get list of team members"""
     
-    org_details = await organization_service.get_organization_details(
+    team_members = await organization_service.get_team_members_only(
         current_org, current_user, db
     )
     
     return {
-        "team_members": org_details["team_members"],
-        "total_count": len(org_details["team_members"])
+        "team_members": team_members,
+        "total_count": len(team_members)
     }
 
 
@@ -284,13 +300,6 @@ async def get_organization_stats(
 ):
     """Get organization statistics"""
     
-    org_details = await organization_service.get_organization_details(
+    return await organization_service.get_org_stats_only(
         current_org, current_user, db
-    )
-    
-    return {
-        "team_size": len(org_details["team_members"]),
-        "document_stats": org_details["document_stats"],
-        "subscription": org_details["subscription"],
-        "sso_configured": org_details["sso_configured"]
-    }
\ No newline at end of file
+    )
\ No newline at end of file
@@ -3,18 +3,18 @@ RAG (Retrieval-Augmented Generation) query endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import StreamingResponse
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel, Field
-from typing import List, Optional, AsyncGenerator
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Optional, AsyncGenerator, Tuple
 from uuid import UUID
 from datetime import datetime
 import logging
 import json
-import asyncio
+import re
 import time
 
-from core.database import get_db
+from core.database import get_db, get_sessionmaker
 from core.rbac import (
     require_document_read,
     require_org_access,
@@ -24,18 +24,23 @@ from core.rbac import (
 from models.database import User
 from repositories.document_chunk import DocumentChunkRepository
 from repositories.document import DocumentRepository
-from services.embedding import create_embedding_service
+from services.embedding import create_embedding_service, EmbeddingService
 from services.rag import (
     create_semantic_search_service,
     create_claude_service,
     create_rag_service,
+    ClaudeAPIService,
+    RAGService,
     RAGResponse,
     Citation
 )
-from services.cache import get_cache_service
+from services.cache import get_cache_service, CacheService
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=ORJSONResponse)
+
+# Canonical UUID form, used to validate document ID lists without raising per item
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
 
 
 class RAGQueryRequest(BaseModel):
@@ -72,7 +77,78 @@ class RAGStreamChunk(BaseModel):
     metadata: Optional[dict] = None
 
 
-# Rate limiting is now handled by Redis cache service
+# Stream chunks are encoded straight to bytes with a shared serializer and
+# framed with constant prefix/suffix bytes
+_STREAM_CHUNK_ADAPTER = TypeAdapter(RAGStreamChunk)
+_SSE_PREFIX = b"data: "
+_SSE_SUFFIX = b"\n\n"
+
+
+def _sse_frame(chunk: RAGStreamChunk) -> bytes:
+    """Encode a stream chunk as a server-sent event frame"""
+    return _SSE_PREFIX + _STREAM_CHUNK_ADAPTER.dump_json(chunk) + _SSE_SUFFIX
+
+
+# Formatted ISO prefix for the most recent whole second, shared by a burst of requests
+_iso_second: Tuple[int, str] = (-1, "")
+
+
+def _iso_from_ns(epoch_ns: int) -> str:
+    """Format a UTC epoch timestamp in nanoseconds as a naive ISO 8601 string"""
+    global _iso_second
+    seconds, remainder_ns = divmod(epoch_ns, 1_000_000_000)
+    if _iso_second[0] != seconds:
+        _iso_second = (seconds, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)))
+    return f"{_iso_second[1]}.{remainder_ns // 1000:06d}"
+
+
+def rate_limiter(action: str, limit: int, window_seconds: int, detail: str):
+    """
+    Build a dependency that enforces a per-user rate limit for an action.
+    
+    The dependency resolves to the cache service so handlers reuse the same
+    handle for their own cache lookups.
+    """
+    async def dependency(current_user: User = Depends(require_document_read)) -> CacheService:
+        cache_service = await get_cache_service()
+        is_allowed, remaining = await cache_service.check_rate_limit(
+            str(current_user.id), limit=limit, window_seconds=window_seconds, action=action
+        )
+        
+        if not is_allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=f"{detail} Remaining: {remaining}"
+            )
+        
+        return cache_service
+    
+    return dependency
+
+
+_rag_stream_rate_limit = rate_limiter(
+    "rag_stream", 5, 60, "Rate limit exceeded for streaming queries."
+)
+
+
+# The embedding and Claude clients hold no per-request state, so build them once
+# per process; only the repositories are bound to the request's session
+_embedding_service: Optional[EmbeddingService] = None
+_claude_service: Optional[ClaudeAPIService] = None
+
+
+def _get_rag_service(db: AsyncSession) -> RAGService:
+    """Build a RAG service for this request around the shared API clients"""
+    global _embedding_service, _claude_service
+    if _embedding_service is None:
+        _embedding_service = create_embedding_service()
+    if _claude_service is None:
+        _claude_service = create_claude_service()
+    
+    search_service = create_semantic_search_service(
+        DocumentChunkRepository(db), DocumentRepository(db), _embedding_service
+    )
+    return create_rag_service(search_service, _claude_service)
 
 
 @router.post("/query", response_model=RAGQueryResponse)
@@ -81,7 +157,8 @@ async def rag_query(
     request: RAGQueryRequest,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
-    _: User = Depends(require_org_access)
+    _: User = Depends(require_org_access),
+    cache_service: CacheService = Depends(get_cache_service)
 ):
     """
     Perform RAG query on uploaded documents.
@@ -90,10 +167,19 @@ async def rag_query(
     and generates AI-powered responses using Claude.
     """
     try:
-        # Get cache service and check rate limiting
-        cache_service = await get_cache_service()
-        is_allowed, remaining = await cache_service.check_rate_limit(
-            str(current_user.id), limit=10, window_seconds=60, action="rag_query"
+        user_id = str(current_user.id)
+        org_id = str(current_user.org_id)
+        
+        # Rate limiting and the response cache lookup share one Redis round trip
+        is_allowed, remaining, cached_response = await cache_service.check_rate_limit_and_get_rag_response(
+            user_id,
+            limit=10,
+            window_seconds=60,
+            action="rag_query",
+            query=request.query,
+            org_id=org_id,
+            document_ids=request.document_ids,
+            similarity_threshold=request.similarity_threshold
         )
         
         if not is_allowed:
@@ -102,52 +188,39 @@ async def rag_query(
                 detail=f"Rate limit exceeded. Please wait before making another request. Remaining: {remaining}"
             )
         
-        logger.info(f"RAG query from user {current_user.id}: '{request.query[:100]}...'")
+        logger.info(f"RAG query from user {user_id}: '{request.query[:100]}...'")
         
         # Convert document IDs to UUIDs if provided
         document_uuids = None
         if request.document_ids:
-            try:
-                document_uuids = [UUID(doc_id) for doc_id in request.document_ids]
-            except ValueError:
+            if not all(_UUID_RE.fullmatch(doc_id) for doc_id in request.document_ids):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid document ID format"
                 )
-        
-        # Check cache first
-        cached_response = await cache_service.get_rag_response(
-            query=request.query,
-            org_id=str(current_user.org_id),
-            document_ids=request.document_ids,
-            similarity_threshold=request.similarity_threshold
-        )
+            document_uuids = [UUID(doc_id) for doc_id in request.document_ids]
         
         if cached_response:
-            logger.info(f"Returning cached RAG response for user {current_user.id}")
+            logger.info(f"Returning cached RAG response for user {user_id}")
             
-            # Convert cached response to proper format
+            # Cached entries were validated before they were stored and only ever
+            # written by this endpoint, so rebuild them without re-validating
             citation_responses = [
-                CitationResponse(**citation) for citation in cached_response.get("citations", [])
+                CitationResponse.model_construct(**citation) for citation in cached_response.get("citations", [])
             ]
             
-            return RAGQueryResponse(
+            return RAGQueryResponse.model_construct(
                 answer=cached_response["answer"],
                 citations=citation_responses,
                 confidence=cached_response["confidence"],
                 model_used=cached_response["model_used"],
                 processing_time=cached_response["processing_time"],
-                query_id=cached_response.get("query_id", f"cached_{int(time.time())}"),
+                query_id=cached_response.get("query_id", f"cached_{time.monotonic_ns()}"),
                 timestamp=datetime.fromisoformat(cached_response["timestamp"])
             )
         
         # Initialize services
-        chunk_repo = DocumentChunkRepository(db)
-        doc_repo = DocumentRepository(db)
-        embedding_service = create_embedding_service()
-        search_service = create_semantic_search_service(chunk_repo, doc_repo, embedding_service)
-        claude_service = create_claude_service()
-        rag_service = create_rag_service(search_service, claude_service)
+        rag_service = _get_rag_service(db)
         
         # Get user's subscription plan (placeholder - implement actual lookup)
         plan = "pro"  # TODO: Get from subscription service
@@ -155,7 +228,7 @@ async def rag_query(
         # Perform RAG query
         rag_response = await rag_service.query(
             query=request.query,
-            org_id=str(current_user.org_id),
+            org_id=org_id,
             plan=plan,
             document_ids=document_uuids,
             max_results=request.max_results,
@@ -176,7 +249,7 @@ async def rag_query(
         ]
         
         # Generate query ID for tracking
-        query_id = f"q_{int(time.time())}_{current_user.id}"
+        query_id = f"q_{time.monotonic_ns()}_{user_id}"
         
         response = RAGQueryResponse(
             answer=rag_response.answer,
@@ -191,8 +264,8 @@ async def rag_query(
         # Cache the response for future queries
         await cache_service.set_rag_response(
             query=request.query,
-            org_id=str(current_user.org_id),
-            response_data=response.dict(),
+            org_id=org_id,
+            response_data=response.model_dump(),
             document_ids=request.document_ids,
             similarity_threshold=request.similarity_threshold,
             ttl_seconds=3600  # 1 hour cache
@@ -200,7 +273,7 @@ async def rag_query(
         
         # Track usage
         await cache_service.increment_usage(
-            str(current_user.id), "queries", 1, "daily"
+            user_id, "queries", 1, "daily"
         )
         
         logger.info(f"RAG query completed: {query_id} in {rag_response.processing_time:.2f}s")
@@ -220,9 +293,9 @@ async def rag_query(
 @protected_route(permissions=[Permission.DOCUMENT_READ])
 async def rag_query_stream(
     request: RAGQueryRequest,
-    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_document_read),
-    _: User = Depends(require_org_access)
+    _: User = Depends(require_org_access),
+    __: CacheService = Depends(_rag_stream_rate_limit)
 ):
     """
     Perform streaming RAG query on uploaded documents.
@@ -231,76 +304,60 @@ async def rag_query_stream(
     sending chunks as they are generated.
     """
     try:
-        # Get cache service and check rate limiting for streaming
-        cache_service = await get_cache_service()
-        is_allowed, remaining = await cache_service.check_rate_limit(
-            str(current_user.id), limit=5, window_seconds=60, action="rag_stream"
-        )
-        
-        if not is_allowed:
-            raise HTTPException(
-                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                detail=f"Rate limit exceeded for streaming queries. Remaining: {remaining}"
-            )
+        user_id = str(current_user.id)
+        org_id = str(current_user.org_id)
         
-        logger.info(f"Streaming RAG query from user {current_user.id}: '{request.query[:100]}...'")
+        logger.info(f"Streaming RAG query from user {user_id}: '{request.query[:100]}...'")
         
         # Convert document IDs to UUIDs if provided
         document_uuids = None
         if request.document_ids:
-            try:
-                document_uuids = [UUID(doc_id) for doc_id in request.document_ids]
-            except ValueError:
+            if not all(_UUID_RE.fullmatch(doc_id) for doc_id in request.document_ids):
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Invalid document ID format"
                 )
+            document_uuids = [UUID(doc_id) for doc_id in request.document_ids]
         
-        async def generate_stream() -> AsyncGenerator[str, None]:
+        async def generate_stream() -> AsyncGenerator[bytes, None]:
             """Generate streaming response."""
             try:
                 # Send start event
                 start_chunk = RAGStreamChunk(
                     type="start",
-                    metadata={"query": request.query, "timestamp": datetime.utcnow().isoformat()}
+                    metadata={"query": request.query, "timestamp": _iso_from_ns(time.time_ns())}
                 )
-                yield f"data: {start_chunk.json()}\n\n"
-                
-                # Initialize services
-                chunk_repo = DocumentChunkRepository(db)
-                doc_repo = DocumentRepository(db)
-                embedding_service = create_embedding_service()
-                search_service = create_semantic_search_service(chunk_repo, doc_repo, embedding_service)
-                claude_service = create_claude_service()
-                rag_service = create_rag_service(search_service, claude_service)
+                yield _sse_frame(start_chunk)
                 
                 # Get user's subscription plan
                 plan = "pro"  # TODO: Get from subscription service
                 
-                # Perform RAG query
-                rag_response = await rag_service.query(
-                    query=request.query,
-                    org_id=str(current_user.org_id),
-                    plan=plan,
-                    document_ids=document_uuids,
-                    max_results=request.max_results,
-                    similarity_threshold=request.similarity_threshold
-                )
-                
-                # Stream the answer in chunks
-                answer_words = rag_response.answer.split()
-                chunk_size = 5  # Words per chunk
-                
-                for i in range(0, len(answer_words), chunk_size):
-                    chunk_words = answer_words[i:i + chunk_size]
-                    content_chunk = RAGStreamChunk(
-                        type="content",
-                        content=" ".join(chunk_words) + " "
+                # The stream outlives the request's dependencies, so it owns a session,
+                # held only for retrieval and not while Claude generates
+                started_at = time.time()
+                async with get_sessionmaker()() as db:
+                    rag_service = _get_rag_service(db)
+                    search_results, context = await rag_service.retrieve_context(
+                        query=request.query,
+                        org_id=org_id,
+                        document_ids=document_uuids,
+                        max_results=request.max_results,
+                        similarity_threshold=request.similarity_threshold
                     )
-                    yield f"data: {content_chunk.json()}\n\n"
-                    
-                    # Small delay to simulate streaming
-                    await asyncio.sleep(0.1)
+                
+                # Forward the answer as Claude generates it
+                rag_response = None
+                async for kind, payload in rag_service.stream_answer(
+                    query=request.query,
+                    search_results=search_results,
+                    context=context,
+                    start_time=started_at,
+                    plan=plan
+                ):
+                    if kind == "delta":
+                        yield _sse_frame(RAGStreamChunk(type="content", content=payload))
+                    else:
+                        rag_response = payload
                 
                 # Send citations
                 for citation in rag_response.citations:
@@ -317,7 +374,7 @@ async def rag_query_stream(
                         type="citation",
                         citation=citation_response
                     )
-                    yield f"data: {citation_chunk.json()}\n\n"
+                    yield _sse_frame(citation_chunk)
                 
                 # Send end event
                 end_chunk = RAGStreamChunk(
@@ -329,7 +386,7 @@ async def rag_query_stream(
                         "citations_count": len(rag_response.citations)
                     }
                 )
-                yield f"data: {end_chunk.json()}\n\n"
+                yield _sse_frame(end_chunk)
                 
             except Exception as e:
                 logger.error(f"Error in streaming RAG query: {str(e)}")
@@ -337,7 +394,7 @@ async def rag_query_stream(
                     type="error",
                     content=f"Error processing query: {str(e)}"
                 )
-                yield f"data: {error_chunk.json()}\n\n"
+                yield _sse_frame(error_chunk)
         
         return StreamingResponse(
             generate_stream(),
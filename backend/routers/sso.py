@@ -2,46 +2,131 @@
 SSO (SAML/OIDC) authentication router
 """
 
-from typing import Dict, Any, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Form
-from fastapi.responses import RedirectResponse, HTMLResponse
+from typing import Annotated, Dict, Any, Literal, Optional, Union
+from fastapi import APIRouter, Body, Depends, HTTPException, status, Request, Response, Form
+from fastapi.responses import RedirectResponse, HTMLResponse, ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel, Field
-import uuid
+from pydantic import BaseModel, Field, model_validator
+from string import Template
+from urllib.parse import unquote_plus, urlencode
+import hashlib
+import json
+import re
 
 from core.dependencies import get_db
 from core.auth_dependencies import get_current_user, get_current_org
+from core.etags import etag_matches
 from services.sso import sso_service
 from services.auth import auth_service
 from models.database import User
 
 
-router = APIRouter(prefix="/sso", tags=["sso"])
+router = APIRouter(prefix="/sso", tags=["sso"], default_response_class=ORJSONResponse)
 
 
-class SSOConfigRequest(BaseModel):
-    """SSO configuration request model"""
-    type: str = Field(..., description="SSO provider type (oidc or saml)")
+# Page returned by the SAML ACS endpoint; it hands the tokens to the opener window
+_SAML_ACS_TEMPLATE = Template("""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>SSO Success</title>
+    </head>
+    <body>
+        <script>
+            // Post tokens to parent window
+            if (window.opener) {
+                window.opener.postMessage({
+                    type: 'SSO_SUCCESS',
+                    access_token: $access_token,
+                    refresh_token: $refresh_token
+                }, '*');
+                window.close();
+            } else {
+                // Fallback: redirect to frontend
+                window.location.href = $fallback_url;
+            }
+        </script>
+        <p>Authentication successful. This window should close automatically.</p>
+    </body>
+    </html>
+    """)
+
+
+def _js_string(value: str) -> str:
+    """Encode a value as a JavaScript string literal safe to place inside a script tag"""
+    return json.dumps(value).replace("</", "<\\/")
+
+
+# Config values masked before an SSO configuration is returned to clients
+_SECRET_KEYS = frozenset({"client_secret", "private_key"})
+
+# IdPs poll metadata; it only changes when SSO is reconfigured, which changes the ETag
+_METADATA_MAX_AGE_SECONDS = 3600
+
+
+def _metadata_etag(body: str) -> str:
+    """Strong ETag for a metadata response body"""
+    return f'"{hashlib.blake2b(body.encode(), digest_size=16).hexdigest()}"'
+
+
+_UUID_RE = re.compile(r"[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}")
+
+# state (OIDC) or RelayState (SAML) query parameter of an authorization URL
+_STATE_RE = re.compile(r"[?&](?:state|RelayState)=([^&#]+)")
+
+
+async def validate_org_id(org_id: str) -> str:
+    """Validate the org_id path parameter format"""
+    if not _UUID_RE.fullmatch(org_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid organization ID"
+        )
+    return org_id
+
+
+class _SSOConfigBase(BaseModel):
+    """Fields shared by every SSO provider configuration"""
     name: str = Field(..., description="Provider name")
     
-    # OIDC fields
-    client_id: Optional[str] = Field(None, description="OIDC client ID")
-    client_secret: Optional[str] = Field(None, description="OIDC client secret")
+    # Role mapping
+    role_mapping: Optional[Dict[str, str]] = Field(default_factory=dict, description="Role mapping configuration")
+    default_role: str = Field("viewer", description="Default role for new users")
+    role_claim: str = Field("role", description="Claim name for user role")
+    groups_claim: str = Field("groups", description="Claim name for user groups")
+
+
+class OIDCConfigRequest(_SSOConfigBase):
+    """OIDC SSO configuration request model"""
+    type: Literal["oidc"] = Field(..., description="SSO provider type")
+    client_id: str = Field(..., min_length=1, description="OIDC client ID")
+    client_secret: str = Field(..., min_length=1, description="OIDC client secret")
     discovery_url: Optional[str] = Field(None, description="OIDC discovery URL")
     issuer: Optional[str] = Field(None, description="OIDC issuer")
     
-    # SAML fields
-    entity_id: Optional[str] = Field(None, description="SAML entity ID")
-    sso_url: Optional[str] = Field(None, description="SAML SSO URL")
+    @model_validator(mode="after")
+    def check_discovery(self) -> "OIDCConfigRequest":
+        """Require a discovery URL or an issuer to discover endpoints from"""
+        if not self.discovery_url and not self.issuer:
+            raise ValueError("OIDC configuration requires discovery_url or issuer")
+        return self
+
+
+class SAMLConfigRequest(_SSOConfigBase):
+    """SAML SSO configuration request model"""
+    type: Literal["saml"] = Field(..., description="SSO provider type")
+    entity_id: str = Field(..., min_length=1, description="SAML entity ID")
+    sso_url: str = Field(..., min_length=1, description="SAML SSO URL")
     sls_url: Optional[str] = Field(None, description="SAML SLS URL")
     x509_cert: Optional[str] = Field(None, description="SAML X.509 certificate")
     name_id_format: Optional[str] = Field(None, description="SAML NameID format")
-    
-    # Role mapping
-    role_mapping: Optional[Dict[str, str]] = Field(default_factory=dict, description="Role mapping configuration")
-    default_role: str = Field("viewer", description="Default role for new users")
-    role_claim: str = Field("role", description="Claim name for user role")
-    groups_claim: str = Field("groups", description="Claim name for user groups")
+
+
+# Validated as a tagged union: the "type" field selects the schema to apply
+SSOConfigRequest = Annotated[
+    Union[OIDCConfigRequest, SAMLConfigRequest],
+    Body(discriminator="type")
+]
 
 
 class SSOConfigResponse(BaseModel):
@@ -73,43 +158,18 @@ async def configure_sso(
             detail="Only administrators can configure SSO"
         )
     
-    # Validate configuration based on type
-    if config.type == "oidc":
-        if not config.client_id or not config.client_secret:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="OIDC configuration requires client_id and client_secret"
-            )
-        if not config.discovery_url and not config.issuer:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="OIDC configuration requires discovery_url or issuer"
-            )
-    
-    elif config.type == "saml":
-        if not config.entity_id or not config.sso_url:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="SAML configuration requires entity_id and sso_url"
-            )
-    
-    else:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Unsupported SSO type. Must be 'oidc' or 'saml'"
-        )
-    
     # Configure SSO
+    sso_config = config.model_dump(exclude_none=True)
     success = await sso_service.configure_sso_provider(
         current_org, 
-        config.dict(exclude_none=True), 
+        sso_config, 
         db
     )
     
     if success:
-        # Get metadata for response
+        # Build metadata from the config just saved rather than reading it back
         try:
-            metadata = await sso_service.get_sso_metadata(current_org, db)
+            metadata = sso_service.build_sso_metadata(current_org, sso_config)
         except Exception:
             metadata = None
         
@@ -145,62 +205,55 @@ async def get_sso_config(
     if not sso_config:
         return {"configured": False}
     
-    # Remove sensitive information
-    safe_config = sso_config.copy()
-    if "client_secret" in safe_config:
-        safe_config["client_secret"] = "***"
-    if "private_key" in safe_config:
-        safe_config["private_key"] = "***"
+    # Project the config with sensitive values masked
+    safe_config = {
+        key: "***" if key in _SECRET_KEYS else value
+        for key, value in sso_config.items()
+    }
     
-    return {
+    return ORJSONResponse({
         "configured": True,
         "config": safe_config
-    }
+    })
 
 
 @router.get("/metadata/{org_id}")
 async def get_sso_metadata(
-    org_id: str,
+    request: Request,
+    org_id: str = Depends(validate_org_id),
     db: AsyncSession = Depends(get_db)
 ):
     """Get SSO metadata for organization (public endpoint for IdP configuration)"""
     
-    try:
-        uuid.UUID(org_id)  # Validate org_id format
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid organization ID"
-        )
-    
     metadata = await sso_service.get_sso_metadata(org_id, db)
     
     if metadata.get("type") == "saml":
-        return Response(
-            content=metadata["metadata"],
-            media_type="application/xml",
-            headers={"Content-Disposition": f"attachment; filename=metadata-{org_id}.xml"}
-        )
+        body = metadata["metadata"]
+        media_type = "application/xml"
+        headers = {"Content-Disposition": f"attachment; filename=metadata-{org_id}.xml"}
     else:
-        return metadata
+        body = json.dumps(metadata, sort_keys=True)
+        media_type = "application/json"
+        headers = {}
+    
+    etag = _metadata_etag(body)
+    headers["ETag"] = etag
+    headers["Cache-Control"] = f"public, max-age={_METADATA_MAX_AGE_SECONDS}"
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(content=body, media_type=media_type, headers=headers)
 
 
 @router.get("/login/{org_id}", response_model=SSOLoginResponse)
 async def initiate_sso_login(
-    org_id: str,
+    org_id: str = Depends(validate_org_id),
     redirect_uri: Optional[str] = None,
     db: AsyncSession = Depends(get_db)
 ):
     """Initiate SSO login for organization"""
     
-    try:
-        uuid.UUID(org_id)  # Validate org_id format
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid organization ID"
-        )
-    
     # Default redirect URI
     if not redirect_uri:
         redirect_uri = f"/sso/{org_id}/callback"
@@ -208,10 +261,8 @@ async def initiate_sso_login(
     authorization_url = await sso_service.initiate_sso_login(org_id, redirect_uri, db)
     
     # Extract state from URL for response
-    from urllib.parse import urlparse, parse_qs
-    parsed_url = urlparse(authorization_url)
-    query_params = parse_qs(parsed_url.query)
-    state = query_params.get("state", [""])[0] or query_params.get("RelayState", [""])[0]
+    match = _STATE_RE.search(authorization_url)
+    state = unquote_plus(match.group(1)) if match else ""
     
     return SSOLoginResponse(
         authorization_url=authorization_url,
@@ -221,8 +272,8 @@ async def initiate_sso_login(
 
 @router.get("/callback/{org_id}")
 async def handle_sso_callback(
-    org_id: str,
     request: Request,
+    org_id: str = Depends(validate_org_id),
     code: Optional[str] = None,
     state: Optional[str] = None,
     error: Optional[str] = None,
@@ -231,14 +282,6 @@ async def handle_sso_callback(
 ):
     """Handle SSO callback (OIDC)"""
     
-    try:
-        uuid.UUID(org_id)  # Validate org_id format
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid organization ID"
-        )
-    
     # Check for errors
     if error:
         raise HTTPException(
@@ -253,7 +296,7 @@ async def handle_sso_callback(
         )
     
     # Handle callback
-    redirect_uri = str(request.url).split("?")[0]  # Remove query parameters
+    redirect_uri = str(request.url.replace(query=""))
     
     result = await sso_service.handle_sso_callback(
         org_id, code, state, redirect_uri, db
@@ -272,22 +315,14 @@ async def handle_sso_callback(
 
 @router.post("/acs/{org_id}")
 async def handle_saml_acs(
-    org_id: str,
     request: Request,
+    org_id: str = Depends(validate_org_id),
     SAMLResponse: str = Form(...),
     RelayState: Optional[str] = Form(None),
     db: AsyncSession = Depends(get_db)
 ):
     """Handle SAML Assertion Consumer Service (ACS)"""
     
-    try:
-        uuid.UUID(org_id)  # Validate org_id format
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid organization ID"
-        )
-    
     if not SAMLResponse:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -295,7 +330,7 @@ async def handle_saml_acs(
         )
     
     # Handle SAML response
-    redirect_uri = str(request.url).split("?")[0]  # Remove query parameters
+    redirect_uri = str(request.url.replace(query=""))
     
     result = await sso_service.handle_sso_callback(
         org_id, SAMLResponse, RelayState or "", redirect_uri, db
@@ -307,31 +342,15 @@ async def handle_saml_acs(
     tokens = await auth_service.create_token_pair(user)
     
     # Return HTML page that posts tokens to parent window
-    html_content = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>SSO Success</title>
-    </head>
-    <body>
-        <script>
-            // Post tokens to parent window
-            if (window.opener) {{
-                window.opener.postMessage({{
-                    type: 'SSO_SUCCESS',
-                    access_token: '{tokens["access_token"]}',
-                    refresh_token: '{tokens["refresh_token"]}'
-                }}, '*');
-                window.close();
-            }} else {{
-                // Fallback: redirect to frontend
-                window.location.href = '/auth/sso-success?access_token={tokens["access_token"]}&refresh_token={tokens["refresh_token"]}';
-            }}
-        </script>
-        <p>Authentication successful. This window should close automatically.</p>
-    </body>
-    </html>
-    """
+    fallback_url = "/auth/sso-success?" + urlencode({
+        "access_token": tokens["access_token"],
+        "refresh_token": tokens["refresh_token"]
+    })
+    html_content = _SAML_ACS_TEMPLATE.substitute(
+        access_token=_js_string(tokens["access_token"]),
+        refresh_token=_js_string(tokens["refresh_token"]),
+        fallback_url=_js_string(fallback_url)
+    )
     
     return HTMLResponse(content=html_content)
 
@@ -365,7 +384,7 @@ async def disable_sso(
 
 @router.get("/test/{org_id}")
 async def test_sso_config(
-    org_id: str,
+    org_id: str = Depends(validate_org_id),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -378,14 +397,6 @@ async def test_sso_config(
             detail="Only administrators can test SSO configuration"
         )
     
-    try:
-        uuid.UUID(org_id)  # Validate org_id format
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid organization ID"
-        )
-    
     # Check if SSO is configured
     sso_config = await sso_service.get_organization_sso_config(org_id, db)
     if not sso_config:
@@ -395,7 +406,7 @@ async def test_sso_config(
         )
     
     # Test provider connectivity
-    provider = await sso_service.get_sso_provider(org_id, db)
+    provider = sso_service.build_sso_provider(sso_config)
     
     try:
         if hasattr(provider, 'discover_endpoints'):
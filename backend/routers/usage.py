@@ -2,28 +2,57 @@
 Usage monitoring and analytics API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Dict, Any, Optional
 from datetime import date, datetime, timedelta
+from itertools import groupby
+from operator import attrgetter
 import structlog
 
-from core.dependencies import get_db, get_current_user
-from core.auth_dependencies import require_role
+from core.dependencies import get_db
+from core.auth_dependencies import get_current_user, require_roles
 from core.usage_middleware import UsageAnalytics
-from services.notification_service import UsageReportGenerator
+from services.notification_service import NotificationService, UsageReportGenerator
+from services.stripe_service import StripeService
+from repositories.usage_record import UsageRecordRepository
 from models.database import User
 
 logger = structlog.get_logger()
 
-router = APIRouter(prefix="/usage", tags=["usage"])
+router = APIRouter(prefix="/usage", tags=["usage"], default_response_class=ORJSONResponse)
+
+
+async def get_usage_summary(
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """Get the organization's current usage summary, computed at most once per request"""
+    usage_summary = getattr(request.state, "usage_summary", None)
+    if usage_summary is not None:
+        return usage_summary
+    
+    try:
+        stripe_service = StripeService(db)
+        usage_summary = await stripe_service.get_usage_summary(str(current_user.org_id))
+    except Exception as e:
+        logger.error("Error getting usage summary", error=str(e), user_id=str(current_user.id))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get usage summary: {str(e)}"
+        )
+    
+    request.state.usage_summary = usage_summary
+    return usage_summary
 
 
 @router.get("/analytics", response_model=Dict[str, Any])
 async def get_usage_analytics(
     days: int = Query(30, ge=1, le=365, description="Number of days to analyze"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get usage analytics for the current organization"""
     try:
@@ -47,8 +76,8 @@ async def get_usage_analytics(
 async def generate_usage_report(
     period_start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
     period_end: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
-    current_user: User = Depends(require_role(["admin", "owner"])),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_roles(["admin", "owner"])),
+    db: AsyncSession = Depends(get_db)
 ):
     """Generate detailed usage report for the organization"""
     try:
@@ -84,15 +113,10 @@ async def generate_usage_report(
 @router.get("/limits", response_model=Dict[str, Any])
 async def get_usage_limits(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    usage_summary: Dict[str, Any] = Depends(get_usage_summary)
 ):
     """Get current usage limits and remaining quota"""
     try:
-        from services.stripe_service import StripeService
-        
-        stripe_service = StripeService(db)
-        usage_summary = await stripe_service.get_usage_summary(str(current_user.org_id))
-        
         # Calculate time until reset
         today = date.today()
         if today.month == 12:
@@ -130,40 +154,30 @@ async def get_usage_limits(
 async def get_usage_history(
     months: int = Query(6, ge=1, le=24, description="Number of months of history"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get usage history for the organization"""
     try:
-        from repositories.subscription import UsageRecordRepository
-        
         usage_repo = UsageRecordRepository(db)
         
         # Get usage records for the specified number of months
         end_date = date.today()
         start_date = end_date - timedelta(days=months * 30)  # Approximate
         
-        usage_records = usage_repo.get_usage_summary_for_org(
+        monthly_rows = await usage_repo.get_monthly_summary(
             org_id=str(current_user.org_id),
             period_start=start_date,
             period_end=end_date
         )
         
-        # Group by month and usage type
-        monthly_usage = {}
-        for record in usage_records:
-            month_key = f"{record.period_start.year}-{record.period_start.month:02d}"
-            if month_key not in monthly_usage:
-                monthly_usage[month_key] = {}
-            
-            monthly_usage[month_key][record.usage_type] = record.amount
-        
-        # Convert to list format for easier frontend consumption
-        history = []
-        for month_key in sorted(monthly_usage.keys()):
-            history.append({
-                "month": month_key,
-                "usage": monthly_usage[month_key]
-            })
+        # Rows arrive grouped and ordered by month; fold each month's usage types
+        history = [
+            {
+                "month": f"{month.year}-{month.month:02d}",
+                "usage": {row.usage_type: int(row.total_amount) for row in rows}
+            }
+            for month, rows in groupby(monthly_rows, key=attrgetter("month"))
+        ]
         
         return {"success": True, "data": {"history": history, "months": months}}
         
@@ -177,14 +191,13 @@ async def get_usage_history(
 
 @router.post("/notifications/test", response_model=Dict[str, Any])
 async def test_usage_notification(
+    request: Request,
     notification_type: str = Query(..., description="Type of notification to test"),
-    current_user: User = Depends(require_role(["admin", "owner"])),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(require_roles(["admin", "owner"])),
+    db: AsyncSession = Depends(get_db)
 ):
     """Test usage notification system (admin only)"""
     try:
-        from services.notification_service import NotificationService
-        
         notification_service = NotificationService(db)
         
         if notification_type == "usage_warning":
@@ -204,9 +217,7 @@ async def test_usage_notification(
             )
         elif notification_type == "monthly_report":
             # Get current usage summary for test
-            from services.stripe_service import StripeService
-            stripe_service = StripeService(db)
-            usage_summary = await stripe_service.get_usage_summary(str(current_user.org_id))
+            usage_summary = await get_usage_summary(request, current_user, db)
             
             await notification_service.send_monthly_usage_report(
                 org_id=str(current_user.org_id),
@@ -231,14 +242,21 @@ async def test_usage_notification(
 @router.get("/alerts", response_model=Dict[str, Any])
 async def get_usage_alerts(
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    usage_summary: Dict[str, Any] = Depends(get_usage_summary)
 ):
     """Get current usage alerts and warnings"""
     try:
-        from services.stripe_service import StripeService
-        
-        stripe_service = StripeService(db)
-        usage_summary = await stripe_service.get_usage_summary(str(current_user.org_id))
+        # Most organizations are well under every limit; skip building the lists
+        if not any(percentage >= 75 for percentage in usage_summary["percentage_used"].values()):
+            return {
+                "success": True,
+                "data": {
+                    "alerts": [],
+                    "warnings": [],
+                    "total_alerts": 0,
+                    "total_warnings": 0
+                }
+            }
         
         alerts = []
         warnings = []
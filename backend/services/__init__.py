@@ -1,6 +1 @@
 # Services module
-
-from .auth import auth_service
-from .storage import storage_service
-
-__all__ = ["auth_service", "storage_service"]
\ No newline at end of file
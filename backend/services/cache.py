@@ -4,6 +4,7 @@ Redis-based caching service for RAG queries and rate limiting.
 
 import json
 import hashlib
+import orjson
 import logging
 from typing import Optional, Any, Dict
 from datetime import datetime, timedelta
@@ -58,6 +59,22 @@ class CacheService:
         data_hash = hashlib.md5(data_str.encode()).hexdigest()
         return f"{prefix}:{data_hash}"
     
+    def _rag_cache_key(
+        self,
+        query: str,
+        org_id: str,
+        document_ids: Optional[list],
+        similarity_threshold: float
+    ) -> str:
+        """Generate the cache key for a RAG query."""
+        cache_data = {
+            "query": query.lower().strip(),
+            "org_id": org_id,
+            "document_ids": sorted(document_ids) if document_ids else None,
+            "similarity_threshold": similarity_threshold
+        }
+        return self._generate_cache_key("rag_response", cache_data)
+    
     async def get_rag_response(
         self,
         query: str,
@@ -73,19 +90,12 @@ class CacheService:
             return None
         
         try:
-            cache_data = {
-                "query": query.lower().strip(),
-                "org_id": org_id,
-                "document_ids": sorted(document_ids) if document_ids else None,
-                "similarity_threshold": similarity_threshold
-            }
-            
-            cache_key = self._generate_cache_key("rag_response", cache_data)
+            cache_key = self._rag_cache_key(query, org_id, document_ids, similarity_threshold)
             cached_response = await self.redis_client.get(cache_key)
             
             if cached_response:
                 logger.info(f"Cache hit for RAG query: {cache_key}")
-                return json.loads(cached_response)
+                return orjson.loads(cached_response)
             
             return None
             
@@ -110,14 +120,7 @@ class CacheService:
             return False
         
         try:
-            cache_data = {
-                "query": query.lower().strip(),
-                "org_id": org_id,
-                "document_ids": sorted(document_ids) if document_ids else None,
-                "similarity_threshold": similarity_threshold
-            }
-            
-            cache_key = self._generate_cache_key("rag_response", cache_data)
+            cache_key = self._rag_cache_key(query, org_id, document_ids, similarity_threshold)
             
             # Add cache metadata
             cached_data = {
@@ -129,7 +132,7 @@ class CacheService:
             await self.redis_client.setex(
                 cache_key,
                 ttl_seconds,
-                json.dumps(cached_data, default=str)
+                orjson.dumps(cached_data, default=str)
             )
             
             logger.info(f"Cached RAG response: {cache_key}")
@@ -161,48 +164,116 @@ class CacheService:
         
         try:
             rate_limit_key = f"rate_limit:{action}:{user_id}"
-            current_time = datetime.utcnow()
-            window_start = current_time - timedelta(seconds=window_seconds)
-            
-            # Use Redis sorted set for sliding window rate limiting
             pipe = self.redis_client.pipeline()
+            member = self._queue_rate_limit(pipe, rate_limit_key, window_seconds)
+            results = await pipe.execute()
             
-            # Remove old entries
-            pipe.zremrangebyscore(
-                rate_limit_key,
-                0,
-                window_start.timestamp()
-            )
-            
-            # Count current requests
-            pipe.zcard(rate_limit_key)
-            
-            # Add current request
-            pipe.zadd(
-                rate_limit_key,
-                {str(current_time.timestamp()): current_time.timestamp()}
-            )
+            return await self._finish_rate_limit(rate_limit_key, member, results[1], limit)
             
-            # Set expiration
-            pipe.expire(rate_limit_key, window_seconds)
+        except Exception as e:
+            logger.warning(f"Error checking rate limit: {e}")
+            # Fallback to allowing request
+            return True, limit
+    
+    async def check_rate_limit_and_get_rag_response(
+        self,
+        user_id: str,
+        limit: int,
+        window_seconds: int,
+        action: str,
+        query: str,
+        org_id: str,
+        document_ids: Optional[list] = None,
+        similarity_threshold: float = 0.7
+    ) -> tuple[bool, int, Optional[Dict[str, Any]]]:
+        """
+        Check the rate limit and look up a cached RAG response in one round trip.
+        
+        Returns:
+            Tuple of (is_allowed, remaining_requests, cached_response). The cached
+            response is None on a miss or when the request is not allowed.
+        """
+        if not self._initialized:
+            await self.initialize()
+        
+        if not self.redis_client:
+            # Fallback to allowing request if Redis is unavailable
+            return True, limit, None
+        
+        try:
+            rate_limit_key = f"rate_limit:{action}:{user_id}"
+            cache_key = self._rag_cache_key(query, org_id, document_ids, similarity_threshold)
             
+            # The rate-limit commands and the cache read are independent, so
+            # they share a non-transactional pipeline
+            pipe = self.redis_client.pipeline(transaction=False)
+            member = self._queue_rate_limit(pipe, rate_limit_key, window_seconds)
+            pipe.get(cache_key)
             results = await pipe.execute()
-            current_count = results[1]  # Count after cleanup
             
-            is_allowed = current_count < limit
-            remaining = max(0, limit - current_count - 1)
-            
-            if not is_allowed:
-                # Remove the request we just added since it's not allowed
-                await self.redis_client.zrem(rate_limit_key, str(current_time.timestamp()))
-                remaining = 0
+            is_allowed, remaining = await self._finish_rate_limit(
+                rate_limit_key, member, results[1], limit
+            )
+            if not is_allowed or not results[-1]:
+                return is_allowed, remaining, None
             
-            return is_allowed, remaining
+            logger.info(f"Cache hit for RAG query: {cache_key}")
+            return is_allowed, remaining, orjson.loads(results[-1])
             
         except Exception as e:
-            logger.warning(f"Error checking rate limit: {e}")
+            logger.warning(f"Error checking rate limit and RAG cache: {e}")
             # Fallback to allowing request
-            return True, limit
+            return True, limit, None
+    
+    def _queue_rate_limit(self, pipe, rate_limit_key: str, window_seconds: int) -> str:
+        """
+        Queue the sliding-window rate limit commands on a pipeline.
+        
+        The pipeline's second result is the request count before this one.
+        Returns the sorted-set member added for this request.
+        """
+        current_time = datetime.utcnow()
+        window_start = current_time - timedelta(seconds=window_seconds)
+        member = str(current_time.timestamp())
+        
+        # Remove old entries
+        pipe.zremrangebyscore(
+            rate_limit_key,
+            0,
+            window_start.timestamp()
+        )
+        
+        # Count current requests
+        pipe.zcard(rate_limit_key)
+        
+        # Add current request
+        pipe.zadd(
+            rate_limit_key,
+            {member: current_time.timestamp()}
+        )
+        
+        # Set expiration
+        pipe.expire(rate_limit_key, window_seconds)
+        
+        return member
+    
+    async def _finish_rate_limit(
+        self,
+        rate_limit_key: str,
+        member: str,
+        current_count: int,
+        limit: int
+    ) -> tuple[bool, int]:
+        """Turn the counted requests into (is_allowed, remaining_requests)."""
+        is_allowed = current_count < limit
+        remaining = max(0, limit - current_count - 1)
+        
+        if not is_allowed:
+            # Remove the request we just added since it's not allowed
+            await self.redis_client.zrem(rate_limit_key, member)
+            remaining = 0
+        
+        return is_allowed, remaining
     
     async def get_user_usage(self, user_id: str, period: str = "daily") -> Dict[str, int]:
         """Get user usage statistics."""
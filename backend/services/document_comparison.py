@@ -2,13 +2,16 @@
 Document comparison service for analyzing differences between contract versions
 """
 
+import asyncio
 import difflib
 import re
-from typing import Dict, List, Optional, Tuple, Any
+import sys
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Any
 from uuid import UUID
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from models.database import Document, DocumentChunk, Clause
@@ -17,6 +20,12 @@ from repositories.document_chunk import DocumentChunkRepository
 from repositories.clause import ClauseRepository
 from repositories.document_comparison import DocumentComparisonRepository
 from services.risk_assessment import RiskAssessmentService
+from services.line_diff import DIFF_ALGORITHMS, DiffHunk
+
+
+# Prefix of BLAKE3 content fingerprints (routers.documents.CONTENT_HASH_PREFIX);
+# older documents store a bare SHA-256 hex digest
+_BLAKE3_HASH_PREFIX = "b3:"
 
 
 class ChangeType(Enum):
@@ -27,6 +36,11 @@ class ChangeType(Enum):
     UNCHANGED = "unchanged"
 
 
+# Interned wire values for each change type, looked up once per change when
+# serializing instead of going through the enum's value descriptor
+CHANGE_TYPE_VALUES: Dict[ChangeType, str] = {member: sys.intern(member.value) for member in ChangeType}
+
+
 @dataclass
 class TextChange:
     """Represents a text change between documents"""
@@ -60,6 +74,103 @@ class ComparisonResult:
     summary: str
 
 
+def embedding_similarity(embeddings_a: Sequence[Any], embeddings_b: Sequence[Any]) -> Optional[float]:
+    """
+    Score two documents by the cosine similarity of their chunk embeddings
+    
+    All pairwise similarities come from one (N_a x d) @ (d x N_b) matmul on
+    L2-normalized vectors. Each chunk is matched to its closest counterpart
+    and the best-match means of both directions are averaged, so additions
+    and removals both lower the score.
+    
+    Returns:
+        Score in [0, 1], or None when either document has no embeddings
+    """
+    if not embeddings_a or not embeddings_b:
+        return None
+    
+    a = np.asarray(embeddings_a, dtype=np.float32)
+    b = np.asarray(embeddings_b, dtype=np.float32)
+    a /= np.maximum(np.linalg.norm(a, axis=1, keepdims=True), 1e-12)
+    b /= np.maximum(np.linalg.norm(b, axis=1, keepdims=True), 1e-12)
+    
+    similarity = a @ b.T
+    score = (similarity.max(axis=1).mean() + similarity.max(axis=0).mean()) / 2
+    return float(np.clip(score, 0.0, 1.0))
+
+
+def _hash_scheme(file_hash: str) -> str:
+    """Name the fingerprint scheme of a stored file hash"""
+    return "blake3" if file_hash.startswith(_BLAKE3_HASH_PREFIX) else "sha256"
+
+
+def _same_content(hash_a: Optional[str], hash_b: Optional[str]) -> bool:
+    """
+    Check whether two stored file hashes prove the files are byte-identical
+    
+    Documents uploaded before the switch to BLAKE3 carry bare SHA-256 digests.
+    Fingerprints from different schemes never prove equality, so such pairs
+    are left to the full diff.
+    """
+    if not hash_a or not hash_b or _hash_scheme(hash_a) != _hash_scheme(hash_b):
+        return False
+    return hash_a == hash_b
+
+
+def compute_diff(a: Sequence[str], b: Sequence[str], algorithm: str = "histogram") -> List[DiffHunk]:
+    """Diff two line sequences with the named algorithm"""
+    return DIFF_ALGORITHMS[algorithm](a, b)
+
+
+def parse_stored_comparison(stored_comparison) -> ComparisonResult:
+    """
+    Parse a stored comparison back to a ComparisonResult object
+    
+    The result is memoized on the ORM instance, so repeated reads of the same
+    row within a session only build the change dataclasses once.
+    """
+    cached = getattr(stored_comparison, "_parsed_comparison", None)
+    if cached is not None:
+        return cached
+    
+    comparison_data = stored_comparison.comparison_result or {}
+    
+    text_changes = [
+        TextChange(
+            change_type=ChangeType(change["change_type"]),
+            text=change["text"],
+            line_number=change.get("line_number"),
+            page_number=change.get("page_number"),
+            confidence=change.get("confidence", 1.0)
+        )
+        for change in comparison_data.get("text_changes", [])
+    ]
+    
+    clause_changes = [
+        ClauseChange(
+            change_type=ChangeType(change["change_type"]),
+            clause_type=change["clause_type"],
+            old_text=change.get("old_text"),
+            new_text=change.get("new_text"),
+            risk_impact=change.get("risk_impact", "low"),
+            page_number=change.get("page_number")
+        )
+        for change in comparison_data.get("clause_changes", [])
+    ]
+    
+    result = ComparisonResult(
+        document_a_id=stored_comparison.document_a_id,
+        document_b_id=stored_comparison.document_b_id,
+        text_changes=text_changes,
+        clause_changes=clause_changes,
+        similarity_score=comparison_data.get("similarity_score", 0.0),
+        risk_assessment=stored_comparison.risk_assessment or {},
+        summary=stored_comparison.summary or ""
+    )
+    stored_comparison._parsed_comparison = result
+    return result
+
+
 class DocumentComparisonService:
     """Service for comparing contract documents and analyzing changes"""
     
@@ -76,7 +187,8 @@ class DocumentComparisonService:
         document_a_id: UUID,
         document_b_id: UUID,
         org_id: str,
-        user_id: UUID
+        user_id: UUID,
+        algorithm: str = "histogram"
     ) -> ComparisonResult:
         """
         Compare two documents and return detailed analysis of changes
@@ -86,6 +198,7 @@ class DocumentComparisonService:
             document_b_id: Second document ID (comparison)
             org_id: Organization ID
             user_id: User performing the comparison
+            algorithm: Line diff algorithm, one of DIFF_ALGORITHMS
             
         Returns:
             ComparisonResult with detailed change analysis
@@ -105,18 +218,30 @@ class DocumentComparisonService:
         if not doc_a or not doc_b:
             raise ValueError("One or both documents not found")
         
+        # Byte-identical uploads share a content fingerprint, so there is nothing to diff
+        if _same_content(doc_a.file_hash, doc_b.file_hash):
+            result = await self._identical_comparison_result(document_a_id, document_b_id)
+            await self._store_comparison_result(result, org_id, user_id)
+            return result
+        
         # Get clauses for both documents
         clauses_a = await self.clause_repo.get_by_document(document_a_id, org_id)
         clauses_b = await self.clause_repo.get_by_document(document_b_id, org_id)
         
         # Perform text-level comparison
-        text_changes = await self._compare_text_content(doc_a, doc_b)
+        text_changes = await self._compare_text_content(doc_a, doc_b, algorithm)
         
         # Perform clause-level comparison
         clause_changes = await self._compare_clauses(clauses_a, clauses_b)
         
-        # Calculate similarity score
-        similarity_score = self._calculate_similarity_score(text_changes)
+        # Calculate similarity score, preferring chunk embeddings when both documents have them
+        similarity_score = await asyncio.to_thread(
+            embedding_similarity,
+            [chunk.embedding for chunk in doc_a.chunks if chunk.embedding is not None],
+            [chunk.embedding for chunk in doc_b.chunks if chunk.embedding is not None]
+        )
+        if similarity_score is None:
+            similarity_score = self._calculate_similarity_score(text_changes)
         
         # Assess risk of changes
         risk_assessment = await self._assess_change_risks(clause_changes, text_changes)
@@ -140,7 +265,19 @@ class DocumentComparisonService:
         
         return result
     
-    async def _compare_text_content(self, doc_a: Document, doc_b: Document) -> List[TextChange]:
+    async def _identical_comparison_result(self, document_a_id: UUID, document_b_id: UUID) -> ComparisonResult:
+        """Build the comparison result for two documents with identical content"""
+        return ComparisonResult(
+            document_a_id=document_a_id,
+            document_b_id=document_b_id,
+            text_changes=[],
+            clause_changes=[],
+            similarity_score=1.0,
+            risk_assessment=await self._assess_change_risks([], []),
+            summary=self._generate_comparison_summary([], [], 1.0)
+        )
+    
+    async def _compare_text_content(self, doc_a: Document, doc_b: Document, algorithm: str = "histogram") -> List[TextChange]:
         """Compare text content between two documents"""
         # Combine chunks into full text for each document
         text_a = self._combine_chunks_to_text(doc_a.chunks)
@@ -150,29 +287,23 @@ class DocumentComparisonService:
         lines_a = text_a.split('\n')
         lines_b = text_b.split('\n')
         
-        # Use difflib for detailed comparison
-        differ = difflib.unified_diff(lines_a, lines_b, lineterm='')
+        # The diff kernel is CPU-bound, so keep it off the event loop
+        hunks = await asyncio.to_thread(compute_diff, lines_a, lines_b, algorithm)
         
         changes = []
-        line_num = 0
         
-        for line in differ:
-            if line.startswith('+++') or line.startswith('---') or line.startswith('@@'):
-                continue
-            
-            line_num += 1
-            
-            if line.startswith('+'):
+        for a_start, a_end, b_start, b_end in hunks:
+            for line_no in range(a_start, a_end):
                 changes.append(TextChange(
-                    change_type=ChangeType.ADDED,
-                    text=line[1:],
-                    line_number=line_num
+                    change_type=ChangeType.REMOVED,
+                    text=lines_a[line_no],
+                    line_number=line_no + 1
                 ))
-            elif line.startswith('-'):
+            for line_no in range(b_start, b_end):
                 changes.append(TextChange(
-                    change_type=ChangeType.REMOVED,
-                    text=line[1:],
-                    line_number=line_num
+                    change_type=ChangeType.ADDED,
+                    text=lines_b[line_no],
+                    line_number=line_no + 1
                 ))
         
         return changes
@@ -408,7 +539,7 @@ class DocumentComparisonService:
             "comparison_result": {
                 "text_changes": [
                     {
-                        "change_type": change.change_type.value,
+                        "change_type": CHANGE_TYPE_VALUES[change.change_type],
                         "text": change.text,
                         "line_number": change.line_number,
                         "page_number": change.page_number,
@@ -418,7 +549,7 @@ class DocumentComparisonService:
                 ],
                 "clause_changes": [
                     {
-                        "change_type": change.change_type.value,
+                        "change_type": CHANGE_TYPE_VALUES[change.change_type],
                         "clause_type": change.clause_type,
                         "old_text": change.old_text,
                         "new_text": change.new_text,
@@ -438,40 +569,31 @@ class DocumentComparisonService:
     
     def _parse_stored_comparison(self, stored_comparison) -> ComparisonResult:
         """Parse stored comparison back to ComparisonResult object"""
-        comparison_data = stored_comparison.comparison_result
-        
-        text_changes = [
-            TextChange(
-                change_type=ChangeType(change["change_type"]),
-                text=change["text"],
-                line_number=change.get("line_number"),
-                page_number=change.get("page_number"),
-                confidence=change.get("confidence", 1.0)
-            )
-            for change in comparison_data.get("text_changes", [])
-        ]
-        
-        clause_changes = [
-            ClauseChange(
-                change_type=ChangeType(change["change_type"]),
-                clause_type=change["clause_type"],
-                old_text=change.get("old_text"),
-                new_text=change.get("new_text"),
-                risk_impact=change.get("risk_impact", "low"),
-                page_number=change.get("page_number")
-            )
-            for change in comparison_data.get("clause_changes", [])
-        ]
-        
-        return ComparisonResult(
-            document_a_id=stored_comparison.document_a_id,
-            document_b_id=stored_comparison.document_b_id,
-            text_changes=text_changes,
-            clause_changes=clause_changes,
-            similarity_score=comparison_data.get("similarity_score", 0.0),
-            risk_assessment=stored_comparison.risk_assessment or {},
-            summary=stored_comparison.summary or ""
-        )
+        return parse_stored_comparison(stored_comparison)
+    
+    def iter_text_changes(self, stored_comparison) -> Iterator[Dict[str, Any]]:
+        """Yield stored text changes as plain dicts without building dataclasses"""
+        comparison_data = stored_comparison.comparison_result or {}
+        for change in comparison_data.get("text_changes", []):
+            yield {
+                "change_type": change["change_type"],
+                "text": change["text"],
+                "line_number": change.get("line_number"),
+                "page_number": change.get("page_number")
+            }
+    
+    def iter_clause_changes(self, stored_comparison) -> Iterator[Dict[str, Any]]:
+        """Yield stored clause changes as plain dicts without building dataclasses"""
+        comparison_data = stored_comparison.comparison_result or {}
+        for change in comparison_data.get("clause_changes", []):
+            yield {
+                "change_type": change["change_type"],
+                "clause_type": change["clause_type"],
+                "old_text": change.get("old_text"),
+                "new_text": change.get("new_text"),
+                "risk_impact": change.get("risk_impact", "low"),
+                "page_number": change.get("page_number")
+            }
     
     async def get_comparison_history(self, org_id: str, limit: int = 10):
         """Get recent comparison history for organization"""
@@ -61,7 +61,8 @@ class JobQueueService:
         self, 
         document_id: UUID, 
         org_id: str,
-        priority: str = "normal"
+        priority: str = "normal",
+        job_id: Optional[str] = None
     ) -> str:
         """
         Submit a document for processing.
@@ -70,6 +71,7 @@ class JobQueueService:
             document_id: UUID of the document to process
             org_id: Organization ID
             priority: Task priority ("high", "normal", "low")
+            job_id: Optional task ID reserved by the caller (generated if not provided)
             
         Returns:
             Job ID for tracking
@@ -80,6 +82,7 @@ class JobQueueService:
             # Submit task to Celery
             task_result = process_document.apply_async(
                 args=[str(document_id), org_id],
+                task_id=job_id,
                 queue=self._get_queue_for_priority(priority),
                 priority=self._get_priority_value(priority)
             )
@@ -0,0 +1,253 @@
+"""
+Line diff algorithms used by document comparison
+"""
+
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# A hunk is a non-equal region expressed as (a_start, a_end, b_start, b_end)
+DiffHunk = Tuple[int, int, int, int]
+
+# Histogram diff hands a range to Myers once every shared line is this common
+_HISTOGRAM_MAX_CHAIN = 64
+
+
+def _middle_snake(a: List[int], a_lo: int, a_hi: int, b: List[int], b_lo: int, b_hi: int) -> Tuple[int, int, int, int]:
+    """
+    Find the middle snake of the shortest edit script between two ranges
+    
+    Runs the forward and reverse Myers searches simultaneously, keeping only
+    one furthest-reaching vector per direction, so memory is O(N + M).
+    Returns the snake as (x, y, u, v) relative to the start of each range.
+    """
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    delta = n - m
+    odd = delta & 1
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    forward = [0] * (2 * max_d + 3)
+    backward = [0] * (2 * max_d + 3)
+    
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if odd and delta - (d - 1) <= k <= delta + (d - 1):
+                if x + backward[offset + delta - k] >= n:
+                    return start_x, start_y, x, y
+        
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[a_hi - 1 - x] == b[b_hi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d:
+                if x + forward[offset + delta - k] >= n:
+                    return n - x, m - y, n - start_x, m - start_y
+    
+    raise RuntimeError("Myers diff failed to find a middle snake")
+
+
+def _intern_lines(a: Sequence[str], b: Sequence[str]) -> Tuple[List[int], List[int]]:
+    """Map lines to integer ids so the diff loops compare ints, not strings"""
+    interned: Dict[str, int] = {}
+    a_ids = [interned.setdefault(line, len(interned)) for line in a]
+    b_ids = [interned.setdefault(line, len(interned)) for line in b]
+    return a_ids, b_ids
+
+
+def _trim_common_affixes(a: List[int], a_lo: int, a_hi: int, b: List[int], b_lo: int, b_hi: int) -> Tuple[int, int, int, int]:
+    """Drop the common prefix and suffix of two ranges, which are never part of an edit"""
+    while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+        a_lo += 1
+        b_lo += 1
+    while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+        a_hi -= 1
+        b_hi -= 1
+    return a_lo, a_hi, b_lo, b_hi
+
+
+def _myers_hunks(a: List[int], a_lo: int, a_hi: int, b: List[int], b_lo: int, b_hi: int) -> List[DiffHunk]:
+    """Diff two interned ranges with linear-space Myers, returning unmerged hunks"""
+    hunks: List[DiffHunk] = []
+    stack = [(a_lo, a_hi, b_lo, b_hi)]
+    
+    while stack:
+        a_lo, a_hi, b_lo, b_hi = stack.pop()
+        a_lo, a_hi, b_lo, b_hi = _trim_common_affixes(a, a_lo, a_hi, b, b_lo, b_hi)
+        
+        if a_lo == a_hi or b_lo == b_hi:
+            if a_lo != a_hi or b_lo != b_hi:
+                hunks.append((a_lo, a_hi, b_lo, b_hi))
+            continue
+        
+        x, y, u, v = _middle_snake(a, a_lo, a_hi, b, b_lo, b_hi)
+        
+        # Push the tail first so hunks come out in document order
+        stack.append((a_lo + u, a_hi, b_lo + v, b_hi))
+        stack.append((a_lo, a_lo + x, b_lo, b_lo + y))
+    
+    return hunks
+
+
+def myers_diff(a: Sequence[str], b: Sequence[str]) -> List[DiffHunk]:
+    """
+    Compute a minimal line diff using the linear-space Myers algorithm
+    
+    Runs in O((N + M) * D) time and O(N + M) space.
+    
+    Returns:
+        Ordered list of non-equal hunks as (a_start, a_end, b_start, b_end)
+    """
+    a_ids, b_ids = _intern_lines(a, b)
+    return _merge_adjacent_hunks(_myers_hunks(a_ids, 0, len(a_ids), b_ids, 0, len(b_ids)))
+
+
+def _index_lines(a: List[int]) -> Dict[int, List[int]]:
+    """Map each line id to its ascending positions in A"""
+    index: Dict[int, List[int]] = {}
+    for i, line in enumerate(a):
+        index.setdefault(line, []).append(i)
+    return index
+
+
+def _count_in_range(positions: List[int], lo: int, hi: int) -> int:
+    """Count the positions that fall within [lo, hi)"""
+    return bisect_left(positions, hi) - bisect_left(positions, lo)
+
+
+def _histogram_anchor(
+    a: List[int], a_lo: int, a_hi: int,
+    b: List[int], b_lo: int, b_hi: int,
+    index: Dict[int, List[int]]
+) -> Tuple[Optional[DiffHunk], bool]:
+    """
+    Find the common region whose rarest line occurs least often in A
+    
+    Occurrence counts are taken from the whole-document index, restricted to
+    the A range by bisection. Among equally rare regions the longest wins, and
+    among those the one nearest the middle of the B range, so the recursion
+    splits ranges evenly instead of peeling one region off the front per pass.
+    
+    Returns the region as (a_start, a_end, b_start, b_end), or None, plus a
+    flag telling whether any common line was skipped for being too frequent.
+    """
+    best: Optional[DiffHunk] = None
+    best_count = _HISTOGRAM_MAX_CHAIN + 1
+    best_length = 0
+    best_distance = 0
+    b_center = b_lo + b_hi
+    too_frequent = False
+    
+    j = b_lo
+    while j < b_hi:
+        next_j = j + 1
+        positions = index.get(b[j])
+        first = bisect_left(positions, a_lo) if positions is not None else 0
+        last = bisect_left(positions, a_hi) if positions is not None else 0
+        count = last - first
+        
+        if count > _HISTOGRAM_MAX_CHAIN:
+            too_frequent = True
+        elif count and count <= best_count:
+            for i in positions[first:last]:
+                start_a, start_b = i, j
+                end_a, end_b = i + 1, j + 1
+                region_count = count
+                
+                while start_a > a_lo and start_b > b_lo and a[start_a - 1] == b[start_b - 1]:
+                    start_a -= 1
+                    start_b -= 1
+                    region_count = min(region_count, _count_in_range(index[a[start_a]], a_lo, a_hi))
+                while end_a < a_hi and end_b < b_hi and a[end_a] == b[end_b]:
+                    region_count = min(region_count, _count_in_range(index[a[end_a]], a_lo, a_hi))
+                    end_a += 1
+                    end_b += 1
+                
+                length = end_a - start_a
+                distance = abs(start_b + end_b - b_center)
+                if (region_count, -length, distance) < (best_count, -best_length, best_distance):
+                    best = (start_a, end_a, start_b, end_b)
+                    best_count = region_count
+                    best_length = length
+                    best_distance = distance
+                next_j = max(next_j, end_b)
+        
+        j = next_j
+    
+    return best, too_frequent
+
+
+def histogram_diff(a: Sequence[str], b: Sequence[str]) -> List[DiffHunk]:
+    """
+    Compute a line diff using the histogram algorithm
+    
+    Anchors on the least-common shared line and recurses either side of it,
+    which keeps repeated boilerplate from being matched across clauses. Ranges
+    where every shared line occurs more than _HISTOGRAM_MAX_CHAIN times fall
+    back to Myers.
+    
+    Returns:
+        Ordered list of non-equal hunks as (a_start, a_end, b_start, b_end)
+    """
+    a_ids, b_ids = _intern_lines(a, b)
+    index = _index_lines(a_ids)
+    hunks: List[DiffHunk] = []
+    stack = [(0, len(a_ids), 0, len(b_ids))]
+    
+    while stack:
+        a_lo, a_hi, b_lo, b_hi = stack.pop()
+        a_lo, a_hi, b_lo, b_hi = _trim_common_affixes(a_ids, a_lo, a_hi, b_ids, b_lo, b_hi)
+        
+        if a_lo == a_hi or b_lo == b_hi:
+            if a_lo != a_hi or b_lo != b_hi:
+                hunks.append((a_lo, a_hi, b_lo, b_hi))
+            continue
+        
+        anchor, too_frequent = _histogram_anchor(a_ids, a_lo, a_hi, b_ids, b_lo, b_hi, index)
+        
+        if anchor is None:
+            if too_frequent:
+                hunks.extend(_myers_hunks(a_ids, a_lo, a_hi, b_ids, b_lo, b_hi))
+            else:
+                hunks.append((a_lo, a_hi, b_lo, b_hi))
+            continue
+        
+        anchor_a_lo, anchor_a_hi, anchor_b_lo, anchor_b_hi = anchor
+        stack.append((anchor_a_hi, a_hi, anchor_b_hi, b_hi))
+        stack.append((a_lo, anchor_a_lo, b_lo, anchor_b_lo))
+    
+    return _merge_adjacent_hunks(hunks)
+
+
+def _merge_adjacent_hunks(hunks: List[DiffHunk]) -> List[DiffHunk]:
+    """Merge hunks that touch so a replacement is reported as one region"""
+    merged: List[DiffHunk] = []
+    for hunk in hunks:
+        if merged and merged[-1][1] == hunk[0] and merged[-1][3] == hunk[2]:
+            previous = merged.pop()
+            hunk = (previous[0], hunk[1], previous[2], hunk[3])
+        merged.append(hunk)
+    return merged
+
+
+DIFF_ALGORITHMS: Dict[str, Callable[[Sequence[str], Sequence[str]], List[DiffHunk]]] = {
+    "myers": myers_diff,
+    "histogram": histogram_diff,
+}
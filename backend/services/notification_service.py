@@ -5,7 +5,8 @@ Notification service for usage alerts and billing notifications
 import structlog
 from typing import Dict, Any, List, Optional
 from datetime import datetime, date
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import smtplib
@@ -13,6 +14,7 @@ import json
 
 from models.database import User, Organization, Subscription
 from core.config import settings
+from services.stripe_service import StripeService
 
 logger = structlog.get_logger()
 
@@ -20,21 +22,21 @@ logger = structlog.get_logger()
 class NotificationService:
     """Service for sending various types of notifications"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
     async def send_usage_limit_warning(self, org_id: str, usage_type: str, current_usage: int, limit: int, percentage: float):
         """Send warning when usage approaches limit"""
         try:
             # Get organization and admin users
-            org = self.db.query(Organization).filter(Organization.id == org_id).first()
+            org = (await self.db.execute(select(Organization).where(Organization.id == org_id))).scalars().first()
             if not org:
                 return
             
-            admin_users = self.db.query(User).filter(
+            admin_users = (await self.db.execute(select(User).where(
                 User.org_id == org_id,
                 User.role.in_(["admin", "owner"])
-            ).all()
+            ))).scalars().all()
             
             if not admin_users:
                 return
@@ -82,14 +84,14 @@ class NotificationService:
     async def send_usage_limit_exceeded(self, org_id: str, usage_type: str, current_usage: int, limit: int):
         """Send notification when usage limit is exceeded"""
         try:
-            org = self.db.query(Organization).filter(Organization.id == org_id).first()
+            org = (await self.db.execute(select(Organization).where(Organization.id == org_id))).scalars().first()
             if not org:
                 return
             
-            admin_users = self.db.query(User).filter(
+            admin_users = (await self.db.execute(select(User).where(
                 User.org_id == org_id,
                 User.role.in_(["admin", "owner"])
-            ).all()
+            ))).scalars().all()
             
             subject = f"Usage Limit Exceeded: {usage_type.replace('_', ' ').title()}"
             
@@ -131,14 +133,14 @@ class NotificationService:
     async def send_billing_notification(self, org_id: str, event_type: str, data: Dict[str, Any]):
         """Send billing-related notifications"""
         try:
-            org = self.db.query(Organization).filter(Organization.id == org_id).first()
+            org = (await self.db.execute(select(Organization).where(Organization.id == org_id))).scalars().first()
             if not org:
                 return
             
-            admin_users = self.db.query(User).filter(
+            admin_users = (await self.db.execute(select(User).where(
                 User.org_id == org_id,
                 User.role.in_(["admin", "owner"])
-            ).all()
+            ))).scalars().all()
             
             subject, message = self._get_billing_notification_content(event_type, org.name, data)
             
@@ -159,14 +161,14 @@ class NotificationService:
     async def send_monthly_usage_report(self, org_id: str, usage_summary: Dict[str, Any]):
         """Send monthly usage report"""
         try:
-            org = self.db.query(Organization).filter(Organization.id == org_id).first()
+            org = (await self.db.execute(select(Organization).where(Organization.id == org_id))).scalars().first()
             if not org:
                 return
             
-            admin_users = self.db.query(User).filter(
+            admin_users = (await self.db.execute(select(User).where(
                 User.org_id == org_id,
                 User.role.in_(["admin", "owner"])
-            ).all()
+            ))).scalars().all()
             
             subject = f"Monthly Usage Report - {org.name}"
             
@@ -323,20 +325,18 @@ class NotificationService:
 class UsageReportGenerator:
     """Generate usage reports and analytics"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
     async def generate_organization_report(self, org_id: str, period_start: date, period_end: date) -> Dict[str, Any]:
         """Generate comprehensive usage report for organization"""
         try:
-            from services.stripe_service import StripeService
-            
             stripe_service = StripeService(self.db)
             usage_summary = await stripe_service.get_usage_summary(org_id, period_start, period_end)
             
             # Get organization details
-            org = self.db.query(Organization).filter(Organization.id == org_id).first()
-            subscription = self.db.query(Subscription).filter(Subscription.org_id == org_id).first()
+            org = (await self.db.execute(select(Organization).where(Organization.id == org_id))).scalars().first()
+            subscription = (await self.db.execute(select(Subscription).where(Subscription.org_id == org_id))).scalars().first()
             
             report = {
                 "organization": {
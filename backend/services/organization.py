@@ -5,9 +5,10 @@ Organization management service for team workspace features
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
+from sqlalchemy import select, and_, or_, func
 from sqlalchemy.orm import selectinload
 from fastapi import HTTPException, status
+from cachetools import TTLCache
 import uuid
 
 from models.database import Organization, User, Document, Subscription
@@ -22,7 +23,35 @@ class OrganizationService:
     """Service for managing organization settings and team workspace features"""
     
     def __init__(self):
-        pass
+        # Organization name, team and subscription keyed by org_id; dashboards
+        # load them repeatedly while they change rarely, and every mutation below
+        # drops the entry. Document stats and the SSO flag change through other
+        # services, so they are always read fresh and never cached here.
+        self._details_cache: TTLCache = TTLCache(maxsize=128, ttl=30)
+    
+    def _invalidate_details(self, org_id: str) -> None:
+        """Drop cached details after the organization or its team changes"""
+        self._details_cache.pop(org_id, None)
+    
+    @staticmethod
+    def _copy_details(cached: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a cached details entry so callers cannot mutate the shared one"""
+        subscription = cached["subscription"]
+        return {
+            **cached,
+            "team_members": [dict(member) for member in cached["team_members"]],
+            "subscription": dict(subscription) if subscription is not None else None
+        }
+    
+    async def _get_live_stats(self, org_id: str, db: AsyncSession) -> Dict[str, Any]:
+        """Read the details fields that are never cached: SSO flag and document stats"""
+        sso_config = await db.scalar(
+            select(Organization.sso_config).where(Organization.id == uuid.UUID(org_id))
+        )
+        return {
+            "sso_configured": bool(sso_config),
+            "document_stats": await DocumentRepository(db).get_organization_stats(org_id)
+        }
     
     async def get_organization_details(
         self, 
@@ -39,20 +68,23 @@ class OrganizationService:
                 detail="Insufficient permissions to view organization details"
             )
         
+        cached = self._details_cache.get(org_id)
+        if cached is not None:
+            await OrganizationRepository(db).set_org_context(org_id)
+            return {**self._copy_details(cached), **await self._get_live_stats(org_id, db)}
+        
         org_repo = OrganizationRepository(db)
-        user_repo = UserRepository(db)
         doc_repo = DocumentRepository(db)
         
-        # Get organization
-        org = await org_repo.get_by_id(org_id)
+        # Get organization with its team members eagerly loaded
+        await org_repo.set_org_context(org_id)
+        org = await org_repo.get_with_users(uuid.UUID(org_id))
         if not org:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="Organization not found"
             )
-        
-        # Get team members
-        team_members = await user_repo.get_by_org_id(org_id)
+        team_members = org.users
         
         # Get document statistics
         doc_stats = await doc_repo.get_organization_stats(org_id)
@@ -60,28 +92,126 @@ class OrganizationService:
         # Get subscription info
         subscription = await self._get_organization_subscription(org_id, db)
         
-        return {
+        details = {
             "id": str(org.id),
             "name": org.name,
             "created_at": org.created_at,
             "updated_at": org.updated_at,
-            "sso_configured": bool(org.sso_config),
-            "team_members": [
-                {
-                    "id": str(user.id),
-                    "email": user.email,
-                    "role": user.role,
-                    "provider": user.provider,
-                    "is_active": user.is_active,
-                    "email_verified": user.email_verified,
-                    "last_login": user.last_login,
-                    "created_at": user.created_at
-                }
-                for user in team_members
-            ],
-            "document_stats": doc_stats,
+            "team_members": [self._serialize_team_member(user) for user in team_members],
             "subscription": subscription
         }
+        self._details_cache[org_id] = details
+        
+        return {
+            **self._copy_details(details),
+            "sso_configured": bool(org.sso_config),
+            "document_stats": doc_stats
+        }
+    
+    async def get_team_members_only(
+        self,
+        org_id: str,
+        current_user: User,
+        db: AsyncSession
+    ) -> List[Dict[str, Any]]:
+        """Get the organization's team members without the rest of the details payload"""
+        
+        # Check permissions
+        if not check_permission(current_user.role, "organization", "read"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Insufficient permissions to view organization details"
+            )
+        
+        cached = self._details_cache.get(org_id)
+        if cached is not None:
+            return [dict(member) for member in cached["team_members"]]
+        
+        user_repo = UserRepository(db)
+        await user_repo.set_org_context(org_id)
+        
+        # Select only the columns the listing returns
+        result = await db.execute(
+            select(
+                User.id,
+                User.email,
+                User.role,
+                User.provider,
+                User.is_active,
+                User.email_verified,
+                User.last_login,
+                User.created_at
+            ).where(User.org_id == uuid.UUID(org_id))
+        )
+        return [self._serialize_team_member(row) for row in result]
+    
+    async def get_org_stats_only(
+        self,
+        org_id: str,
+        current_user: User,
+        db: AsyncSession
+    ) -> Dict[str, Any]:
+        """Get organization statistics using counts rather than the full team listing"""
+        
+        # Check permissions
+        if not check_permission(current_user.role, "organization", "read"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Insufficient permissions to view organization details"
+            )
+        
+        cached = self._details_cache.get(org_id)
+        if cached is not None:
+            await OrganizationRepository(db).set_org_context(org_id)
+            details = {**self._copy_details(cached), **await self._get_live_stats(org_id, db)}
+            return {
+                "team_size": len(details["team_members"]),
+                "document_stats": details["document_stats"],
+                "subscription": details["subscription"],
+                "sso_configured": details["sso_configured"]
+            }
+        
+        org_repo = OrganizationRepository(db)
+        doc_repo = DocumentRepository(db)
+        
+        # Organization flags and team size in one query
+        await org_repo.set_org_context(org_id)
+        result = await db.execute(
+            select(
+                Organization.sso_config,
+                select(func.count(User.id))
+                .where(User.org_id == Organization.id)
+                .scalar_subquery()
+            ).where(Organization.id == uuid.UUID(org_id))
+        )
+        row = result.first()
+        if not row:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Organization not found"
+            )
+        sso_config, team_size = row
+        
+        return {
+            "team_size": team_size,
+            "document_stats": await doc_repo.get_organization_stats(org_id),
+            "subscription": await self._get_organization_subscription(org_id, db),
+            "sso_configured": bool(sso_config)
+        }
+    
+    @staticmethod
+    def _serialize_team_member(member: Any) -> Dict[str, Any]:
+        """Build the team member entry from a User or a projected user row"""
+        return {
+            "id": str(member.id),
+            "email": member.email,
+            "role": member.role,
+            "provider": member.provider,
+            "is_active": member.is_active,
+            "email_verified": member.email_verified,
+            "last_login": member.last_login,
+            "created_at": member.created_at
+        }
     
     async def update_organization_settings(
         self,
@@ -125,6 +255,8 @@ class OrganizationService:
             "payload_json": update_data
         })
         
+        self._invalidate_details(org_id)
+        
         return org
     
     async def invite_team_member(
@@ -197,6 +329,8 @@ class OrganizationService:
             "payload_json": {"email": email, "role": role, "invited_by": current_user.email}
         })
         
+        self._invalidate_details(org_id)
+        
         # TODO: Send invitation email
         # This would typically involve sending an email with a setup link
         
@@ -276,6 +410,8 @@ class OrganizationService:
             }
         })
         
+        self._invalidate_details(org_id)
+        
         return updated_user
     
     async def remove_team_member(
@@ -336,6 +472,8 @@ class OrganizationService:
         # Remove user
         await user_repo.delete(user_id)
         
+        self._invalidate_details(org_id)
+        
         return True
     
     async def get_shared_documents(
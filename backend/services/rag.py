@@ -9,7 +9,7 @@ This service implements:
 """
 
 import logging
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, AsyncGenerator
 from dataclasses import dataclass
 from uuid import UUID
 import asyncio
@@ -389,31 +389,8 @@ class ClaudeAPIService:
             Tuple of (response_text, model_used, confidence_score)
         """
         primary_model = self._get_model_for_plan(plan)
+        system_prompt, user_prompt = self._build_prompts(query, context)
         
-        # Structured prompt for legal document analysis
-        system_prompt = """You are an expert legal AI assistant specializing in contract analysis. Your role is to:
-
-1. Provide accurate, precise answers based solely on the provided document context
-2. Include specific citations with page numbers when available
-3. Highlight potential risks, missing clauses, or important legal considerations
-4. Use clear, professional language appropriate for legal professionals
-5. If information is not in the provided context, clearly state this limitation
-
-Always structure your responses with:
-- Direct answer to the question
-- Supporting evidence from the documents with citations
-- Any relevant legal considerations or risks
-- Confidence level in your analysis"""
-
-        user_prompt = f"""Based on the following contract documents, please answer this question:
-
-QUESTION: {query}
-
-DOCUMENT CONTEXT:
-{context}
-
-Please provide a comprehensive answer with specific citations to page numbers where available. If the documents don't contain sufficient information to fully answer the question, please indicate what information is missing."""
-
         try:
             # Try primary model first
             response = await self._make_api_call(
@@ -451,6 +428,98 @@ Please provide a comprehensive answer with specific citations to page numbers wh
             else:
                 raise
     
+    def _build_prompts(self, query: str, context: str) -> Tuple[str, str]:
+        """Build the system and user prompts for a question over document context."""
+        # Structured prompt for legal document analysis
+        system_prompt = """You are an expert legal AI assistant specializing in contract analysis. Your role is to:
+
+1. Provide accurate, precise answers based solely on the provided document context
+2. Include specific citations with page numbers when available
+3. Highlight potential risks, missing clauses, or important legal considerations
+4. Use clear, professional language appropriate for legal professionals
+5. If information is not in the provided context, clearly state this limitation
+
+Always structure your responses with:
+- Direct answer to the question
+- Supporting evidence from the documents with citations
+- Any relevant legal considerations or risks
+- Confidence level in your analysis"""
+
+        user_prompt = f"""Based on the following contract documents, please answer this question:
+
+QUESTION: {query}
+
+DOCUMENT CONTEXT:
+{context}
+
+Please provide a comprehensive answer with specific citations to page numbers where available. If the documents don't contain sufficient information to fully answer the question, please indicate what information is missing."""
+        
+        return system_prompt, user_prompt
+    
+    async def stream_response(
+        self,
+        query: str,
+        context: str,
+        plan: str = 'pro',
+        max_tokens: int = 1000,
+        temperature: float = 0.1
+    ) -> AsyncGenerator[Tuple[str, Any], None]:
+        """
+        Stream a response from Claude as it is generated.
+        
+        Args:
+            query: User's question
+            context: Retrieved context from documents
+            plan: Subscription plan (determines model)
+            max_tokens: Maximum tokens in response
+            temperature: Response randomness (0.0-1.0)
+            
+        Yields:
+            ("delta", text) for each generated text fragment, then
+            ("end", (response_text, model_used, confidence_score))
+        """
+        primary_model = self._get_model_for_plan(plan)
+        system_prompt, user_prompt = self._build_prompts(query, context)
+        
+        models = [primary_model]
+        if primary_model != self.fallback_model:
+            models.append(self.fallback_model)
+        
+        for model in models:
+            parts = []
+            try:
+                async with self.client.messages.stream(
+                    model=model,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    system=system_prompt,
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": user_prompt
+                        }
+                    ]
+                ) as stream:
+                    async for text in stream.text_stream:
+                        parts.append(text)
+                        yield "delta", text
+            except Exception as e:
+                # Text already sent to the caller cannot be taken back, so only
+                # fall back when the failure happened before the first delta
+                if parts or model == models[-1]:
+                    logger.error(f"Claude streaming call failed: {e}")
+                    raise
+                logger.warning(f"Primary model {model} failed: {e}")
+                logger.info(f"Falling back to {self.fallback_model}")
+                continue
+            
+            response = "".join(parts)
+            if not response:
+                raise ValueError("Empty response from Claude API")
+            
+            yield "end", (response, model, self._calculate_confidence(response, context))
+            return
+    
     async def _make_api_call(
         self,
         model: str,
@@ -622,6 +691,114 @@ class RAGService:
                 context_used=""
             )
     
+    async def retrieve_context(
+        self,
+        query: str,
+        org_id: str,
+        document_ids: Optional[List[UUID]] = None,
+        max_results: int = 10,
+        similarity_threshold: float = 0.7,
+        max_context_length: int = 4000
+    ) -> Tuple[List[SearchResult], str]:
+        """
+        Run the database half of a streaming RAG query: search and context assembly.
+        
+        Takes the same arguments as query() apart from plan.
+        
+        Returns:
+            The search results and the assembled context window; both are empty
+            when nothing relevant was found
+        """
+        logger.info(f"Starting streaming RAG query for org {org_id}: '{query[:100]}...'")
+        
+        # Step 1: Semantic search
+        search_results = await self.search_service.search(
+            query=query,
+            org_id=org_id,
+            document_ids=document_ids,
+            limit=max_results,
+            similarity_threshold=similarity_threshold,
+            include_context=True,
+            context_size=2
+        )
+        
+        if not search_results:
+            return [], ""
+        
+        # Step 2: Assemble context window
+        context = await self.search_service.get_context_window(
+            search_results, max_context_length
+        )
+        return search_results, context
+    
+    async def stream_answer(
+        self,
+        query: str,
+        search_results: List[SearchResult],
+        context: str,
+        start_time: float,
+        plan: str = 'pro'
+    ) -> AsyncGenerator[Tuple[str, Any], None]:
+        """
+        Stream the answer for context from retrieve_context() as Claude generates it.
+        
+        Does not touch the database, so callers can release their session first.
+        
+        Args:
+            query: User query
+            search_results: Search results returned by retrieve_context()
+            context: Context window returned by retrieve_context()
+            start_time: time.time() when the query started, for processing_time
+            plan: Subscription plan (free/pro/enterprise)
+            
+        Yields:
+            ("delta", text) for each fragment of the answer, then ("end", RAGResponse)
+            with the full answer, citations and metadata
+        """
+        import time
+        
+        if not search_results:
+            answer = "I couldn't find any relevant information in the uploaded documents to answer your question. Please make sure the documents contain information related to your query, or try rephrasing your question."
+            yield "delta", answer
+            yield "end", RAGResponse(
+                answer=answer,
+                citations=[],
+                confidence=0.0,
+                model_used="none",
+                processing_time=time.time() - start_time,
+                context_used=""
+            )
+            return
+        
+        # Step 3: Stream the response from Claude
+        async for kind, payload in self.claude_service.stream_response(
+            query=query,
+            context=context,
+            plan=plan
+        ):
+            if kind == "delta":
+                yield kind, payload
+            else:
+                answer, model_used, confidence = payload
+        
+        # Step 4: Extract citations
+        citations = await self.search_service.extract_citations(
+            search_results, answer
+        )
+        
+        processing_time = time.time() - start_time
+        
+        logger.info(f"Streaming RAG query completed in {processing_time:.2f}s using {model_used}")
+        
+        yield "end", RAGResponse(
+            answer=answer,
+            citations=citations,
+            confidence=confidence,
+            model_used=model_used,
+            processing_time=processing_time,
+            context_used=context[:500] + "..." if len(context) > 500 else context
+        )
+    
     async def get_subscription_plan(self, org_id: str) -> str:
         """
         Get subscription plan for organization.
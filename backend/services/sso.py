@@ -2,10 +2,12 @@
 SSO (SAML/OIDC) authentication service for enterprise integration
 """
 
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timedelta
+import asyncio
 import json
 import base64
+import time
 import xml.etree.ElementTree as ET
 from urllib.parse import urlencode, parse_qs, urlparse
 import httpx
@@ -16,6 +18,7 @@ from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.primitives.serialization import Encoding, PrivateFormat, NoEncryption
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
+from cachetools import TTLCache
 import uuid
 
 from core.config import settings
@@ -25,6 +28,40 @@ from repositories.user import UserRepository
 from repositories.audit_log import AuditLogRepository
 
 
+# OIDC discovery documents keyed by discovery URL. They are near-immutable, and
+# providers are rebuilt per request, so keep them at module level
+_DISCOVERY_CACHE_TTL_SECONDS = 600
+_discovery_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+# In-flight fetches keyed by discovery URL, so concurrent logins for one provider
+# share a request while other providers are fetched independently
+_discovery_fetches: Dict[str, "asyncio.Task[Dict[str, Any]]"] = {}
+
+
+def invalidate_discovery(discovery_url: Optional[str]) -> None:
+    """Drop a cached OIDC discovery document"""
+    if discovery_url:
+        _discovery_cache.pop(discovery_url, None)
+        _discovery_fetches.pop(discovery_url, None)
+
+
+async def _download_discovery_document(discovery_url: str) -> Dict[str, Any]:
+    """Fetch a discovery document and cache it unless it was invalidated meanwhile"""
+    async with httpx.AsyncClient() as client:
+        response = await client.get(discovery_url)
+        response.raise_for_status()
+        discovery_doc = response.json()
+    
+    if _discovery_fetches.get(discovery_url) is asyncio.current_task():
+        _discovery_cache[discovery_url] = (time.monotonic(), discovery_doc)
+    return discovery_doc
+
+
+def _forget_discovery_fetch(discovery_url: str, fetch: "asyncio.Task[Dict[str, Any]]") -> None:
+    """Remove a finished fetch, unless it has already been replaced"""
+    if _discovery_fetches.get(discovery_url) is fetch:
+        del _discovery_fetches[discovery_url]
+
+
 class SSOProvider:
     """Base class for SSO providers"""
     
@@ -69,10 +106,7 @@ class OIDCProvider(SSOProvider):
         if not self.discovery_url:
             raise ValueError("Discovery URL not configured")
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(self.discovery_url)
-            response.raise_for_status()
-            discovery_doc = response.json()
+        discovery_doc = await self._fetch_discovery_document()
         
         # Update configuration with discovered endpoints
         self.issuer = discovery_doc.get("issuer", self.issuer)
@@ -83,6 +117,21 @@ class OIDCProvider(SSOProvider):
         
         return discovery_doc
     
+    async def _fetch_discovery_document(self) -> Dict[str, Any]:
+        """Fetch the discovery document, reusing a cached copy within its TTL"""
+        cached = _discovery_cache.get(self.discovery_url)
+        if cached and time.monotonic() - cached[0] < _DISCOVERY_CACHE_TTL_SECONDS:
+            return cached[1]
+        
+        fetch = _discovery_fetches.get(self.discovery_url)
+        if fetch is None:
+            fetch = asyncio.ensure_future(_download_discovery_document(self.discovery_url))
+            _discovery_fetches[self.discovery_url] = fetch
+            fetch.add_done_callback(lambda done, url=self.discovery_url: _forget_discovery_fetch(url, done))
+        
+        # Shield the shared fetch so one cancelled login does not fail the others
+        return await asyncio.shield(fetch)
+    
     async def get_jwks(self) -> Dict[str, Any]:
         """Get JSON Web Key Set for token validation"""
         if not self.jwks_uri:
@@ -316,25 +365,31 @@ class SSOService:
     
     def __init__(self):
         self.providers: Dict[str, SSOProvider] = {}
+        # SSO config keyed by org_id, including orgs without SSO; every login
+        # reads it. configure_sso_provider only drops this worker's entry, so
+        # keep the TTL short enough that other workers pick up changes quickly
+        self._config_cache: TTLCache = TTLCache(maxsize=10_000, ttl=5)
     
     async def get_organization_sso_config(self, org_id: str, db: AsyncSession) -> Optional[Dict[str, Any]]:
         """Get SSO configuration for organization"""
+        if org_id in self._config_cache:
+            return self._config_cache[org_id]
+        
         org_repo = OrganizationRepository(db)
         org = await org_repo.get_by_id(org_id)
         
-        if not org or not org.sso_config:
-            return None
-        
-        return org.sso_config
+        sso_config = org.sso_config if org and org.sso_config else None
+        self._config_cache[org_id] = sso_config
+        return sso_config
     
     async def configure_sso_provider(self, org_id: str, sso_config: Dict[str, Any], db: AsyncSession) -> bool:
         """Configure SSO provider for organization"""
         org_repo = OrganizationRepository(db)
         audit_repo = AuditLogRepository(db)
         
-        # Validate configuration
-        provider_type = sso_config.get("type")
-        if provider_type not in ["oidc", "saml"]:
+        # Validate configuration; None disables SSO
+        provider_type = sso_config.get("type") if sso_config else None
+        if sso_config and provider_type not in ["oidc", "saml"]:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Unsupported SSO provider type"
@@ -348,7 +403,14 @@ class SSOService:
                 detail="Organization not found"
             )
         
+        # Changing the provider should not keep serving the old discovery document
+        if org.sso_config:
+            invalidate_discovery(org.sso_config.get("discovery_url"))
+        if sso_config:
+            invalidate_discovery(sso_config.get("discovery_url"))
+        
         await org_repo.update(org_id, {"sso_config": sso_config})
+        self._config_cache.pop(org_id, None)
         
         # Log configuration change
         await audit_repo.create({
@@ -356,7 +418,7 @@ class SSOService:
             "action": "sso_configured",
             "resource_type": "organization",
             "resource_id": org_id,
-            "payload_json": {"provider_type": provider_type, "provider_name": sso_config.get("name")}
+            "payload_json": {"provider_type": provider_type, "provider_name": sso_config.get("name") if sso_config else None}
         })
         
         return True
@@ -367,6 +429,10 @@ class SSOService:
         if not sso_config:
             return None
         
+        return self.build_sso_provider(sso_config)
+    
+    def build_sso_provider(self, sso_config: Dict[str, Any]) -> SSOProvider:
+        """Build the SSO provider for an already loaded SSO configuration"""
         provider_type = sso_config.get("type")
         
         if provider_type == "oidc":
@@ -566,6 +632,10 @@ class SSOService:
                 detail="SSO not configured for organization"
             )
         
+        return self.build_sso_metadata(org_id, sso_config)
+    
+    def build_sso_metadata(self, org_id: str, sso_config: Dict[str, Any]) -> Dict[str, Any]:
+        """Build SSO metadata from an already loaded SSO configuration"""
         provider_type = sso_config.get("type")
         
         if provider_type == "saml":
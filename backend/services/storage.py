@@ -2,12 +2,13 @@
 Storage service for S3 integration and file management
 """
 
+import asyncio
 import hashlib
 import mimetypes
 import os
 import logging
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, BinaryIO
+from typing import Optional, Dict, Any, BinaryIO, List
 from uuid import UUID, uuid4
 
 import boto3
@@ -16,7 +17,7 @@ from fastapi import HTTPException, UploadFile
 from pydantic import BaseModel
 
 from core.config import settings
-from services.virus_scanner import scan_file_for_viruses, VirusScanResult
+from services.virus_scanner import scan_file_for_viruses, scan_s3_file_for_viruses, VirusScanResult
 from services.audit_service import audit_service, AuditAction, AuditLevel
 
 logger = logging.getLogger(__name__)
@@ -109,6 +110,14 @@ class StorageService:
         """Calculate SHA-256 hash of file content"""
         return hashlib.sha256(file_content).hexdigest()
     
+    def _calculate_spooled_file_hash(self, spool: BinaryIO) -> str:
+        """Calculate SHA-256 hash of a spooled file in chunks, leaving it rewound"""
+        sha256 = hashlib.sha256()
+        while chunk := spool.read(settings.S3_MULTIPART_PART_SIZE_BYTES):
+            sha256.update(chunk)
+        spool.seek(0)
+        return sha256.hexdigest()
+    
     def _validate_file_type(self, file_name: str, content_type: str) -> None:
         """Validate file type against allowed types"""
         _, ext = os.path.splitext(file_name.lower())
@@ -154,21 +163,32 @@ class StorageService:
         file: UploadFile,
         org_id: str,
         user_id: str,
-        document_id: Optional[str] = None
+        document_id: Optional[str] = None,
+        file_hash: Optional[str] = None
     ) -> DocumentUploadResponse:
         """
         Upload document to S3 with validation and virus scanning
         
+        Files of S3_MULTIPART_THRESHOLD_BYTES or more are streamed to S3 as a
+        multipart upload instead of being read into memory.
+        
         Args:
             file: FastAPI UploadFile object
             org_id: Organization ID
             user_id: User ID who is uploading
             document_id: Optional document ID (generated if not provided)
+            file_hash: Optional precomputed content hash (SHA-256 if not provided)
             
         Returns:
             DocumentUploadResponse with upload details
         """
         try:
+            file_size = self._get_upload_size(file)
+            if file_size >= settings.S3_MULTIPART_THRESHOLD_BYTES:
+                return await self._upload_document_multipart(
+                    file, org_id, user_id, file_size, document_id, file_hash
+                )
+            
             # Read file content
             file_content = await file.read()
             file_size = len(file_content)
@@ -177,47 +197,21 @@ class StorageService:
             self._validate_file_size(file_size)
             self._validate_file_type(file.filename, file.content_type)
             
+            # Calculate file hash
+            if not file_hash:
+                file_hash = self._calculate_file_hash(file_content)
+            
             # Virus scanning
             if settings.ENABLE_VIRUS_SCANNING:
                 try:
                     scan_result = await scan_file_for_viruses(file_content, file.filename)
-                    
-                    if not scan_result.is_clean:
-                        # Log security event
-                        await audit_service.log_security_event(
-                            action=AuditAction.VIRUS_DETECTED,
-                            details={
-                                "filename": file.filename,
-                                "threat_name": scan_result.threat_name,
-                                "file_size": file_size,
-                                "file_hash": self._calculate_file_hash(file_content)
-                            },
-                            user_id=user_id,
-                            org_id=org_id,
-                            level=AuditLevel.CRITICAL
-                        )
-                        
-                        raise HTTPException(
-                            status_code=400,
-                            detail={
-                                "error": "File contains malware",
-                                "threat_name": scan_result.threat_name,
-                                "details": scan_result.details
-                            }
-                        )
-                    
-                    logger.info(f"File {file.filename} passed virus scan", extra={
-                        "user_id": user_id,
-                        "org_id": org_id,
-                        "scan_details": scan_result.details
-                    })
-                    
                 except Exception as e:
                     logger.error(f"Virus scanning failed: {str(e)}")
                     # Continue with upload if virus scanning fails (fail open)
-            
-            # Calculate file hash
-            file_hash = self._calculate_file_hash(file_content)
+                    scan_result = None
+                
+                if scan_result is not None:
+                    await self._check_scan_result(scan_result, file, file_size, file_hash, user_id, org_id)
             
             # Generate S3 key
             if not document_id:
@@ -241,21 +235,6 @@ class StorageService:
                     },
                     ServerSideEncryption='AES256'
                 )
-                
-                # Log successful upload
-                await audit_service.log_document_action(
-                    action=AuditAction.DOCUMENT_UPLOAD,
-                    document_id=document_id,
-                    user_id=user_id,
-                    org_id=org_id,
-                    details={
-                        "filename": file.filename,
-                        "file_size": file_size,
-                        "file_hash": file_hash,
-                        "s3_key": s3_key
-                    }
-                )
-                
             except ClientError as e:
                 logger.error(f"S3 upload failed: {str(e)}")
                 raise HTTPException(
@@ -263,15 +242,7 @@ class StorageService:
                     detail=f"Failed to upload file to S3: {str(e)}"
                 )
             
-            # Generate presigned URL for immediate access
-            upload_url = self.generate_presigned_url(s3_key, expiration=3600)
-            
-            return DocumentUploadResponse(
-                document_id=document_id,
-                s3_key=s3_key,
-                upload_url=upload_url,
-                status="uploaded"
-            )
+            return await self._complete_upload(file, org_id, user_id, document_id, s3_key, file_size, file_hash)
             
         except HTTPException:
             raise
@@ -281,6 +252,219 @@ class StorageService:
                 detail=f"Unexpected error during upload: {str(e)}"
             )
     
+    def _get_upload_size(self, file: UploadFile) -> int:
+        """Get the size of an upload without reading it into memory"""
+        if file.size is not None:
+            return file.size
+        position = file.file.tell()
+        file_size = file.file.seek(0, os.SEEK_END)
+        file.file.seek(position)
+        return file_size
+    
+    async def _upload_parts(self, file: UploadFile, s3_key: str, upload_id: str) -> List[Dict[str, Any]]:
+        """
+        Stream an upload to S3 as multipart parts
+        
+        Parts are read from the spooled upload one at a time and sent from
+        worker threads, with at most S3_MULTIPART_MAX_CONCURRENCY parts in
+        flight, so peak memory stays at a few parts rather than the whole file.
+        
+        Returns:
+            Part list for complete_multipart_upload
+        """
+        part_size = settings.S3_MULTIPART_PART_SIZE_BYTES
+        slots = asyncio.Semaphore(settings.S3_MULTIPART_MAX_CONCURRENCY)
+        
+        async def upload_part(part_number: int, body: bytes) -> Dict[str, Any]:
+            try:
+                response = await asyncio.to_thread(
+                    self.s3_client.upload_part,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    UploadId=upload_id,
+                    PartNumber=part_number,
+                    Body=body
+                )
+                return {'ETag': response['ETag'], 'PartNumber': part_number}
+            finally:
+                slots.release()
+        
+        tasks = []
+        try:
+            while True:
+                await slots.acquire()
+                chunk = await file.read(part_size)
+                if not chunk:
+                    slots.release()
+                    break
+                tasks.append(asyncio.create_task(upload_part(len(tasks) + 1, chunk)))
+            
+            return list(await asyncio.gather(*tasks))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            raise
+    
+    async def _upload_document_multipart(
+        self,
+        file: UploadFile,
+        org_id: str,
+        user_id: str,
+        file_size: int,
+        document_id: Optional[str] = None,
+        file_hash: Optional[str] = None
+    ) -> DocumentUploadResponse:
+        """Upload a large document to S3 as a multipart upload, then virus scan the stored object"""
+        self._validate_file_size(file_size)
+        self._validate_file_type(file.filename, file.content_type)
+        
+        await file.seek(0)
+        if not file_hash:
+            file_hash = await asyncio.to_thread(self._calculate_spooled_file_hash, file.file)
+        
+        if not document_id:
+            document_id = str(uuid4())
+        s3_key = self._generate_s3_key(org_id, file.filename, document_id)
+        
+        try:
+            multipart = await asyncio.to_thread(
+                self.s3_client.create_multipart_upload,
+                Bucket=self.bucket_name,
+                Key=s3_key,
+                ContentType=file.content_type,
+                Metadata={
+                    'org_id': org_id,
+                    'user_id': user_id,
+                    'original_filename': file.filename,
+                    'file_hash': file_hash,
+                    'upload_timestamp': datetime.utcnow().isoformat(),
+                    'virus_scanned': str(settings.ENABLE_VIRUS_SCANNING)
+                },
+                ServerSideEncryption='AES256'
+            )
+            upload_id = multipart['UploadId']
+            
+            try:
+                parts = await self._upload_parts(file, s3_key, upload_id)
+                await asyncio.to_thread(
+                    self.s3_client.complete_multipart_upload,
+                    Bucket=self.bucket_name,
+                    Key=s3_key,
+                    UploadId=upload_id,
+                    MultipartUpload={'Parts': parts}
+                )
+            except BaseException:
+                # Abort so S3 does not keep billing for the orphaned parts
+                try:
+                    await asyncio.to_thread(
+                        self.s3_client.abort_multipart_upload,
+                        Bucket=self.bucket_name,
+                        Key=s3_key,
+                        UploadId=upload_id
+                    )
+                except ClientError as e:
+                    logger.error(f"Failed to abort multipart upload {upload_id}: {str(e)}")
+                raise
+            
+        except ClientError as e:
+            logger.error(f"S3 multipart upload failed: {str(e)}")
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to upload file to S3: {str(e)}"
+            )
+        
+        # The file was never held in memory, so scan the stored object instead
+        if settings.ENABLE_VIRUS_SCANNING:
+            try:
+                scan_result = await scan_s3_file_for_viruses(self.bucket_name, s3_key)
+            except Exception as e:
+                logger.error(f"Virus scanning failed: {str(e)}")
+                # Keep the upload if virus scanning fails (fail open)
+                scan_result = None
+            
+            if scan_result is not None:
+                if not scan_result.is_clean:
+                    await self.delete_document(s3_key)
+                await self._check_scan_result(scan_result, file, file_size, file_hash, user_id, org_id)
+        
+        return await self._complete_upload(file, org_id, user_id, document_id, s3_key, file_size, file_hash)
+    
+    async def _check_scan_result(
+        self,
+        scan_result: VirusScanResult,
+        file: UploadFile,
+        file_size: int,
+        file_hash: str,
+        user_id: str,
+        org_id: str
+    ) -> None:
+        """Log a virus scan result, raising after a security event when the file is infected"""
+        if not scan_result.is_clean:
+            # Log security event
+            await audit_service.log_security_event(
+                action=AuditAction.VIRUS_DETECTED,
+                details={
+                    "filename": file.filename,
+                    "threat_name": scan_result.threat_name,
+                    "file_size": file_size,
+                    "file_hash": file_hash
+                },
+                user_id=user_id,
+                org_id=org_id,
+                level=AuditLevel.CRITICAL
+            )
+            
+            raise HTTPException(
+                status_code=400,
+                detail={
+                    "error": "File contains malware",
+                    "threat_name": scan_result.threat_name,
+                    "details": scan_result.details
+                }
+            )
+        
+        logger.info(f"File {file.filename} passed virus scan", extra={
+            "user_id": user_id,
+            "org_id": org_id,
+            "scan_details": scan_result.details
+        })
+    
+    async def _complete_upload(
+        self,
+        file: UploadFile,
+        org_id: str,
+        user_id: str,
+        document_id: str,
+        s3_key: str,
+        file_size: int,
+        file_hash: str
+    ) -> DocumentUploadResponse:
+        """Audit a stored upload and build its response with a presigned URL"""
+        # Log successful upload
+        await audit_service.log_document_action(
+            action=AuditAction.DOCUMENT_UPLOAD,
+            document_id=document_id,
+            user_id=user_id,
+            org_id=org_id,
+            details={
+                "filename": file.filename,
+                "file_size": file_size,
+                "file_hash": file_hash,
+                "s3_key": s3_key
+            }
+        )
+        
+        # Generate presigned URL for immediate access
+        upload_url = self.generate_presigned_url(s3_key, expiration=3600)
+        
+        return DocumentUploadResponse(
+            document_id=document_id,
+            s3_key=s3_key,
+            upload_url=upload_url,
+            status="uploaded"
+        )
+    
     def generate_presigned_url(self, s3_key: str, expiration: int = 3600) -> str:
         """
         Generate presigned URL for S3 object access
@@ -351,7 +535,9 @@ class StorageService:
             True if successful, False otherwise
         """
         try:
-            self.s3_client.delete_object(
+            # boto3 is blocking; run it in a worker thread so callers can overlap it
+            await asyncio.to_thread(
+                self.s3_client.delete_object,
                 Bucket=self.bucket_name,
                 Key=s3_key
             )
@@ -6,8 +6,8 @@ import stripe
 import structlog
 from typing import Dict, Any, Optional, List
 from datetime import datetime, date, timedelta
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.config import settings
 from models.database import Organization, Subscription, UsageRecord, AuditLog
@@ -22,7 +22,7 @@ stripe.api_key = settings.STRIPE_SECRET_KEY
 class StripeService:
     """Service for managing Stripe billing and subscriptions"""
     
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
         self.base_repo = BaseRepository(db)
     
@@ -30,11 +30,11 @@ class StripeService:
         """Create a Stripe customer for an organization"""
         try:
             # Check if customer already exists
-            org = self.db.query(Organization).filter(Organization.id == org_id).first()
+            org = (await self.db.execute(select(Organization).where(Organization.id == org_id))).scalars().first()
             if not org:
                 raise ValueError(f"Organization {org_id} not found")
             
-            subscription = self.db.query(Subscription).filter(Subscription.org_id == org_id).first()
+            subscription = (await self.db.execute(select(Subscription).where(Subscription.org_id == org_id))).scalars().first()
             if subscription and subscription.stripe_customer_id:
                 # Return existing customer
                 customer = stripe.Customer.retrieve(subscription.stripe_customer_id)
@@ -74,7 +74,7 @@ class StripeService:
                 )
                 self.db.add(subscription)
             
-            self.db.commit()
+            await self.db.commit()
             
             logger.info("Created Stripe customer", customer_id=customer.id, org_id=org_id)
             
@@ -90,13 +90,13 @@ class StripeService:
             raise Exception(f"Failed to create customer: {str(e)}")
         except Exception as e:
             logger.error("Error creating customer", error=str(e), org_id=org_id)
-            self.db.rollback()
+            await self.db.rollback()
             raise
     
     async def create_subscription(self, org_id: str, price_id: str, payment_method_id: Optional[str] = None) -> Dict[str, Any]:
         """Create a Stripe subscription for an organization"""
         try:
-            subscription_record = self.db.query(Subscription).filter(Subscription.org_id == org_id).first()
+            subscription_record = (await self.db.execute(select(Subscription).where(Subscription.org_id == org_id))).scalars().first()
             if not subscription_record or not subscription_record.stripe_customer_id:
                 raise ValueError("Customer must be created before subscription")
             
@@ -125,7 +125,7 @@ class StripeService:
             subscription_record.status = stripe_subscription.status
             subscription_record.usage_limits = usage_limits
             
-            self.db.commit()
+            await self.db.commit()
             
             logger.info("Created Stripe subscription", 
                        subscription_id=stripe_subscription.id, 
@@ -144,7 +144,7 @@ class StripeService:
             raise Exception(f"Failed to create subscription: {str(e)}")
         except Exception as e:
             logger.error("Error creating subscription", error=str(e), org_id=org_id)
-            self.db.rollback()
+            await self.db.rollback()
             raise
     
     async def handle_webhook(self, event_data: Dict[str, Any], signature: str) -> Dict[str, Any]:
@@ -159,9 +159,9 @@ class StripeService:
             event_type = event["type"]
             
             # Check for idempotency - prevent duplicate processing
-            existing_audit = self.db.query(AuditLog).filter(
+            existing_audit = (await self.db.execute(select(AuditLog).where(
                 AuditLog.payload_json["stripe_event_id"].astext == event_id
-            ).first()
+            ))).scalars().first()
             
             if existing_audit:
                 logger.info("Webhook already processed", event_id=event_id, event_type=event_type)
@@ -183,7 +183,7 @@ class StripeService:
                 }
             )
             self.db.add(audit_log)
-            self.db.commit()
+            await self.db.commit()
             
             logger.info("Processed webhook", event_id=event_id, event_type=event_type)
             
@@ -194,7 +194,7 @@ class StripeService:
             raise Exception("Invalid webhook signature")
         except Exception as e:
             logger.error("Error processing webhook", error=str(e))
-            self.db.rollback()
+            await self.db.rollback()
             raise
     
     async def _process_webhook_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
@@ -223,13 +223,13 @@ class StripeService:
         status = subscription_data["status"]
         
         # Find organization by customer ID
-        subscription_record = self.db.query(Subscription).filter(
+        subscription_record = (await self.db.execute(select(Subscription).where(
             Subscription.stripe_customer_id == customer_id
-        ).first()
+        ))).scalars().first()
         
         if subscription_record:
             subscription_record.status = status
-            self.db.commit()
+            await self.db.commit()
             
             return {
                 "org_id": str(subscription_record.org_id),
@@ -246,13 +246,13 @@ class StripeService:
         subscription_id = subscription_data["id"]
         status = subscription_data["status"]
         
-        subscription_record = self.db.query(Subscription).filter(
+        subscription_record = (await self.db.execute(select(Subscription).where(
             Subscription.stripe_customer_id == customer_id
-        ).first()
+        ))).scalars().first()
         
         if subscription_record:
             subscription_record.status = status
-            self.db.commit()
+            await self.db.commit()
             
             return {
                 "org_id": str(subscription_record.org_id),
@@ -268,16 +268,16 @@ class StripeService:
         customer_id = subscription_data["customer"]
         subscription_id = subscription_data["id"]
         
-        subscription_record = self.db.query(Subscription).filter(
+        subscription_record = (await self.db.execute(select(Subscription).where(
             Subscription.stripe_customer_id == customer_id
-        ).first()
+        ))).scalars().first()
         
         if subscription_record:
             # Downgrade to free plan
             subscription_record.plan = "free"
             subscription_record.status = "canceled"
             subscription_record.usage_limits = self._get_usage_limits_for_plan("free")
-            self.db.commit()
+            await self.db.commit()
             
             return {
                 "org_id": str(subscription_record.org_id),
@@ -292,9 +292,9 @@ class StripeService:
         customer_id = invoice_data["customer"]
         amount_paid = invoice_data["amount_paid"]
         
-        subscription_record = self.db.query(Subscription).filter(
+        subscription_record = (await self.db.execute(select(Subscription).where(
             Subscription.stripe_customer_id == customer_id
-        ).first()
+        ))).scalars().first()
         
         if subscription_record:
             return {
@@ -309,9 +309,9 @@ class StripeService:
         """Handle failed payment webhook"""
         customer_id = invoice_data["customer"]
         
-        subscription_record = self.db.query(Subscription).filter(
+        subscription_record = (await self.db.execute(select(Subscription).where(
             Subscription.stripe_customer_id == customer_id
-        ).first()
+        ))).scalars().first()
         
         if subscription_record:
             # Could implement logic to suspend service or send notifications
@@ -338,14 +338,14 @@ class StripeService:
                     period_end = date(period_start.year, period_start.month + 1, 1) - timedelta(days=1)
             
             # Check if usage record already exists for this period
-            existing_record = self.db.query(UsageRecord).filter(
+            existing_record = (await self.db.execute(select(UsageRecord).where(
                 and_(
                     UsageRecord.org_id == org_id,
                     UsageRecord.usage_type == usage_type,
                     UsageRecord.period_start == period_start,
                     UsageRecord.period_end == period_end
                 )
-            ).first()
+            ))).scalars().first()
             
             if existing_record:
                 existing_record.amount += amount
@@ -359,7 +359,7 @@ class StripeService:
                 )
                 self.db.add(usage_record)
             
-            self.db.commit()
+            await self.db.commit()
             
             logger.info("Tracked usage", 
                        org_id=org_id, 
@@ -372,7 +372,7 @@ class StripeService:
             
         except Exception as e:
             logger.error("Error tracking usage", error=str(e), org_id=org_id)
-            self.db.rollback()
+            await self.db.rollback()
             raise
     
     async def get_usage_summary(self, org_id: str, period_start: Optional[date] = None, period_end: Optional[date] = None) -> Dict[str, Any]:
@@ -390,25 +390,27 @@ class StripeService:
                 else:
                     period_end = date(period_start.year, period_start.month + 1, 1) - timedelta(days=1)
             
-            usage_records = self.db.query(UsageRecord).filter(
-                and_(
-                    UsageRecord.org_id == org_id,
-                    UsageRecord.period_start >= period_start,
-                    UsageRecord.period_end <= period_end
+            # Aggregate usage by type
+            usage_result = await self.db.execute(
+                select(UsageRecord.usage_type, func.sum(UsageRecord.amount))
+                .where(
+                    and_(
+                        UsageRecord.org_id == org_id,
+                        UsageRecord.period_start >= period_start,
+                        UsageRecord.period_end <= period_end
+                    )
                 )
-            ).all()
+                .group_by(UsageRecord.usage_type)
+            )
+            usage_summary = {usage_type: int(total) for usage_type, total in usage_result}
             
             # Get subscription limits
-            subscription = self.db.query(Subscription).filter(Subscription.org_id == org_id).first()
+            subscription_result = await self.db.execute(
+                select(Subscription).where(Subscription.org_id == org_id)
+            )
+            subscription = subscription_result.scalar_one_or_none()
             limits = subscription.usage_limits if subscription else self._get_usage_limits_for_plan("free")
             
-            # Aggregate usage by type
-            usage_summary = {}
-            for record in usage_records:
-                if record.usage_type not in usage_summary:
-                    usage_summary[record.usage_type] = 0
-                usage_summary[record.usage_type] += record.amount
-            
             # Calculate percentages and remaining
             result = {
                 "period_start": period_start.isoformat(),
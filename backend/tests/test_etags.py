@@ -0,0 +1,30 @@
+"""
+Tests for If-None-Match matching
+"""
+
+import pytest
+
+from core.etags import etag_matches
+
+STRONG = '"abc123"'
+WEAK = 'W/"abc123"'
+
+
+@pytest.mark.parametrize("etag", [STRONG, WEAK])
+@pytest.mark.parametrize("if_none_match", [STRONG, WEAK, f' {STRONG} ', f'"other", {WEAK}'])
+def test_matching_tag_matches_whatever_its_strength(if_none_match, etag):
+    """Weak comparison ignores the W/ prefix on either side"""
+    assert etag_matches(if_none_match, etag)
+
+
+@pytest.mark.parametrize("if_none_match", ["*", ' * ', '"other", *'])
+def test_wildcard_matches_any_tag(if_none_match):
+    """"*" matches whatever the current ETag is"""
+    assert etag_matches(if_none_match, WEAK)
+
+
+@pytest.mark.parametrize("if_none_match", [None, "", '"other"', 'W/"other", "abc12"', '"abc123-gzip"'])
+def test_other_tags_do_not_match(if_none_match):
+    """A missing header or a list without the ETag does not match"""
+    assert not etag_matches(if_none_match, STRONG)
+    assert not etag_matches(if_none_match, WEAK)
@@ -0,0 +1,90 @@
+"""
+Tests for the line diff algorithms
+"""
+
+import random
+
+import pytest
+
+from services.line_diff import DIFF_ALGORITHMS, myers_diff
+
+
+def apply_hunks(a, b, hunks):
+    """Rebuild B by replacing each hunk's A range with its B range"""
+    result = []
+    position = 0
+    for a_start, a_end, b_start, b_end in hunks:
+        assert a_start >= position
+        result.extend(a[position:a_start])
+        result.extend(b[b_start:b_end])
+        position = a_end
+    result.extend(a[position:])
+    return result
+
+
+def lcs_length(a, b):
+    """Length of the longest common subsequence, by dynamic programming"""
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+
+def random_pairs(count, seed=0):
+    """Yield small random line sequences over a tiny alphabet, so lines repeat"""
+    rng = random.Random(seed)
+    for _ in range(count):
+        alphabet = "abcde"[:rng.randint(1, 5)]
+        a = [rng.choice(alphabet) for _ in range(rng.randint(0, 20))]
+        b = [rng.choice(alphabet) for _ in range(rng.randint(0, 20))]
+        yield a, b
+
+
+@pytest.mark.parametrize("algorithm", sorted(DIFF_ALGORITHMS))
+def test_hunks_reproduce_b_from_a(algorithm):
+    """Applying the hunks to A yields B"""
+    diff = DIFF_ALGORITHMS[algorithm]
+    for a, b in random_pairs(2000):
+        assert apply_hunks(a, b, diff(a, b)) == b
+
+
+@pytest.mark.parametrize("algorithm", sorted(DIFF_ALGORITHMS))
+def test_hunks_are_ordered_and_merged(algorithm):
+    """Hunks come out in document order and never touch each other"""
+    diff = DIFF_ALGORITHMS[algorithm]
+    for a, b in random_pairs(500, seed=1):
+        hunks = diff(a, b)
+        for previous, hunk in zip(hunks, hunks[1:]):
+            assert previous[1] < hunk[0] or previous[3] < hunk[2]
+
+
+@pytest.mark.parametrize("algorithm", sorted(DIFF_ALGORITHMS))
+def test_identical_and_empty_inputs(algorithm):
+    """Equal inputs have no hunks; an empty side is one whole-range hunk"""
+    diff = DIFF_ALGORITHMS[algorithm]
+    lines = ["a", "b", "c"]
+    assert diff(lines, list(lines)) == []
+    assert diff([], lines) == [(0, 0, 0, 3)]
+    assert diff(lines, []) == [(0, 3, 0, 0)]
+
+
+def test_myers_is_minimal():
+    """Myers edits exactly the lines outside a longest common subsequence"""
+    for a, b in random_pairs(2000, seed=2):
+        edits = sum(a_end - a_start + b_end - b_start for a_start, a_end, b_start, b_end in myers_diff(a, b))
+        assert edits == len(a) + len(b) - 2 * lcs_length(a, b)
+
+
+@pytest.mark.parametrize("algorithm", sorted(DIFF_ALGORITHMS))
+def test_scattered_edits_in_long_document(algorithm):
+    """Every 20th line of a long contract changed gives one hunk per change"""
+    a = [f"Clause {i}: the party shall perform obligation {i}." for i in range(5000)]
+    b = list(a)
+    for i in range(0, len(b), 20):
+        b[i] += " (amended)"
+    
+    hunks = DIFF_ALGORITHMS[algorithm](a, b)
+    assert hunks == [(i, i + 1, i, i + 1) for i in range(0, len(a), 20)]
@@ -0,0 +1,48 @@
+"""
+Tests for signed webhook authentication and payload parsing
+"""
+
+import pytest
+from fastapi import HTTPException
+
+from core.webhooks import parse_webhook_payload, sign_webhook_body, verify_webhook_signature
+
+SECRET = "test-webhook-secret"
+BODY = b'{"document_id": "00000000-0000-0000-0000-000000000001", "org_id": "o", "status": "completed"}'
+
+
+def test_valid_signature_is_accepted():
+    """A body signed with the shared secret verifies"""
+    assert verify_webhook_signature(BODY, sign_webhook_body(BODY, SECRET), SECRET)
+
+
+def test_bad_signature_is_rejected():
+    """Signatures from another secret or over another body do not verify"""
+    assert not verify_webhook_signature(BODY, sign_webhook_body(BODY, "other-secret"), SECRET)
+    assert not verify_webhook_signature(BODY + b" ", sign_webhook_body(BODY, SECRET), SECRET)
+    assert not verify_webhook_signature(BODY, sign_webhook_body(BODY, SECRET)[len("sha256="):], SECRET)
+
+
+def test_missing_signature_header_is_rejected():
+    """Requests without a signature header do not verify"""
+    assert not verify_webhook_signature(BODY, None, SECRET)
+    assert not verify_webhook_signature(BODY, "", SECRET)
+
+
+@pytest.mark.parametrize("secret", [None, ""])
+def test_unset_secret_rejects_everything(secret):
+    """With no secret configured, even a correctly formed signature is rejected"""
+    assert not verify_webhook_signature(BODY, sign_webhook_body(BODY, ""), secret)
+
+
+def test_object_payload_is_parsed():
+    """A JSON object body is returned as a dict"""
+    assert parse_webhook_payload(BODY)["status"] == "completed"
+
+
+@pytest.mark.parametrize("body", [b"[1, 2]", b'"completed"', b"null", b"not json", b""])
+def test_non_object_payload_is_rejected(body):
+    """Bodies that are not a JSON object are a 400"""
+    with pytest.raises(HTTPException) as exc_info:
+        parse_webhook_payload(body)
+    assert exc_info.value.status_code == 400